@@ -1,5 +0,0 @@
-variable "command" {
-  description = "The command to get help for"
-  type        = string
-  default     = ""
-}
@@ -1,10 +0,0 @@
-terraform {
-  required_version = ">= 1.8"
-
-  required_providers {
-    shell = {
-      source  = "scottwinkler/shell"
-      version = "~> 1.7.10"
-    }
-  }
-}
@@ -1,6 +1,6 @@
 variable "path" {
   description = "The path to the module.tfvars file"
-  type        = number
+  type        = string
   default     = null
 }
 
@@ -1,10 +0,0 @@
-locals {
-  banner  = <<EOT
-
-#
-# include: ${var.path}
-#
-
-EOT
-  snippet = "${local.banner}${replace(var.snippet, "#!${var.interpreter}", "")}"
-}
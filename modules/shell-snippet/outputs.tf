@@ -1,4 +0,0 @@
-output "snippet" {
-  description = "The shell snippet"
-  value       = local.snippet
-}
@@ -1,3 +0,0 @@
-terraform {
-  required_version = ">= 1.8"
-}
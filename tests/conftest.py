@@ -17,7 +17,7 @@ def fixtures_dir() -> Path:
 @pytest.fixture
 def tf_module() -> Callable[[str], tftest.TerraformTest]:
     def get_module(name: str) -> tftest.TerraformTest:
-        tf = tftest.TerraformTest("spec", str(MODULES_DIR))
+        tf = tftest.TerraformTest(name, str(MODULES_DIR))
         tf.setup()
         return tf
 
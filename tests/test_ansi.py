@@ -0,0 +1,25 @@
+import io
+
+from tfmod.io.ansi import color_enabled, render
+
+
+def test_plain_removes_only_known_tags() -> None:
+    text = "[green]+[/green] module.tfvars [bold]names[0][/bold] [white on blue]x[/]"
+
+    assert render(text, False) == "+ module.tfvars names[0] x"
+
+
+def test_color_restores_outer_styles() -> None:
+    text = "[red]│ Error:[/red] [bold]oops[/bold] [color(8)]─"
+
+    assert render(text, True) == (
+        "\x1b[31m│ Error:\x1b[0m \x1b[1moops\x1b[0m \x1b[38;5;8m─\x1b[0m"
+    )
+    assert render("[bold][red]a[/red]b[/bold]", True) == (
+        "\x1b[1m\x1b[31ma\x1b[0m\x1b[1mb\x1b[0m"
+    )
+
+
+def test_color_disabled() -> None:
+    assert not color_enabled(io.StringIO(), dict())
+    assert not color_enabled(io.StringIO(), dict(NO_COLOR="1"))
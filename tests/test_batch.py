@@ -0,0 +1,116 @@
+import io
+from threading import Thread
+from typing import Any, cast
+
+import pytest
+import requests
+
+from tfmod.error import GitDirtyError
+from tfmod.io import output_prefix, PrefixedOutput
+from tfmod.plan import ResourceContext
+from tfmod.publish import batch, git_actions, INITIAL_COMMIT_MESSAGE, mop_actions
+from tfmod.publish.batch import _check_registry, discover_modules, ModulePublish
+from tfmod.registry import Registry, RegistryIndex
+from tfmod.spec import Spec
+
+
+class DirtyRepo:
+    def dirty(self) -> bool:
+        return True
+
+    def status(self) -> None:
+        raise AssertionError("status should not be shown in batch mode")
+
+
+class FakeContext:
+    def __init__(self, repo: Any) -> None:
+        self.repo = repo
+
+    def may(self, cls: Any) -> Any:
+        return self.repo
+
+
+def test_batch_plans_never_prompt() -> None:
+    dirty = cast(ResourceContext, FakeContext(DirtyRepo()))
+    with pytest.raises(GitDirtyError):
+        mop_actions(dirty, force=False, batch=True)
+    assert mop_actions(dirty, force=True, batch=True) == []
+
+    missing = cast(ResourceContext, FakeContext(None))
+    commit = git_actions(missing, batch=True)[-1]
+    assert commit.args == dict(message=INITIAL_COMMIT_MESSAGE)
+
+
+def test_discover_modules(tmp_path) -> None:
+    for name in ["terraform-aws-a", "terraform-aws-b", "nested/terraform-aws-c"]:
+        (tmp_path / name).mkdir(parents=True)
+        (tmp_path / name / "module.tfvars").touch()
+    (tmp_path / "not-a-module").mkdir()
+
+    assert discover_modules([str(tmp_path / "terraform-*")]) == [
+        str(tmp_path / "terraform-aws-a"),
+        str(tmp_path / "terraform-aws-b"),
+    ]
+    assert discover_modules([str(tmp_path / "nested"), str(tmp_path / "*-a")]) == [
+        str(tmp_path / "nested" / "terraform-aws-c"),
+        str(tmp_path / "terraform-aws-a"),
+    ]
+
+
+def test_prefixed_output() -> None:
+    stream = io.StringIO()
+    out = PrefixedOutput(stream)
+
+    def write(prefix: str) -> None:
+        with output_prefix(prefix):
+            for i in range(100):
+                out.write(f"line {i}")
+                out.write("\n")
+
+    threads = [Thread(target=write, args=(p,)) for p in ["a | ", "b | "]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    out.write("unprefixed\n")
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 201
+    assert all(line.startswith(("a | line ", "b | line ")) for line in lines[:-1])
+    assert lines[-1] == "unprefixed"
+
+
+class DownSession:
+    def get(self, url: str, **kwargs) -> requests.Response:
+        raise requests.ConnectionError("Connection refused")
+
+
+def test_check_registry_survives_network_errors(tmp_path, monkeypatch) -> None:
+    registry = Registry()
+    registry.session = cast(requests.Session, DownSession())
+    monkeypatch.setattr(
+        batch, "RegistryIndex", lambda: RegistryIndex(registry, path=tmp_path)
+    )
+
+    modules = [
+        ModulePublish(
+            path=str(tmp_path / name),
+            prefix=f"{name} | ",
+            spec=Spec(
+                name=name,
+                namespace="jfhbrook",
+                provider="shell",
+                version="1.0.0",
+                description=None,
+                private=False,
+                scripts=dict(),
+            ),
+            applied=True,
+        )
+        for name in ["a", "b"]
+    ]
+
+    _check_registry(modules)
+
+    assert [module.status() for module in modules] == ["published 1.0.0"] * 2
@@ -0,0 +1,49 @@
+import hcl2
+
+from tfmod.build import build, render_template
+from tfmod.constants import MODULES_DIR, PACKAGE_DIR, VARIABLES_JSON
+from tfmod.terraform.variables import load_variables, parse_variables, Variable
+
+
+def test_render_template() -> None:
+    assert render_template("${A} $${B}", dict(A="a")) == "a ${B}"
+
+
+def test_build_matches_entrypoint(tmp_path) -> None:
+    output = tmp_path / "tfmod"
+    variables = tmp_path / "variables.json"
+    cache = tmp_path / "cache.json"
+
+    assert build(output=output, cache_path=cache, variables_output=variables)
+    assert output.read_text() == (PACKAGE_DIR / "bin" / "tfmod").read_text()
+    assert variables.read_text() == VARIABLES_JSON.read_text()
+
+    # Nothing changed, so nothing is written
+    assert not build(output=output, cache_path=cache, variables_output=variables)
+
+
+def test_variables_manifest() -> None:
+    for module in ["init", "spec"]:
+        with open(MODULES_DIR / module / "variables.tf", "r") as f:
+            parsed = parse_variables(hcl2.load(f))
+
+        assert load_variables(MODULES_DIR / module) == parsed
+
+
+def test_variable_types() -> None:
+    variables = parse_variables(
+        hcl2.loads(
+            'variable "a" {\n  type = list(string)\n}\n'
+            'variable "b" {\n'
+            "  type = object({ name = string, git = optional(object({})) })\n"
+            "}\n"
+            'variable "c" {\n  type = object({ name = optional(string, "x") })\n}\n'
+        )
+    )
+
+    assert variables == dict(
+        a=Variable(type="list(string)"),
+        b=Variable(type="object({ name = string, git = optional(object({})) })"),
+        # Optional attributes with defaults aren't supported
+        c=Variable(type=None),
+    )
@@ -0,0 +1,43 @@
+import subprocess
+
+import tfmod.publish.fingerprint
+from tfmod.publish.fingerprint import record_published, unchanged_since_publish
+
+
+def git(path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=path, check=True, capture_output=True)
+
+
+def test_unchanged_since_publish(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "Test")
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "test@example.com")
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "Test")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "test@example.com")
+    monkeypatch.setattr(
+        tfmod.publish.fingerprint,
+        "published_path",
+        lambda path: tmp_path / "published.json",
+    )
+
+    module = tmp_path / "terraform-aws-test"
+    module.mkdir()
+    (module / "module.tfvars").write_text('module = { version = "1.0.0" }\n')
+    git(module, "init")
+    git(module, "add", ".")
+    git(module, "commit", "-m", "Initial commit")
+
+    assert not unchanged_since_publish(str(module))
+
+    git(module, "tag", "1.0.0")
+    record_published(str(module))
+
+    assert unchanged_since_publish(str(module))
+
+    (module / "module.tfvars").write_text('module = { version = "1.0.1" }\n')
+
+    assert not unchanged_since_publish(str(module))
+
+    # A publish from a dirty tree (with -force) never takes the fast path
+    record_published(str(module))
+    assert not unchanged_since_publish(str(module))
+    assert not (tmp_path / "published.json").exists()
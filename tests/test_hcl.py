@@ -0,0 +1,49 @@
+import pytest
+
+from tfmod import hcl
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch) -> hcl.HclCache:
+    cache = hcl.HclCache(tmp_path / "cache", memory_entries=1, disk_entries=2)
+    monkeypatch.setattr(hcl, "cache", cache)
+    return cache
+
+
+def test_load_cached(cache, tmp_path, fixtures_dir) -> None:
+    path = tmp_path / "module.tfvars"
+    path.write_text((fixtures_dir / "full-module.tfvars").read_text())
+
+    document = hcl.load(path)
+    assert document["module"]["name"] == "name"
+
+    # Loaded from disk, even without the in-memory cache
+    cache.clear()
+    assert hcl.load(path) == document
+    assert len(list(cache.path.glob("*.json"))) == 1
+
+    # Changes are picked up
+    path.write_text('module = { name = "changed" }\n')
+    assert hcl.load(path)["module"]["name"] == "changed"
+
+
+def test_evicts_least_recently_used(cache, tmp_path) -> None:
+    paths = [tmp_path / f"{i}.tfvars" for i in range(3)]
+    for i, path in enumerate(paths):
+        path.write_text(f"value = {i}\n")
+        hcl.load(path)
+
+    assert len(list(cache.path.glob("*.json"))) == 2
+    assert len(cache._memory) == 1
+
+
+def test_versioned(cache, tmp_path, monkeypatch) -> None:
+    path = tmp_path / "module.tfvars"
+    path.write_text("value = 1\n")
+    hcl.load(path)
+
+    # Upgrading the cache format or python-hcl2 misses the old entries
+    monkeypatch.setattr(hcl, "CACHE_VERSION", hcl.CACHE_VERSION + 1)
+    cache.clear()
+    hcl.load(path)
+    assert len(list(cache.path.glob("*.json"))) == 2
@@ -0,0 +1,72 @@
+import shutil
+
+import pytest
+
+from tfmod.error import ManifestError
+from tfmod.init import init_all, init_spec, load_manifest
+from tfmod.spec import Spec
+
+VALUES = dict(
+    namespace="jfhbrook",
+    name="my-module",
+    provider_="aws",
+    version_="1.2.0",
+    description='Says "hi" to ${var.name}',
+)
+
+
+def test_init_spec(fixtures_dir) -> None:
+    current = Spec.load(fixtures_dir / "init")
+    golden = (fixtures_dir / "init-golden.tfvars").read_text()
+
+    assert init_spec(VALUES, current).dump() == golden
+
+
+@pytest.mark.skipif(not shutil.which("terraform"), reason="terraform not installed")
+def test_init_module_matches_golden(tf_module, fixtures_dir, tmp_path) -> None:
+    tf = tf_module("init")
+    path = tmp_path / "module.tfvars"
+
+    tf.apply(
+        tf_vars=dict(VALUES, path=str(path)),
+        tf_var_file=fixtures_dir / "init" / "module.tfvars",
+    )
+
+    assert path.read_text() == (fixtures_dir / "init-golden.tfvars").read_text()
+
+
+def test_init_all(fixtures_dir, tmp_path) -> None:
+    shutil.copytree(fixtures_dir / "init", tmp_path / "existing")
+    manifest = tmp_path / "manifest.csv"
+    manifest.write_text(
+        "path,namespace,name,provider,version,description\n"
+        'existing,jfhbrook,my-module,aws,1.2.0,"Says ""hi"" to ${var.name}"\n'
+        "new,,,google,,\n"
+    )
+
+    init_all(manifest, jobs=2, default_namespace="octocat")
+
+    golden = (fixtures_dir / "init-golden.tfvars").read_text()
+    assert (tmp_path / "existing" / "module.tfvars").read_text() == golden
+
+    # Unset values get the same defaults as tfmod init
+    created = Spec.load(tmp_path / "new")
+    assert created.namespace == "octocat"
+    assert created.name == "new"
+    assert created.provider == "google"
+    assert created.version == "1.0.0"
+
+
+@pytest.mark.parametrize(
+    "rows,message",
+    [
+        ('[{"path": "a"}, {"path": "./b/../a"}]', "Entries 1 and 2"),
+        ('[{"path": 1}]', "must be a string"),
+    ],
+)
+def test_load_manifest_rejects(tmp_path, rows, message) -> None:
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(rows)
+
+    with pytest.raises(ManifestError, match=message):
+        load_manifest(manifest)
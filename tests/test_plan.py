@@ -0,0 +1,212 @@
+from typing import Any, cast, List, Optional
+
+import pytest
+
+from tfmod import publish
+from tfmod.journal import Journal
+from tfmod.plan import (
+    Action,
+    apply,
+    check,
+    CHECKS,
+    operation,
+    Resource,
+    ResourceContext,
+)
+from tfmod.publish import module_journal, resume
+from tfmod.publish.fingerprint import Fingerprint
+from tfmod.publish.plan_file import SavedPlan
+from tfmod.publish.resource import repository
+from tfmod.publish.resource.repository import Repository, RepositoryResource
+from tfmod.snapshot import Refresh, Snapshot
+from tfmod.spec import Spec
+
+CALLS: List[str] = list()
+
+
+@operation("test.record")
+def record(path: str, what: str) -> None:
+    CALLS.append(f"{path}:{what}")
+
+
+def test_saved_plan_round_trip(tmp_path) -> None:
+    spec = Spec(
+        name="name",
+        namespace="namespace",
+        provider="aws",
+        version="1.0.0",
+        description="A description",
+        private=False,
+        scripts=dict(),
+    )
+    saved = SavedPlan(
+        path=str(tmp_path),
+        spec=spec,
+        remote="origin",
+        fingerprint=Fingerprint(
+            head="abc123", spec="def456", remote_refs=None, description=None
+        ),
+        actions=[
+            Action(type="+", name="record", op="test.record", args=dict(what="a"))
+        ],
+    )
+
+    saved.save(str(tmp_path / "plan.json"))
+    loaded = SavedPlan.load(str(tmp_path / "plan.json"))
+
+    assert loaded == saved
+
+    for action in loaded.actions:
+        action.run(str(tmp_path))
+
+    assert CALLS == [f"{tmp_path}:a"]
+
+
+class CountingResource(Resource[str]):
+    name = "counting"
+    persist = True
+
+    def __init__(self, context: ResourceContext) -> None:
+        super().__init__(context)
+        self.gets = 0
+
+    def get(self) -> Optional[str]:
+        self.gets += 1
+        return "value"
+
+    def dump(self, resource: str) -> Any:
+        return resource
+
+    def load(self, data: Any) -> str:
+        return data
+
+
+def test_contexts_are_independent(tmp_path) -> None:
+    a = ResourceContext(str(tmp_path / "a"), snapshot=Snapshot(tmp_path / "a.json"))
+    b = ResourceContext(str(tmp_path / "b"), snapshot=Snapshot(tmp_path / "b.json"))
+
+    assert a.must(CountingResource) == "value"
+    assert a.must(CountingResource) == "value"
+    assert b.must(CountingResource) == "value"
+
+    assert cast(CountingResource, a.resource(CountingResource)).gets == 1
+    assert cast(CountingResource, b.resource(CountingResource)).gets == 1
+
+
+def test_refresh_false_uses_snapshot(tmp_path) -> None:
+    path = tmp_path / "snapshot.json"
+
+    ctx = ResourceContext(str(tmp_path), snapshot=Snapshot(path))
+    assert ctx.must(CountingResource) == "value"
+
+    # A new process would start with an empty in-memory cache
+    ctx = ResourceContext(
+        str(tmp_path), refresh=Refresh(enabled=False), snapshot=Snapshot(path)
+    )
+    assert ctx.must(CountingResource) == "value"
+    assert cast(CountingResource, ctx.resource(CountingResource)).gets == 0
+
+
+@operation("test.fail")
+def fail(path: str) -> None:
+    raise RuntimeError("network drop")
+
+
+@check("test.record")
+def recorded(path: str, what: str) -> bool:
+    return f"{path}:{what}" in CALLS
+
+
+def test_journal_records_progress(tmp_path) -> None:
+    ctx = ResourceContext(str(tmp_path), snapshot=Snapshot(tmp_path / "s.json"))
+    journal = Journal(tmp_path / "journal.jsonl", spec="abc123")
+    plan = [
+        Action(type="+", name="record", op="test.record", args=dict(what="b")),
+        Action(type="~", name="fail", op="test.fail"),
+        Action(type="~", name="record", op="test.record", args=dict(what="c")),
+    ]
+
+    with pytest.raises(RuntimeError):
+        apply(ctx, plan, auto_approve=True, journal=journal)
+
+    state = journal.read()
+    assert state is not None
+    assert state.spec == "abc123"
+    assert state.started == {0, 1}
+    assert state.completed == {0}
+    assert [Action.load(action) for action in state.actions] == plan
+
+    assert plan[0].verify(str(tmp_path))
+    assert not plan[2].verify(str(tmp_path))
+    assert "test.fail" not in CHECKS
+
+    apply(ctx, plan[:1], auto_approve=True, journal=journal)
+    assert journal.read() is None
+
+
+def test_resume_finishes_when_all_done(fixtures_dir, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(publish, "journal_path", lambda path: tmp_path / "j.jsonl")
+    monkeypatch.setattr(publish, "record_published", lambda path: None)
+
+    path = str(fixtures_dir / "init")
+    ctx = ResourceContext(path, snapshot=Snapshot(tmp_path / "s.json"))
+    journal = module_journal(ctx)
+    plan = [
+        Action(type="+", name="record", op="test.record", args=dict(what="d")),
+        Action(type="+", name="record", op="test.record", args=dict(what="e")),
+    ]
+
+    # The process died after both actions ran, but before the journal was
+    # finished
+    journal.begin([action.dump() for action in plan])
+    for i, action in enumerate(plan):
+        journal.start(i)
+        action.run(path)
+    journal.complete(0)
+
+    assert resume(ctx, auto_approve=True, wait=0)
+    assert journal.read() is None
+    assert CALLS.count(f"{path}:d") == 1
+
+
+def test_resume_reruns_undone_actions(fixtures_dir, tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(publish, "journal_path", lambda path: tmp_path / "j.jsonl")
+    monkeypatch.setattr(publish, "record_published", lambda path: None)
+
+    path = str(fixtures_dir / "init")
+    ctx = ResourceContext(path, snapshot=Snapshot(tmp_path / "s.json"))
+    journal = module_journal(ctx)
+    plan = [
+        Action(type="+", name="record", op="test.record", args=dict(what="f")),
+        Action(type="+", name="record", op="test.record", args=dict(what="g")),
+    ]
+
+    journal.begin([action.dump() for action in plan])
+    for i, action in enumerate(plan):
+        journal.start(i)
+        action.run(path)
+        journal.complete(i)
+
+    # The second action completed, but was undone after the apply died
+    CALLS.remove(f"{path}:g")
+
+    assert resume(ctx, auto_approve=True, wait=0)
+    assert journal.read() is None
+    assert CALLS.count(f"{path}:f") == 1
+    assert CALLS.count(f"{path}:g") == 1
+
+
+def test_repository_loads_without_github(tmp_path, monkeypatch) -> None:
+    def no_client() -> None:
+        raise AssertionError("gh_client should not be called")
+
+    monkeypatch.setattr(repository, "gh_client", no_client)
+    ctx = ResourceContext(str(tmp_path), snapshot=Snapshot(tmp_path / "s.json"))
+    resource = RepositoryResource(ctx)
+
+    # Older snapshots hold the repository's full raw data
+    raw = dict(full_name="a/b", description="desc", default_branch="main", id=1)
+    loaded = resource.load(raw)
+
+    assert loaded == Repository("a/b", "desc", "main")
+    assert resource.load(resource.dump(loaded)) == loaded
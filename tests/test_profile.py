@@ -0,0 +1,27 @@
+import pytest
+
+from tfmod import profile
+from tfmod.profile import profiled
+
+
+@pytest.mark.parametrize(
+    "mode,suffix,summary",
+    [
+        ("cpu", ".pstats", "CPU profile saved to"),
+        ("memory", ".tracemalloc", "Memory snapshot saved to"),
+    ],
+)
+def test_profiled(tmp_path, monkeypatch, capsys, mode, suffix, summary) -> None:
+    monkeypatch.setattr(profile, "PROFILE_DIR", tmp_path / "profiles")
+    monkeypatch.setenv("TFMOD_PROFILE", mode)
+    monkeypatch.setenv("TFMOD_PROFILE_TOP", "5")
+
+    with profiled():
+        sorted(str(i) for i in range(1000))
+
+    saved = list((tmp_path / "profiles").iterdir())
+    assert len(saved) == 1
+    assert saved[0].suffix == suffix
+
+    err = capsys.readouterr().err
+    assert f"{summary} {saved[0]}" in err
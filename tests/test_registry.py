@@ -0,0 +1,124 @@
+from typing import cast, Dict, List, Set
+
+import pytest
+import requests
+from tf_registry import RegistryError
+
+from tfmod.error import RegistryWaitTimeoutError
+from tfmod.registry import ModuleAddress, Registry, RegistryIndex, wait_for_versions
+from tfmod.spec import Spec
+from tfmod.status import _row
+
+
+class FakeRegistry(Registry):
+    def __init__(self, latest: Dict[ModuleAddress, str]) -> None:
+        self.latest = latest
+        self.requests: List[str] = list()
+
+    def versions(self, module: ModuleAddress) -> Set[str]:
+        self.requests.append(str(module))
+        if module not in self.latest:
+            raise RegistryError(404, ["Not Found"])
+        return {self.latest[module]}
+
+    def namespace(self, namespace: str) -> Dict[ModuleAddress, str]:
+        self.requests.append(namespace)
+        return {
+            address: version
+            for address, version in self.latest.items()
+            if address.namespace == namespace
+        }
+
+
+def test_wait_batches_namespaces() -> None:
+    a = ModuleAddress("jfhbrook", "a", "shell")
+    b = ModuleAddress("jfhbrook", "b", "shell")
+    c = ModuleAddress("other", "c", "aws")
+
+    registry = FakeRegistry({a: "1.0.0", b: "2.0.0", c: "3.0.0"})
+
+    wait_for_versions({a: "1.0.0", b: "2.0.0", c: "3.0.0"}, 1.0, registry)
+
+    assert sorted(registry.requests) == ["jfhbrook", "other/c/aws"]
+
+
+def test_wait_times_out() -> None:
+    a = ModuleAddress("jfhbrook", "a", "shell")
+
+    registry = FakeRegistry(dict())
+
+    with pytest.raises(RegistryWaitTimeoutError):
+        wait_for_versions({a: "1.0.0"}, 0.0, registry)
+
+
+def test_index_caches_namespaces(tmp_path) -> None:
+    a = ModuleAddress("jfhbrook", "a", "shell")
+    b = ModuleAddress("jfhbrook", "b", "shell")
+
+    registry = FakeRegistry({a: "1.0.0"})
+    index = RegistryIndex(registry, path=tmp_path)
+
+    assert index.latest_version(a) == "1.0.0"
+    assert index.is_unpublished(b)
+    assert registry.requests == ["jfhbrook"]
+
+    # A fresh index should read the listing from disk
+    index = RegistryIndex(registry, path=tmp_path)
+
+    assert index.cached("jfhbrook") == {a: "1.0.0"}
+    assert registry.requests == ["jfhbrook"]
+
+
+class BrokenRegistry(FakeRegistry):
+    def namespace(self, namespace: str) -> Dict[ModuleAddress, str]:
+        if namespace == "broken":
+            self.requests.append(namespace)
+            raise RegistryError(503, ["Service Unavailable"])
+        return super().namespace(namespace)
+
+
+def spec(namespace: str, name: str, version: str) -> Spec:
+    return Spec(
+        name=name,
+        namespace=namespace,
+        provider="shell",
+        version=version,
+        description=None,
+        private=False,
+        scripts=dict(),
+    )
+
+
+def test_status_rows(tmp_path) -> None:
+    registry = BrokenRegistry(
+        {
+            ModuleAddress("jfhbrook", "a", "shell"): "1.0.0",
+            ModuleAddress("jfhbrook", "b", "shell"): "1.0.0",
+        }
+    )
+    index = RegistryIndex(registry, path=tmp_path)
+
+    def registry_column(s: Spec) -> str:
+        return _row(index, tmp_path, s)[2]
+
+    assert registry_column(spec("jfhbrook", "a", "0.9.0")) == "1.0.0 (behind)"
+    assert registry_column(spec("jfhbrook", "b", "1.1.0")) == "1.0.0 (unpublished)"
+    assert registry_column(spec("jfhbrook", "c", "1.0.0")) == "unpublished"
+    assert registry_column(spec("broken", "d", "1.0.0")).startswith("error: ")
+    assert registry_column(spec("broken", "e", "1.0.0")).startswith("error: ")
+
+    # The failure is remembered, rather than fetched again for every row
+    assert registry.requests == ["jfhbrook", "broken"]
+
+
+class DownSession:
+    def get(self, url: str, **kwargs) -> requests.Response:
+        raise requests.ConnectionError("Connection refused")
+
+
+def test_network_errors_are_registry_errors() -> None:
+    registry = Registry()
+    registry.session = cast(requests.Session, DownSession())
+
+    with pytest.raises(RegistryError, match="Connection refused"):
+        registry.namespace("jfhbrook")
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from tfmod.client import EX_TEMPFAIL
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    env = dict(os.environ, TFMOD_SOCKET=str(tmp_path / "tfmod.sock"))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "tfmod", "serve"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    deadline = time.monotonic() + 30
+    while not (tmp_path / "tfmod.sock").exists():
+        assert proc.poll() is None, "tfmod serve exited early"
+        assert time.monotonic() < deadline, "tfmod serve never started listening"
+        time.sleep(0.05)
+
+    yield env
+
+    proc.terminate()
+    proc.wait()
+
+
+def client(env, *argv: str, cwd=None) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "tfmod.client", *argv],
+        env=env,
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_daemon_runs_commands(daemon) -> None:
+    proc = client(daemon, "version")
+
+    assert proc.returncode == 0
+    assert proc.stdout.startswith("TfMod v")
+
+    # Each request gets a fresh set of flags, and its own exit status
+    proc = client(daemon, "bogus")
+
+    assert proc.returncode == 2
+    assert 'no command named "bogus"' in proc.stdout
+
+
+def test_client_without_daemon(tmp_path) -> None:
+    env = dict(os.environ, TFMOD_SOCKET=str(tmp_path / "tfmod.sock"))
+
+    assert client(env, "version").returncode == EX_TEMPFAIL
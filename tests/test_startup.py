@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+from typing import Dict
+
+# Modules which should only be imported by the commands that use them
+HEAVY_MODULES = [
+    "github",
+    "hcl2",
+    "lark",
+    "yaml",
+    "giturlparse",
+    "tf_registry",
+    "requests",
+    "tfmod.terraform",
+    "tfmod.plan",
+    "tfmod.gh",
+    "tfmod.snapshot",
+    "tfmod.journal",
+    "tfmod.tfvars",
+    "tfmod.hcl",
+    "tfmod.profile",
+    "importlib.metadata",
+]
+
+# Cumulative import time budget for the command line interface, in
+# microseconds. Loading everything eagerly took around 600ms.
+IMPORT_BUDGET = 80_000
+
+SCRIPT = f"""
+import sys
+import tfmod.command
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+
+
+def import_tfmod() -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ),
+    )
+
+
+def import_times(stderr: str) -> Dict[str, int]:
+    """
+    Cumulative import times for the top-level imports, which are the ones the
+    script made rather than their dependencies.
+    """
+    times: Dict[str, int] = dict()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.startswith("  "):
+            continue
+        try:
+            times[name.strip()] = int(cumulative)
+        except ValueError:
+            # The header line
+            continue
+    return times
+
+
+def test_startup_skips_heavy_modules() -> None:
+    proc = import_tfmod()
+
+    assert proc.stdout.strip() == ""
+
+
+def test_startup_import_budget() -> None:
+    proc = import_tfmod()
+    times = import_times(proc.stderr)
+
+    # Only TfMod's own imports count - site and .pth files are imported
+    # before it, and vary from one environment to the next
+    total = sum(time for name, time in times.items() if name.startswith("tfmod"))
+    assert 0 < total < IMPORT_BUDGET
+
+
+def test_version_without_binaries() -> None:
+    # Neither terraform, git nor gh are needed to show the version
+    proc = subprocess.run(
+        [sys.executable, "-c", "from tfmod.command import main; main()", "version"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, PATH=""),
+    )
+
+    assert proc.stdout.startswith("TfMod v")
@@ -0,0 +1,125 @@
+import random
+from typing import Any
+
+import hcl2
+import pytest
+
+from tfmod.error import TfvarsSyntaxError
+from tfmod.tfvars import encode_tfvars, loads, Parser
+
+# Characters which python-hcl2 and the parser read the same way. python-hcl2
+# doesn't unescape strings, so escapes are tested separately.
+ALPHABET = "abcXYZ019 _-.:/{}[]=,#é✓"
+NAMES = ["name", "namespace", "provider", "version", "scripts", "a_b", "c-d"]
+
+
+def random_value(rng: random.Random, depth: int = 0) -> Any:
+    kind = rng.choice(
+        ["string", "string", "int", "float", "bool", "null"]
+        + (["list", "object"] if depth < 3 else [])
+    )
+    if kind == "string":
+        return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 12)))
+    if kind == "int":
+        return rng.randint(0, 10000)
+    if kind == "float":
+        return rng.randint(0, 10000) / 100 + 0.5
+    if kind == "bool":
+        return rng.choice([True, False])
+    if kind == "null":
+        return None
+    if kind == "list":
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return {
+        rng.choice(NAMES): random_value(rng, depth + 1)
+        for _ in range(rng.randint(0, 4))
+    }
+
+
+def render(rng: random.Random, value: Any, indent: str = "") -> str:
+    """
+    Render a value, with randomized whitespace, separators and comments.
+    """
+    space = rng.choice(["", " ", "  "])
+
+    if isinstance(value, dict):
+        if not value:
+            return "{" + space + "}"
+        inner = indent + "  "
+        items = []
+        for key, item in value.items():
+            quoted = rng.choice([key, f'"{key}"'])
+            sep = rng.choice(["=", "=", ":"])
+            comment = rng.choice(["", "", " # note", " // note", " /* note */"])
+            items.append(
+                f"{inner}{quoted} {sep} {render(rng, item, inner)}"
+                + rng.choice(["", ","])
+                + comment
+            )
+        return "{\n" + "\n".join(items) + f"\n{indent}}}"
+    if isinstance(value, list):
+        items = [render(rng, item, indent) for item in value]
+        if not items or rng.random() < 0.5:
+            trailing = rng.choice(["", ","]) if items else ""
+            return "[" + f",{space}".join(items) + trailing + "]"
+        inner = indent + "  "
+        return "[\n" + "".join(f"{inner}{item},\n" for item in items) + f"{indent}]"
+    if isinstance(value, str):
+        return f'"{value}"'
+    return encode_tfvars(dict(v=value))[len("v = ") : -1]
+
+
+def test_matches_hcl2() -> None:
+    rng = random.Random(0)
+    separators = ["\n", "\n\n", "\n# comment\n"]
+
+    for _ in range(500):
+        document = {
+            f"{rng.choice(NAMES)}{i}": random_value(rng)
+            for i in range(rng.randint(1, 4))
+        }
+        text = "".join(
+            f"{name} = {render(rng, value)}{rng.choice(separators)}"
+            for name, value in document.items()
+        )
+
+        assert Parser(text).parse() == hcl2.loads(text) == document, text
+
+
+def test_encode_tfvars() -> None:
+    assert encode_tfvars(dict(empty=dict(), list=[1, 2.5, None, True])) == (
+        "empty = {}\nlist  = [1, 2.5, null, true]\n"
+    )
+    assert encode_tfvars(dict(s="100%{ x }\n\t\\")) == 's = "100%%{ x }\\n\\t\\\\"\n'
+
+
+def test_unescapes_strings() -> None:
+    text = encode_tfvars(dict(s='"hi"\n\t\\ ${x} %{y} é\x00'))
+
+    assert Parser(text).parse() == dict(s='"hi"\n\t\\ ${x} %{y} é\x00')
+
+
+def test_error_position() -> None:
+    with pytest.raises(TfvarsSyntaxError) as exc:
+        Parser('module = {\n  name = "x"\n  version = 1.0.0\n}\n').parse()
+
+    assert str(exc.value) == "<tfvars>:3:16: Expected a newline, found '.'"
+
+    with pytest.raises(TfvarsSyntaxError) as exc:
+        loads('module = {\n  name = "x\n}\n')
+
+    assert str(exc.value).startswith("<tfvars>:2:10: Unterminated string")
+
+
+def test_falls_back_to_hcl2() -> None:
+    assert loads('a = "${var.x}"\nb = -1\n') == dict(a="${var.x}", b="${-1}")
+
+
+def test_fallback_unescapes_strings() -> None:
+    value = '"hi"\n\t\\ ${x} %{y} é'
+    document = dict(module={'k"ey': dict(s=value, l=[value])})
+    escaped = encode_tfvars(document)
+
+    # The template forces the fallback to python-hcl2
+    assert loads(escaped) == document
+    assert loads(escaped + 'other = "${var.x}"\n') == dict(document, other="${var.x}")
@@ -0,0 +1,49 @@
+import sys
+
+import pytest
+import requests
+
+from tfmod import gh
+from tfmod.error import StepTimeoutError
+from tfmod.process import run_out
+from tfmod.timeout import deadline, remaining
+
+
+def test_nested_deadlines_never_extend() -> None:
+    with deadline("outer", 1.0, "-timeout"):
+        with deadline("inner", 60.0, "-action-timeout"):
+            left = remaining()
+            assert left is not None and left <= 1.0
+
+
+def test_subprocess_timeout_names_step() -> None:
+    with pytest.raises(StepTimeoutError) as exc:
+        with deadline("git push origin main", 0.1, "-action-timeout"):
+            run_out([sys.executable, "-c", "import time; time.sleep(5)"])
+
+    assert "Timed out during git push origin main" in str(exc.value)
+    assert "-action-timeout" in str(exc.value)
+
+
+def test_github_requests_use_deadline(monkeypatch) -> None:
+    clients = list()
+
+    class Github:
+        def __init__(self, **kwargs) -> None:
+            clients.append(kwargs)
+
+    monkeypatch.setattr(gh, "github", type("github", (), dict(Github=Github)))
+    monkeypatch.setattr(gh, "gh_auth_token", lambda host, user: "token")
+
+    with gh.gh_client("refresh"):
+        pass
+    assert clients[-1] == dict(auth="token")
+
+    with pytest.raises(StepTimeoutError) as exc:
+        with deadline("refresh of repository", 10.0, "-refresh-timeout"):
+            with gh.gh_client("GitHub repository refresh"):
+                raise requests.ReadTimeout()
+
+    assert 0 < clients[-1]["timeout"] <= 10.0
+    assert clients[-1]["retry"] is None
+    assert "Timed out during refresh of repository" in str(exc.value)
@@ -0,0 +1,37 @@
+import json
+
+import tfmod.trace
+from tfmod.trace import configure_tracer, span, Tracer
+
+
+def test_spans_nest_and_export(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "trace.json"
+    tracer = Tracer(str(path))
+    monkeypatch.setattr(tfmod.trace, "tracer", tracer)
+
+    with span("outer", "test") as outer:
+        with span("inner", "test", what="thing") as inner:
+            pass
+
+    assert outer and inner
+    assert inner.parent is outer
+
+    tracer.write()
+
+    with open(path) as f:
+        events = {event["name"]: event for event in json.load(f)["traceEvents"]}
+
+    assert events["inner"]["args"] == dict(what="thing", id=inner.id, parent=outer.id)
+    assert events["outer"]["ph"] == "X"
+    assert events["outer"]["ts"] <= events["inner"]["ts"]
+    assert events["outer"]["dur"] >= events["inner"]["dur"]
+
+
+def test_configure_tracer_resets(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(tfmod.trace, "tracer", tfmod.trace.tracer)
+
+    configure_tracer(dict(TFMOD_TRACE=str(tmp_path / "trace.json")))
+    assert tfmod.trace.tracer.path == str(tmp_path / "trace.json")
+
+    configure_tracer(dict())
+    assert tfmod.trace.tracer.path is None
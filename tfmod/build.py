@@ -0,0 +1,317 @@
+import contextlib
+from dataclasses import asdict
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+import re
+import sys
+from typing import Any, Dict, List, Mapping, Optional, Self
+
+import flag
+
+from tfmod.constants import PACKAGE_DIR
+from tfmod.error import Error
+from tfmod.io import logger
+from tfmod.lazy import LazyModule
+
+hcl: Any = LazyModule("hcl2")
+
+"""
+Build bin/tfmod from the shell snippets and templates under tfmod/, and
+modules/variables.json from the bundled Terraform modules.
+
+The templates use the same syntax as Terraform's templatefile - ${NAME} is
+replaced with a variable, and $${ is an escaped ${. Rendered snippets and
+help text are cached by the hash of their sources, and the entrypoint is only
+written when its contents change.
+
+The variables manifest lists each bundled module's variables, so that TfMod
+doesn't need to parse HCL to prompt for them.
+"""
+
+ENTRYPOINT_TEMPLATE = "tfmod/entrypoint.sh.tftpl"
+PARSE_ARGS_TEMPLATE = "tfmod/command/parse-args.sh.tftpl"
+
+SNIPPETS = {
+    "prelude": "tfmod/prelude.sh",
+    "logging": "tfmod/io/logging.sh",
+    "prompt": "tfmod/io/prompt.sh",
+    "update": "tfmod/command/update.sh",
+    "unwise": "tfmod/command/unwise.sh",
+    "main": "tfmod/command/main.sh",
+}
+
+# Help text is generated from the commands defined in these sources
+COMMAND_SOURCES = ["tfmod/command/__init__.py", "tfmod/command/base.py"]
+
+# Variables are parsed for the manifest by this module
+VARIABLES_SOURCE = "tfmod/terraform/variables.py"
+
+MODULES = "modules"
+VARIABLES_JSON = "modules/variables.json"
+
+SHEBANG = "#!/usr/bin/env bash"
+
+TEMPLATE_RE = re.compile(r"\$\$\{|\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+VERSION_RE = re.compile(r'^version = "([^"]+)"$', re.MULTILINE)
+
+
+def sha256(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def render_template(template: str, vars: Mapping[str, str]) -> str:
+    """
+    Render a template, in the style of Terraform's templatefile.
+    """
+
+    def replace(match: re.Match[str]) -> str:
+        if match.group(1) is None:
+            return "${"
+        name = match.group(1)
+        if name not in vars:
+            raise Error(f"Template variable {name} is not defined")
+        return vars[name]
+
+    return TEMPLATE_RE.sub(replace, template)
+
+
+def render_snippet(path: str, source: str) -> str:
+    """
+    Include a shell script in the entrypoint, with a banner and without its
+    shebang.
+    """
+    return f"\n#\n# include: {path}\n#\n\n" + source.replace(SHEBANG, "")
+
+
+def single_quote(text: str) -> str:
+    return text.replace("'", "'\\''")
+
+
+def command_help() -> Dict[str, str]:
+    """
+    Get the help text for every command, as printed by "tfmod -h COMMAND".
+    The main help text is under the empty string.
+    """
+    from tfmod.command import main
+    from tfmod.command.base import COMMANDS, reset_flags
+
+    argv = sys.argv
+    help: Dict[str, str] = dict()
+
+    try:
+        for command in [""] + list(COMMANDS):
+            sys.argv = ["tfmod", "-h"] + ([command] if command else [])
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                reset_flags()
+                try:
+                    main()
+                except SystemExit:
+                    pass
+            help[command] = out.getvalue().rstrip("\n")
+    finally:
+        sys.argv = argv
+        reset_flags()
+
+    return help
+
+
+def module_sources(root: Path) -> List[str]:
+    """
+    The variables.tf file of every bundled module.
+    """
+    return sorted(
+        path.relative_to(root).as_posix()
+        for path in (root / MODULES).glob("*/variables.tf")
+    )
+
+
+def module_variables(source: str) -> Dict[str, Any]:
+    """
+    Parse a variables.tf file into the manifest's format.
+    """
+    from tfmod.terraform.variables import parse_variables
+
+    return {
+        name: asdict(variable)
+        for name, variable in parse_variables(hcl.loads(source)).items()
+    }
+
+
+def help_cases(help: Mapping[str, str]) -> str:
+    return "\n".join(
+        f"    {command})\n      echo '{single_quote(text)}'\n    ;;"
+        for command, text in help.items()
+        if command
+    )
+
+
+class BuildCache:
+    """
+    Rendered snippets and help text, keyed by the hash of their sources.
+    """
+
+    def __init__(self: Self, path: Path) -> None:
+        self.path = path
+        self.data: Dict[str, Any] = dict(snippets=dict(), help=dict(), variables=dict())
+        self.used: Dict[str, Dict[str, Any]] = dict(
+            snippets=dict(), help=dict(), variables=dict()
+        )
+
+        try:
+            with open(path, "r") as f:
+                self.data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as exc:
+            logger.debug(f"No usable build cache at {path}: {exc}")
+
+    def get(self: Self, kind: str, key: str) -> Optional[Any]:
+        value = self.data.get(kind, dict()).get(key, None)
+        if value is not None:
+            self.used[kind][key] = value
+        return value
+
+    def set(self: Self, kind: str, key: str, value: Any) -> None:
+        self.used[kind][key] = value
+
+    @property
+    def inputs(self: Self) -> Optional[str]:
+        return self.data.get("inputs", None)
+
+    @property
+    def output(self: Self) -> Optional[str]:
+        return self.data.get("output", None)
+
+    def write(self: Self, inputs: str, output: str) -> None:
+        """
+        Write the entries used by this build, dropping the rest.
+        """
+        os.makedirs(self.path.parent, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(dict(inputs=inputs, output=output, **self.used), f)
+
+
+def _read(root: Path, path: str) -> str:
+    with open(root / path, "r") as f:
+        return f.read()
+
+
+def _read_optional(path: Path) -> Optional[str]:
+    return path.read_text() if path.exists() else None
+
+
+def _write(path: Path, contents: str, mode: int = 0o644) -> None:
+    os.makedirs(path.parent, exist_ok=True)
+    with open(path, "w") as f:
+        f.write(contents)
+    os.chmod(path, mode)
+    logger.ok(f"Wrote {path}")
+
+
+def build(
+    root: Path = PACKAGE_DIR,
+    output: Optional[Path] = None,
+    cache_path: Optional[Path] = None,
+    force: bool = False,
+    variables_output: Optional[Path] = None,
+) -> bool:
+    """
+    Build the entrypoint and the variables manifest. Returns whether or not
+    either was written.
+    """
+    output = output or root / "bin" / "tfmod"
+    variables_output = variables_output or root / VARIABLES_JSON
+    cache = BuildCache(cache_path or root / ".build" / "cache.json")
+
+    modules = module_sources(root)
+    sources = {
+        path: _read(root, path)
+        for path in [ENTRYPOINT_TEMPLATE, PARSE_ARGS_TEMPLATE, "pyproject.toml"]
+        + list(SNIPPETS.values())
+        + COMMAND_SOURCES
+        + [VARIABLES_SOURCE]
+        + modules
+    }
+    inputs = sha256(
+        "".join(f"{path}\0{sha256(source)}\0" for path, source in sources.items())
+    )
+
+    current = _read_optional(output)
+    current_variables = _read_optional(variables_output)
+
+    if not force and inputs == cache.inputs:
+        if current is not None and current_variables is not None:
+            if sha256(current + current_variables) == cache.output:
+                logger.info(f"{output} and {variables_output} are up to date")
+                return False
+
+    manifest: Dict[str, Any] = dict()
+    for path in modules:
+        key = sha256(sources[path])
+        cache_key = sha256(f"{sources[VARIABLES_SOURCE]}\0{sources[path]}")
+        variables = cache.get("variables", cache_key)
+        if variables is None:
+            variables = module_variables(sources[path])
+            cache.set("variables", cache_key, variables)
+        manifest[Path(path).parent.name] = dict(sha256=key, variables=variables)
+
+    rendered_variables = json.dumps(manifest, indent=2) + "\n"
+
+    vars: Dict[str, str] = dict()
+    for name, path in SNIPPETS.items():
+        key = sha256(f"{path}\0{sources[path]}")
+        snippet = cache.get("snippets", key)
+        if snippet is None:
+            snippet = render_snippet(path, sources[path])
+            cache.set("snippets", key, snippet)
+        vars[name.upper()] = snippet
+
+    key = sha256("".join(sources[path] for path in COMMAND_SOURCES))
+    help = cache.get("help", key)
+    if help is None:
+        logger.info("Rendering command help...")
+        help = command_help()
+        cache.set("help", key, help)
+
+    version = VERSION_RE.search(sources["pyproject.toml"])
+    if not version:
+        raise Error("Could not find the version in pyproject.toml")
+
+    vars["PARSE_ARGS"] = render_template(
+        sources[PARSE_ARGS_TEMPLATE],
+        dict(
+            TFMOD_VERSION=version.group(1),
+            HELP_CASES=help_cases(help),
+            HELP_MAIN=single_quote(help[""]),
+        ),
+    )
+
+    rendered = render_template(sources[ENTRYPOINT_TEMPLATE], vars)
+    written = False
+
+    for path, contents, existing, mode in [
+        (output, rendered, current, 0o755),
+        (variables_output, rendered_variables, current_variables, 0o644),
+    ]:
+        if contents != existing:
+            _write(path, contents, mode)
+            written = True
+        else:
+            logger.info(f"{path} is up to date")
+
+    cache.write(inputs, sha256(rendered + rendered_variables))
+    return written
+
+
+def main(argv: List[str] = sys.argv[1:]) -> None:
+    flags = flag.FlagSet("tfmod.build", flag.ErrorHandling.EXIT)
+    force = flags.bool_("force", False, "Rebuild, even if nothing has changed")
+    flags.parse(argv)
+
+    build(force=force.deref())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+from types import FrameType
+from typing import Any, Dict, List, Mapping, Optional
+
+from tfmod.constants import STATE_DIR
+
+"""
+A thin client for "tfmod serve". It forwards its arguments, working directory,
+environment and standard streams to the daemon, and exits with the command's
+exit status.
+
+This module is imported on every run of bin/tfmod while the daemon is up, so
+it only uses the standard library and TfMod's constants.
+"""
+
+# sysexits.h's EX_TEMPFAIL. The command didn't run, and may be run in-process
+# instead.
+EX_TEMPFAIL = 75
+
+# Signals which are relayed to the command
+RELAYED_SIGNALS = [signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT]
+
+# The request header - the length of the request which follows
+HEADER = struct.Struct("!Q")
+
+
+def socket_path(env: Mapping[str, str] = os.environ) -> str:
+    """
+    Where the daemon listens. May be overridden with TFMOD_SOCKET.
+    """
+    return env.get("TFMOD_SOCKET", str(STATE_DIR / "tfmod.sock"))
+
+
+def encode_request(argv: List[str], cwd: str, env: Mapping[str, str]) -> bytes:
+    return json.dumps(dict(argv=argv, cwd=cwd, env=dict(env))).encode("utf-8")
+
+
+def decode_message(line: bytes) -> Dict[str, Any]:
+    return json.loads(line.decode("utf-8"))
+
+
+def request(sock: socket.socket, argv: List[str]) -> int:
+    """
+    Run a command on the daemon, returning its exit status.
+    """
+    payload = encode_request(argv, os.getcwd(), os.environ)
+    pid: Optional[int] = None
+
+    def relay(signum: int, _frame: Optional[FrameType]) -> None:
+        if pid is not None:
+            os.kill(pid, signum)
+
+    try:
+        socket.send_fds(sock, [HEADER.pack(len(payload))], [0, 1, 2])
+        sock.sendall(payload)
+    except OSError:
+        return EX_TEMPFAIL
+
+    for signum in RELAYED_SIGNALS:
+        signal.signal(signum, relay)
+
+    with sock.makefile("rb") as responses:
+        for line in responses:
+            message = decode_message(line)
+            if "pid" in message:
+                pid = message["pid"]
+            elif "exit" in message:
+                return message["exit"]
+
+    # The daemon hung up without an exit status
+    return 1
+
+
+def main(argv: List[str] = sys.argv[1:]) -> int:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        sock.connect(socket_path())
+    except OSError:
+        return EX_TEMPFAIL
+
+    with sock:
+        return request(sock, argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,64 @@
 import os
 import os.path
-from typing import Optional
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
 
 import flag
 
-from tfmod.command.base import cli, command, CommandArgs, exit, Flag, run
-from tfmod.constants import TFMOD_VERSION
+from tfmod.command.base import (
+    cli,
+    command,
+    CommandArgs,
+    duration,
+    error,
+    exit,
+    Flag,
+    optional_duration,
+    run,
+)
+from tfmod.constants import tfmod_version
 from tfmod.error import Error
-from tfmod.gh import get_gh_user, GhHosts, load_gh_hosts_optional
 from tfmod.io import logger
-from tfmod.publish import publish as _publish
-from tfmod.terraform import Terraform
+
+if TYPE_CHECKING:
+    from tfmod.plan import Timeouts
+
+# Default timeout for publish -wait, in seconds
+WAIT_TIMEOUT = 600.0
+
+# Default number of modules publish-all works on at once
+PUBLISH_JOBS = 4
+
+# Default number of modules init -from writes at once
+INIT_JOBS = 8
+
+TIMEOUT_FLAGS = dict(
+    timeout=Flag(
+        duration,
+        "timeout",
+        0.0,
+        "Give up if the whole command takes longer than this (ie. -timeout=10m)",
+    ),
+    action_timeout=Flag(
+        duration,
+        "action-timeout",
+        0.0,
+        "Give up if any one action takes longer than this (ie. -action-timeout=2m)",
+    ),
+    refresh_timeout=Flag(
+        duration,
+        "refresh-timeout",
+        0.0,
+        "Give up if refreshing any one resource takes longer than this "
+        "(ie. -refresh-timeout=1m)",
+    ),
+)
+
+
+def timeouts(args: CommandArgs) -> "Timeouts":
+    from tfmod.plan import Timeouts
+
+    return Timeouts(action=args["action_timeout"], refresh=args["refresh_timeout"])
 
 
 def check_for_updates() -> None:
@@ -25,7 +73,7 @@ def version() -> None:
     Show the current TfMod version and check for updates
     """
 
-    print(f"TfMod v{TFMOD_VERSION}")
+    print(f"TfMod v{tfmod_version()}")
     check_for_updates()
 
 
@@ -37,34 +85,54 @@ def version_cmd(_args: CommandArgs) -> None:
     version()
 
 
-@command()
-def init(_args: CommandArgs) -> None:
+@command(
+    flags=dict(
+        manifest=Flag(
+            flag.string,
+            "from",
+            "",
+            "Initialize the modules listed in a JSON or CSV manifest, "
+            "without prompting",
+        ),
+        jobs=Flag(
+            flag.int_,
+            "jobs",
+            INIT_JOBS,
+            "The number of modules to initialize at once, with -from",
+        ),
+    )
+)
+def init(args: CommandArgs) -> None:
     """
     Initialize a new project
     """
 
-    hosts: Optional[GhHosts] = load_gh_hosts_optional()
+    if args["jobs"] < 1:
+        error("-jobs must be at least 1")
+
+    from tfmod.gh import get_gh_user, load_gh_hosts_optional
+
+    hosts = load_gh_hosts_optional()
     default_namespace: Optional[str] = None
 
-    gh_user: Optional[str] = get_gh_user(hosts)
+    gh_user = get_gh_user(hosts)
 
     if gh_user:
         logger.info(f"Using gh user {gh_user} as the default namespace")
         default_namespace = gh_user
 
-    cmd = (
-        Terraform("init")
-        .isolated_state()
-        .spec()
-        .prompt_var("namespace", default=default_namespace)
-        .prompt_var("name", default=os.path.basename(os.getcwd()))
-        .prompt_var("provider_")
-        .prompt_var("version_")
-        .prompt_var("description")
-        .auto_approve()
-    )
+    if args["manifest"]:
+        from tfmod.init import init_all
 
-    cmd.run()
+        init_all(
+            Path(args["manifest"]),
+            jobs=args["jobs"],
+            default_namespace=default_namespace,
+        )
+    else:
+        from tfmod.init import init as init_module
+
+        init_module(default_namespace=default_namespace)
 
 
 @command(
@@ -75,6 +143,40 @@ def init(_args: CommandArgs) -> None:
         auto_approve=Flag(
             flag.bool_, "auto-approve", False, "Automatically approve the publish plan"
         ),
+        wait=Flag(
+            optional_duration(WAIT_TIMEOUT),
+            "wait",
+            0.0,
+            "Wait for the Terraform Registry to list the new version "
+            "(optionally with a timeout, ie. -wait=5m)",
+        ),
+        out=Flag(
+            flag.string,
+            "out",
+            "",
+            'Save the plan to a file, to run later with "tfmod apply"',
+        ),
+        refresh=Flag(
+            flag.bool_,
+            "refresh",
+            True,
+            "Refresh resources. With -refresh=false, resources in the state "
+            "snapshot are used as-is",
+        ),
+        refresh_ttl=Flag(
+            duration,
+            "refresh-ttl",
+            0.0,
+            "Use resources from the state snapshot if refreshed within this "
+            "long (ie. -refresh-ttl=5m)",
+        ),
+        resume=Flag(
+            flag.bool_,
+            "resume",
+            False,
+            "Resume an interrupted publish, skipping actions which completed",
+        ),
+        **TIMEOUT_FLAGS,
     )
 )
 def publish(args: CommandArgs) -> None:
@@ -82,7 +184,136 @@ def publish(args: CommandArgs) -> None:
     Publish the current
     """
 
-    _publish(args)
+    # Commands import their implementations as they run, so that simple
+    # commands don't pay for the dependencies of complex ones
+    from tfmod.publish import publish as _publish
+    from tfmod.timeout import deadline
+
+    with deadline("publish", args["timeout"], "-timeout"):
+        _publish(args)
+
+
+@command(
+    name="publish-all",
+    flags=dict(
+        force=Flag(
+            flag.bool_, "force", False, "Force TfMod to publish, even when dangerous"
+        ),
+        auto_approve=Flag(
+            flag.bool_, "auto-approve", False, "Automatically approve the publish plan"
+        ),
+        wait=Flag(
+            optional_duration(WAIT_TIMEOUT),
+            "wait",
+            0.0,
+            "Wait for the Terraform Registry to list the new versions "
+            "(optionally with a timeout, ie. -wait=5m)",
+        ),
+        jobs=Flag(
+            flag.int_,
+            "jobs",
+            PUBLISH_JOBS,
+            "The number of modules to plan and apply at once",
+        ),
+        refresh=Flag(
+            flag.bool_,
+            "refresh",
+            True,
+            "Refresh resources. With -refresh=false, resources in the state "
+            "snapshot are used as-is",
+        ),
+        refresh_ttl=Flag(
+            duration,
+            "refresh-ttl",
+            0.0,
+            "Use resources from the state snapshot if refreshed within this "
+            "long (ie. -refresh-ttl=5m)",
+        ),
+        **TIMEOUT_FLAGS,
+    ),
+)
+def publish_all(args: CommandArgs) -> None:
+    """
+    Publish every module in the given directories or globs
+    """
+
+    if not flag.args:
+        error("At least one directory or glob is required")
+    if args["jobs"] < 1:
+        error("-jobs must be at least 1")
+
+    from tfmod.publish.batch import publish_all as _publish_all
+    from tfmod.snapshot import Refresh
+    from tfmod.timeout import deadline
+
+    with deadline("publish-all", args["timeout"], "-timeout"):
+        _publish_all(
+            flag.args,
+            jobs=args["jobs"],
+            force=args["force"],
+            auto_approve=args["auto_approve"],
+            wait=args["wait"],
+            refresh=Refresh(enabled=args["refresh"], ttl=args["refresh_ttl"]),
+            timeouts=timeouts(args),
+        )
+
+
+@command(
+    flags=dict(
+        wait=Flag(
+            optional_duration(WAIT_TIMEOUT),
+            "wait",
+            0.0,
+            "Wait for the Terraform Registry to list the new version "
+            "(optionally with a timeout, ie. -wait=5m)",
+        ),
+        **TIMEOUT_FLAGS,
+    )
+)
+def apply(args: CommandArgs) -> None:
+    """
+    Apply a plan saved with "tfmod publish -out"
+    """
+
+    if not flag.args:
+        error("A saved plan file is required")
+
+    from tfmod.publish import apply_saved
+    from tfmod.timeout import deadline
+
+    with deadline("apply", args["timeout"], "-timeout"):
+        apply_saved(flag.args[0], wait=args["wait"], timeouts=timeouts(args))
+
+
+@command(
+    flags=dict(
+        refresh=Flag(
+            flag.bool_,
+            "refresh",
+            False,
+            "Fetch namespace listings from the registry, even when cached",
+        ),
+    )
+)
+def status(args: CommandArgs) -> None:
+    """
+    Show local and published versions for modules
+    """
+
+    from tfmod.status import status as _status
+
+    _status(flag.args or [os.getcwd()], refresh=args["refresh"])
+
+
+@command()
+def serve(_args: CommandArgs) -> None:
+    """
+    Run a daemon which keeps TfMod loaded, for faster commands
+    """
+
+    from tfmod.server import serve as _serve
+
+    _serve()
 
 
 @command()
@@ -91,6 +322,8 @@ def config(_args: CommandArgs) -> None:
     Configure TfMod
     """
 
+    from tfmod.terraform import Terraform
+
     cmd = Terraform("config-command").args(flag.args)
 
     cmd.run()
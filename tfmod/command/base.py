@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 import functools
+import re
 import sys
 import textwrap
 import traceback
@@ -9,6 +10,7 @@ import flag
 
 from tfmod.error import CliError, Error, Exit, Help, TerraformError
 from tfmod.io import logger
+from tfmod.trace import span
 
 CommandArgs = Dict[str, Any]
 CommandRunner = Callable[[CommandArgs], None]
@@ -22,6 +24,86 @@ class Flag[T]:
     usage: str
 
 
+def parse_duration(value: str) -> float:
+    """
+    Parse a duration, such as "90s", "5m" or "1h30m", into seconds. Bare
+    numbers are treated as seconds.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|s|m|h)", value)
+
+    if not parts or "".join(n + u for n, u in parts) != value:
+        raise ValueError(f"invalid duration: {value}")
+
+    return sum(float(n) * units[u] for n, u in parts)
+
+
+class DurationValue(flag.Value[float]):
+    """
+    A duration flag, stored in seconds.
+    """
+
+    def set_(self, string: str) -> None:
+        self.value.set_(parse_duration(string))
+
+    def zero_str(self) -> str:
+        return "0"
+
+
+class OptionalDurationValue(DurationValue):
+    """
+    A duration flag which may also be used as a boolean. For example, -wait
+    uses a default duration, -wait=5m uses five minutes and -wait=false
+    (or leaving the flag out) disables it with a value of 0.
+    """
+
+    def __init__(self, value: float, default: float, p: flag.Pointer[float]) -> None:
+        super().__init__(value, p)
+        self.default = default
+
+    def set_(self, string: str) -> None:
+        if string in {"1", "t", "T", "TRUE", "true", "True"}:
+            self.value.set_(self.default)
+        elif string in {"0", "f", "F", "FALSE", "false", "False"}:
+            self.value.set_(0.0)
+        else:
+            super().set_(string)
+
+    @property
+    def is_bool_flag(self) -> bool:
+        return True
+
+
+def duration(name: str, value: float, usage: str) -> flag.Pointer[float]:
+    """
+    Define a duration flag, in seconds.
+    """
+    p: flag.Pointer[float] = flag.Ptr(value)
+    flag.var(DurationValue(value, p), name, usage)
+    return p
+
+
+def optional_duration(
+    default: float,
+) -> Callable[[str, float, str], flag.Pointer[float]]:
+    """
+    Define a duration flag which uses the given default when passed without a
+    value.
+    """
+
+    def define(name: str, value: float, usage: str) -> flag.Pointer[float]:
+        p: flag.Pointer[float] = flag.Ptr(value)
+        flag.var(OptionalDurationValue(value, default, p), name, usage)
+        return p
+
+    return define
+
+
 Flags = Dict[str, Flag[Any]]
 FlagVars = Dict[str, flag.Pointer[Any]]
 
@@ -66,7 +148,9 @@ class Command:
             vars = self.vars
         else:
             vars = self.load_vars()
-            flag.parse()
+            # Parse what's left after the command name, rather than starting
+            # over from sys.argv
+            flag.command_line.parse(flag.args)
 
         return {name: var.deref() for name, var in vars.items()}
 
@@ -204,6 +288,20 @@ def none_specified() -> NoReturn:
     help()
 
 
+def reset_flags() -> None:
+    """
+    Start over with a fresh set of command line flags, so that the CLI may
+    run again in the same process.
+    """
+    command_line = flag.FlagSet(flag.command_line.name, flag.ErrorHandling.EXIT)
+    command_line.usage = flag.command_line.usage
+    command_line.output = sys.stdout
+
+    flag.flag.command_line = command_line
+    flag.command_line = command_line
+    COMMAND_VARS.clear()
+
+
 Main = Callable[[], None]
 
 
@@ -216,29 +314,34 @@ def cli(fn: Main) -> Main:
 
     @functools.wraps(fn)
     def cli() -> None:
-        try:
-            fn()
-        except Help:
-            usage()
-            sys.exit(0)
-        except Exit as exc:
-            sys.exit(exc.exit_code)
-        except CliError as exc:
-            print(str(exc))
-            sys.exit(2)
-        except TerraformError:
-            # In theory, Terraform should report its own errors
-            logger.debug(traceback.format_exc())
-            sys.exit(1)
-        except Error as exc:
-            logger.debug(traceback.format_exc())
-            logger.exception(exc)
-            sys.exit(1)
-        except (KeyboardInterrupt, EOFError):
-            pass
-        except Exception:
-            logger.panic(traceback.format_exc())
-            sys.exit(1)
+        from tfmod.profile import profiled
+
+        # Profiling wraps the error handling, so that failed commands are
+        # profiled too
+        with profiled():
+            try:
+                fn()
+            except Help:
+                usage()
+                sys.exit(0)
+            except Exit as exc:
+                sys.exit(exc.exit_code)
+            except CliError as exc:
+                print(str(exc))
+                sys.exit(2)
+            except TerraformError:
+                # In theory, Terraform should report its own errors
+                logger.debug(traceback.format_exc())
+                sys.exit(1)
+            except Error as exc:
+                logger.debug(traceback.format_exc())
+                logger.exception(exc)
+                sys.exit(1)
+            except (KeyboardInterrupt, EOFError):
+                pass
+            except Exception:
+                logger.panic(traceback.format_exc())
+                sys.exit(1)
 
     return cli
 
@@ -262,7 +365,8 @@ def run() -> None:
     if command in COMMANDS:
         cmd = COMMANDS[command]
         flag.args.pop(0)
-        cmd.run(cmd.args)
+        with span(command, "command"):
+            cmd.run(cmd.args)
 
         exit()
     else:
@@ -7,4 +7,15 @@ fi
 
 # shellcheck disable=SC1090
 source ~/.local/state/tfmod/.venv/bin/activate
+
+# If "tfmod serve" is running, let it run the command. The client exits with
+# EX_TEMPFAIL (75) if it can't reach the daemon.
+if [ -S "${TFMOD_SOCKET:-${HOME}/.local/state/tfmod/tfmod.sock}" ]; then
+  STATUS=0
+  python3 -m tfmod.client "${ARGV[@]}" || STATUS="$?"
+  if [[ "${STATUS}" != 75 ]]; then
+    exit "${STATUS}"
+  fi
+fi
+
 exec python3 -m tfmod "${ARGV[@]}"
@@ -3,6 +3,15 @@
 STATE_DIR="${HOME}/.local/state"
 TFMOD_HOME="${STATE_DIR}/tfmod"
 
+# Providers are downloaded once, and shared between modules. TfMod's
+# Terraform runner uses the same cache.
+PLUGIN_CACHE_DIR="${TF_PLUGIN_CACHE_DIR:-${TFMOD_HOME}/plugin-cache}"
+
+# Fingerprints of what was installed by the last successful update
+UPDATE_DIR="${TFMOD_HOME}/.update"
+
+MODULES=(init spec)
+
 UPDATE_OK='TfMod has been successfully updated!
 
 You may now begin working with TfMod. Try running "tfmod init" to create
@@ -230,34 +239,137 @@ function clone-tfmod {
   fi
 }
 
-function update-module {
+# Fingerprints
+
+function sha256 {
+  if command -v sha256sum &> /dev/null; then
+    sha256sum "$@"
+  else
+    shasum -a 256 "$@"
+  fi
+}
+
+# Fingerprint a set of files. Files which don't exist are skipped.
+function fingerprint {
+  local file
+  for file in "$@"; do
+    if [ -f "${file}" ]; then
+      sha256 "${file}"
+    fi
+  done | sha256 | cut -d ' ' -f 1
+}
+
+function unchanged {
+  [ -f "${UPDATE_DIR}/${1}" ] && [ "$(cat "${UPDATE_DIR}/${1}")" == "${2}" ]
+}
+
+function record {
+  mkdir -p "${UPDATE_DIR}"
+  echo "${2}" > "${UPDATE_DIR}/${1}"
+}
+
+# Terraform modules
+
+function module-fingerprint {
+  local dir
+  dir="${TFMOD_HOME}/modules/${1}"
+  fingerprint "${dir}/.terraform.lock.hcl" "${dir}"/*.tf
+}
+
+function module-up-to-date {
+  [ -d "${TFMOD_HOME}/modules/${1}/.terraform" ] && unchanged "module-${1}" "$(module-fingerprint "${1}")"
+}
+
+# Initialize modules in parallel, then show their output in order
+function init-modules {
+  local logs
   local module
-  module="${1}"
-  echo -e "${COLOR_BOLD}• modules/${module}:${COLOR_RESET}"
-  
-  terraform -chdir="${TFMOD_HOME}/modules/${module}" init -upgrade | quote 'terraform init -upgrade' || fatal-update
+  local pids=()
+  local failed=''
+  local i
+
+  if [ $# -eq 0 ]; then return 0; fi
+
+  logs="$(mktemp -d)"
+
+  for module in "$@"; do
+    terraform -chdir="${TFMOD_HOME}/modules/${module}" init -upgrade -input=false > "${logs}/${module}" 2>&1 &
+    pids+=($!)
+  done
+
+  i=0
+  for module in "$@"; do
+    echo -e "${COLOR_BOLD}• modules/${module}:${COLOR_RESET}"
+    if wait "${pids[${i}]}"; then
+      quote 'terraform init -upgrade' < "${logs}/${module}"
+      record "module-${module}" "$(module-fingerprint "${module}")"
+    else
+      quote 'terraform init -upgrade' < "${logs}/${module}"
+      failed=1
+    fi
+    i=$((i + 1))
+  done
+
+  rm -rf "${logs}"
+  [ -z "${failed}" ]
 }
 
 function update-all-modules {
+  local module
+  local pending=()
+
   if [ -n "${CLONED}" ]; then
     echo -e "${COLOR_BOLD}Initializing Terraform modules...${COLOR_RESET}"
   else
     echo -e "${COLOR_BOLD}Updating Terraform modules...${COLOR_RESET}"
   fi
 
-  update-module init
-  update-module spec
+  for module in "${MODULES[@]}"; do
+    if module-up-to-date "${module}"; then
+      echo -e "${COLOR_BOLD}• modules/${module}:${COLOR_RESET} up to date"
+    else
+      pending+=("${module}")
+    fi
+  done
+
+  if [ ${#pending[@]} -eq 0 ]; then return 0; fi
+
+  mkdir -p "${PLUGIN_CACHE_DIR}"
+  export TF_PLUGIN_CACHE_DIR="${PLUGIN_CACHE_DIR}"
+
+  # Terraform doesn't lock the plugin cache, and the modules share providers.
+  # Even when the cache isn't empty, it may not have the versions the lock
+  # files ask for, so the first module always fills it on its own, and the
+  # rest link to what it downloaded.
+  init-modules "${pending[0]}" || fatal-update
+  pending=("${pending[@]:1}")
+
+  # The odd expansion keeps bash 3 from treating an empty array as unset
+  init-modules ${pending[@]+"${pending[@]}"} || fatal-update
+}
+
+# Python
+
+function python-fingerprint {
+  fingerprint "${TFMOD_HOME}/uv.lock" "${TFMOD_HOME}/pyproject.toml" "${TFMOD_HOME}/.python-version"
 }
 
 function update-python {
+  if [ -d "${TFMOD_HOME}/.venv" ] && unchanged python "$(python-fingerprint)"; then
+    echo -e "${COLOR_BOLD}Python libraries are up to date${COLOR_RESET}"
+    return 0
+  fi
+
   if [ -n "${CLONED}" ]; then
-    echo -e "${COLOR_BOLD}Installing Python libraries..."
+    echo -e "${COLOR_BOLD}Installing Python libraries...${COLOR_RESET}"
   else
-    echo -e "${COLOR_BOLD}Updating Python libraries..."
+    echo -e "${COLOR_BOLD}Updating Python libraries...${COLOR_RESET}"
   fi
 
-  (cd "${TFMOD_HOME}" && rm -rf .venv) || fatal-update
+  # uv sync updates the virtualenv in place, only touching packages which
+  # changed
   (cd "${TFMOD_HOME}" && "${UV_BIN}" sync 2>&1 | quote 'uv sync') || fatal-update
+  record python "$(python-fingerprint)"
 }
 
 function setup-bin-script {
@@ -1,39 +1,69 @@
+from functools import cache
 import os
 import os.path
 from pathlib import Path
 from shutil import which
 
-import toml
-
-from tfmod.error import Error
+from tfmod.error import BinaryNotFoundError
 
 CONFIG_DIR: Path = Path(os.path.expanduser("~/.config/tfmod"))
 PACKAGE_DIR: Path = Path(__file__).parent.parent
 MODULES_DIR: Path = PACKAGE_DIR / "modules"
+VARIABLES_JSON: Path = MODULES_DIR / "variables.json"
 
 CONFIG_TFVARS: Path = CONFIG_DIR / "tfmod.tfvars"
-MODULE_TFVARS: Path = Path(os.getcwd()) / "module.tfvars"
+MODULE_TFVARS: str = "module.tfvars"
 
-TFMOD_VERSION: str = "???"
+STATE_DIR: Path = Path(os.path.expanduser("~/.local/state/tfmod"))
 
-with open(PACKAGE_DIR / "pyproject.toml", "r") as f:
-    TFMOD_VERSION = toml.load(f)["project"]["version"]
+# Shared with "tfmod update", which downloads providers into it
+PLUGIN_CACHE_DIR: Path = STATE_DIR / "plugin-cache"
 
-STATE_DIR: Path = Path(os.path.expanduser("~/.local/state/tfmod"))
+GH_CONFIG_DIR: Path = Path(os.path.expanduser("~/.config/gh/"))
 
-_terraform_bin = which("terraform")
-_git_bin: str | None = which("git")
-_gh_bin: str | None = which("gh")
 
-if _terraform_bin is None:
-    raise Error('"terraform" could not be found.')
-if _git_bin is None:
-    raise Error('"git" could not be found.')
-if _gh_bin is None:
-    raise Error('"gh" could not be found.')
+@cache
+def tfmod_version() -> str:
+    """
+    The installed version of TfMod, as recorded in the package metadata when
+    it was built.
+    """
+    # importlib.metadata is slow to import, and only the version command
+    # needs it
+    from importlib import metadata
 
-TERRAFORM_BIN: str = _terraform_bin
-GIT_BIN: str = _git_bin
-GH_BIN: str = _gh_bin
+    try:
+        return metadata.version("tfmod")
+    except metadata.PackageNotFoundError:
+        pass
 
-GH_CONFIG_DIR: Path = Path(os.path.expanduser("~/.config/gh/"))
+    # Running from a checkout which was never installed
+    import tomllib
+
+    try:
+        with open(PACKAGE_DIR / "pyproject.toml", "rb") as f:
+            return tomllib.load(f)["project"]["version"]
+    except (FileNotFoundError, KeyError, tomllib.TOMLDecodeError):
+        return "???"
+
+
+def _require(name: str) -> str:
+    path = which(name)
+    if path is None:
+        raise BinaryNotFoundError(f'"{name}" could not be found.')
+    return path
+
+
+@cache
+def terraform_bin() -> str:
+    return _require("terraform")
+
+
+@cache
+def git_bin() -> str:
+    return _require("git")
+
+
+@cache
+def gh_bin() -> str:
+    return _require("gh")
@@ -28,6 +28,13 @@ class CliError(Error):
     pass
 
 
+class BinaryNotFoundError(Error):
+    """
+    TfMod requires a command which isn't installed, or isn't on your PATH.
+    Install it and try again - "tfmod update" installs TfMod's dependencies.
+    """
+
+
 class TerraformError(Error):
     """
     Terraform exited unsuccessfully. Ensure that the configuration is correct.
@@ -45,6 +52,13 @@ class SpecValueError(Error):
     """
 
 
+class TfvarsSyntaxError(Error):
+    """
+    TfMod could not parse a tfvars file. Fix the syntax at the given line and
+    column, and try again.
+    """
+
+
 class SpecNotFoundError(Error):
     """
     TfMod requires a module.tfvars file to continue. You can initialize a module.tfvars
@@ -52,6 +66,21 @@ class SpecNotFoundError(Error):
     """
 
 
+class InitError(Error):
+    """
+    TfMod was unable to initialize some of the modules in the manifest. The
+    output for each module is prefixed with its name - see above for details.
+    """
+
+
+class ManifestError(InitError):
+    """
+    The init manifest is invalid. A manifest is either a JSON list of objects
+    or a CSV file with a header row. Each entry needs a path, and may set the
+    namespace, name, provider, version and description.
+    """
+
+
 class GitError(Error):
     """
     TfMod encountered an error when trying to use git. Consider filing an issue at:
@@ -114,12 +143,50 @@ class GitDirtyError(PublishError):
     """
 
 
+class RegistryWaitTimeoutError(PublishError):
+    """
+    TfMod pushed your module, but the Terraform Registry did not list the new
+    version before the timeout. The registry may still ingest it - to wait
+    longer, pass a larger timeout to -wait.
+    """
+
+
+class PublishAllError(PublishError):
+    """
+    TfMod was unable to publish some of the modules. The output for each
+    module is prefixed with its name - see above for details.
+    """
+
+
+class ServeError(Error):
+    """
+    TfMod was unable to start its daemon. Only one "tfmod serve" may listen
+    on a socket at a time - stop the other daemon, or set TFMOD_SOCKET to
+    listen somewhere else.
+    """
+
+
+class StepTimeoutError(Error):
+    """
+    TfMod gave up on a step which took too long. If the step is expected to
+    be slow, raise the limit with -timeout, -action-timeout or
+    -refresh-timeout.
+    """
+
+
 class PlanError(Error):
     """
     TfMod encountered an error while creating the plan.
     """
 
 
+class StalePlanError(PlanError):
+    """
+    The saved plan no longer matches the current state of the module. Create
+    a new plan with "tfmod publish -out" and try again.
+    """
+
+
 class ApplyError(PlanError):
     """
     TfMod encountered an error while applying the plan.
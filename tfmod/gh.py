@@ -1,23 +1,25 @@
+from contextlib import contextmanager
 from dataclasses import dataclass
 from functools import cache
-import os
+import json
 from pathlib import Path
 import shlex
 from subprocess import CalledProcessError
-from typing import Dict, List, Optional
+from typing import Any, Dict, Generator, List, Optional, TYPE_CHECKING
 
-from github import Auth, Github
-from yaml import load
-
-try:
-    from yaml import CLoader as Loader
-except ImportError:
-    from yaml import Loader
-
-from tfmod.constants import GH_BIN, GH_CONFIG_DIR
+from tfmod.constants import gh_bin, GH_CONFIG_DIR
 from tfmod.error import GhError
 from tfmod.io import logger
+from tfmod.lazy import LazyModule
 from tfmod.process import run_interactive, run_out
+from tfmod.timeout import remaining, timed_out
+
+if TYPE_CHECKING:
+    from github import Auth, Github
+
+github: Any = LazyModule("github")
+requests: Any = LazyModule("requests")
+yaml: Any = LazyModule("yaml")
 
 
 @dataclass
@@ -36,8 +38,11 @@ GhHosts = Dict[str, GhHost]
 
 
 def load_gh_hosts(path: Path = GH_CONFIG_DIR / "hosts.yml") -> GhHosts:
+    # Prefer the C loader, if PyYAML was built with it
+    loader = getattr(yaml, "CLoader", None) or yaml.Loader
+
     with open(path, "r") as f:
-        data = load(f, Loader=Loader)
+        data = yaml.load(f, Loader=loader)
 
     # TODO: Check/warn for unexpected keys
     hosts = {
@@ -77,8 +82,8 @@ def get_gh_user(hosts: Optional[GhHosts]) -> Optional[str]:
         logger.debug("github.com not found in gh hosts")
 
 
-def gh_out(command: List[str], path: str = os.getcwd()) -> str:
-    argv = [GH_BIN] + command
+def gh_out(command: List[str], path: Optional[str] = None) -> str:
+    argv = [gh_bin()] + command
     try:
         return run_out(argv, cwd=path)
     except CalledProcessError as exc:
@@ -87,8 +92,8 @@ def gh_out(command: List[str], path: str = os.getcwd()) -> str:
         )
 
 
-def gh_interactive(command: List[str], path: str = os.getcwd()) -> None:
-    argv = [GH_BIN] + command
+def gh_interactive(command: List[str], path: Optional[str] = None) -> None:
+    argv = [gh_bin()] + command
     try:
         run_interactive(argv, cwd=path)
     except CalledProcessError as exc:
@@ -96,32 +101,64 @@ def gh_interactive(command: List[str], path: str = os.getcwd()) -> None:
 
 
 # TODO: What happens if I log out?
-def gh_auth_token(host: str = "github.com", user: Optional[str] = None) -> Auth.Token:
+@cache
+def gh_auth_token(host: str = "github.com", user: Optional[str] = None) -> "Auth.Token":
     argv = ["auth", "token", "-h", host]
     if user is not None:
         argv.append("-u")
         argv.append(user)
-    return Auth.Token(gh_out(argv).strip())
+    return github.Auth.Token(gh_out(argv).strip())
+
+
+@contextmanager
+def gh_client(
+    step: str, host: str = "github.com", user: Optional[str] = None
+) -> Generator["Github", None, None]:
+    """
+    A GitHub API client, whose requests are limited to the time left before
+    the current deadline (if any). Under a deadline, requests aren't retried,
+    and a request which times out raises a StepTimeoutError.
+    """
+    timeout = remaining(step)
+    auth = gh_auth_token(host, user)
 
+    if timeout is None:
+        client = github.Github(auth=auth)
+    else:
+        client = github.Github(auth=auth, timeout=timeout, retry=None)
 
-@cache
-def gh_client(host: str = "github.com", user: Optional[str] = None) -> Github:
-    auth = gh_auth_token(host, user)
-    return Github(auth=auth)
+    try:
+        yield client
+    except requests.Timeout:
+        timed_out(step)
 
 
-def gh_repo_create(name: str, public=True) -> None:
+def gh_repo_create(name: str, public=True, path: Optional[str] = None) -> None:
     argv = ["repo", "create", name]
     if public:
         argv.append("--public")
     else:
         argv.append("--private")
-    gh_interactive(argv)
+    gh_interactive(argv, path)
+
+
+def gh_repo_description(description: str, path: Optional[str] = None) -> None:
+    gh_interactive(["repo", "edit", "--description", description], path)
 
 
-def gh_repo_description(description: str) -> None:
-    gh_interactive(["repo", "edit", "--description", description])
+def gh_repo_view(
+    fields: List[str], name: Optional[str] = None, path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    View fields of a repository - by default, the current one. Raises a
+    GhError if the repository doesn't exist.
+    """
+    argv = ["repo", "view"]
+    if name:
+        argv.append(name)
+    argv += ["--json", ",".join(fields)]
+    return json.loads(gh_out(argv, path))
 
 
-def gh_git_protocol() -> str:
-    return gh_out(["config", "get", "git_protocol"]).strip()
+def gh_git_protocol(path: Optional[str] = None) -> str:
+    return gh_out(["config", "get", "git_protocol"], path).strip()
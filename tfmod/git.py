@@ -5,14 +5,18 @@ from pathlib import Path
 import re
 import shlex
 from subprocess import CalledProcessError
-from typing import Dict, List, Literal, NoReturn, Optional, Self
+from typing import Any, Dict, List, Literal, NoReturn, Optional, Self, TYPE_CHECKING
 
-import giturlparse
-
-from tfmod.constants import GIT_BIN
+from tfmod.constants import git_bin
 from tfmod.error import GitError, GitHeadNotFoundError, GitRepoNotFoundError
+from tfmod.lazy import LazyModule
 from tfmod.process import run_interactive, run_out, run_test
 
+if TYPE_CHECKING:
+    from giturlparse import GitUrlParsed
+
+giturlparse: Any = LazyModule("giturlparse")
+
 Direction = Literal["fetch"] | Literal["push"]
 
 
@@ -23,24 +27,24 @@ def git_error(exc: CalledProcessError, argv: List[str]) -> NoReturn:
     )
 
 
-def git_out(command: List[str], path: str = os.getcwd()) -> str:
-    argv = [GIT_BIN] + command
+def git_out(command: List[str], path: Optional[str] = None) -> str:
+    argv = [git_bin()] + command
     try:
         return run_out(argv, cwd=path)
     except CalledProcessError as exc:
         git_error(exc, argv)
 
 
-def git_test(command: List[str], path: str = os.getcwd()) -> bool:
-    argv = [GIT_BIN] + command
+def git_test(command: List[str], path: Optional[str] = None) -> bool:
+    argv = [git_bin()] + command
     try:
         return run_test(argv, cwd=path)
     except CalledProcessError as exc:
         git_error(exc, argv)
 
 
-def git_interactive(command: List[str], path: str = os.getcwd()) -> None:
-    argv = [GIT_BIN] + command
+def git_interactive(command: List[str], path: Optional[str] = None) -> None:
+    argv = [git_bin()] + command
     try:
         return run_interactive(argv, cwd=path)
     except CalledProcessError as exc:
@@ -54,13 +58,13 @@ class GitRemote:
     fetch_url: str
     push_url: str
 
-    def parse(self, direction: Direction = "push") -> giturlparse.GitUrlParsed:
+    def parse(self, direction: Direction = "push") -> "GitUrlParsed":
         url = self.push_url if direction == "push" else self.fetch_url
         # TODO: Error handling
         return giturlparse.parse(url)
 
 
-def git_remote(path: str = os.getcwd()) -> Dict[str, GitRemote]:
+def git_remote(path: Optional[str] = None) -> Dict[str, GitRemote]:
     try:
         out = git_out(["remote", "-v"], path).strip()
     except GitError as exc:
@@ -81,8 +85,8 @@ def git_remote(path: str = os.getcwd()) -> Dict[str, GitRemote]:
     return {name: GitRemote(**kwargs) for name, kwargs in remotes.items()}
 
 
-def git_get_config(name: str) -> str:
-    return git_out(["config", "get", name]).strip()
+def git_get_config(name: str, path: Optional[str] = None) -> str:
+    return git_out(["config", "get", name], path).strip()
 
 
 def find_git_root(path: str) -> str:
@@ -102,7 +106,8 @@ class GitRepo:
     path: str
 
     @classmethod
-    def load(cls, path: str = os.getcwd()) -> "GitRepo":
+    def load(cls, path: Optional[str] = None) -> "GitRepo":
+        path = path or os.getcwd()
         try:
             root = find_git_root(path)
         except GitError:
@@ -112,7 +117,7 @@ class GitRepo:
         return GitRepo(remotes=remotes, path=path)
 
     @classmethod
-    def init(cls, path: str = os.getcwd()) -> None:
+    def init(cls, path: Optional[str] = None) -> None:
         git_interactive(["init"], path)
 
     def current_branch(self: Self) -> str:
@@ -126,6 +131,74 @@ class GitRepo:
                 raise GitRepoNotFoundError(str(exc), exc.stderr)
             raise exc
 
+    def head(self: Self) -> Optional[str]:
+        """
+        The commit sha at HEAD, if there are any commits.
+        """
+        try:
+            return git_out(["rev-parse", "HEAD"], self.path).strip()
+        except GitError as exc:
+            if b"unknown revision" in exc.stderr or b"ambiguous argument" in exc.stderr:
+                return None
+            raise exc
+
+    def ls_remote(self: Self, remote: str) -> str:
+        """
+        List the refs on a remote.
+        """
+        return git_out(["ls-remote", remote], self.path)
+
+    def tags_at_head(self: Self) -> List[str]:
+        """
+        The tags which point at HEAD.
+        """
+        out = git_out(["tag", "--points-at", "HEAD"], self.path)
+        return sorted(line for line in out.split("\n") if line)
+
+    def remote_tracking_refs(self: Self) -> str:
+        """
+        The remote-tracking refs, as last fetched or pushed. Unlike ls_remote,
+        this doesn't touch the network.
+        """
+        return git_out(
+            ["for-each-ref", "--format=%(objectname) %(refname)", "refs/remotes"],
+            self.path,
+        )
+
+    def resolve(self: Self, ref: str) -> Optional[str]:
+        """
+        The commit sha a ref points to, if it exists.
+        """
+        try:
+            return git_out(
+                ["rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}"], self.path
+            ).strip()
+        except GitError:
+            return None
+
+    def remote_refs(self: Self, remote: str, *patterns: str) -> Dict[str, str]:
+        """
+        The refs on a remote, and the commit shas they point to.
+        """
+        refs: Dict[str, str] = dict()
+        for line in git_out(["ls-remote", remote, *patterns], self.path).split("\n"):
+            if not line:
+                continue
+            sha, ref = line.split("\t")
+            # Annotated tags are listed twice - prefer the commit they point to
+            if ref.endswith("^{}"):
+                refs[ref[:-3]] = sha
+            else:
+                refs.setdefault(ref, sha)
+        return refs
+
+    def untracked_or_unstaged(self: Self) -> bool:
+        """
+        Whether there are any changes which haven't been added to the index.
+        """
+        lines = git_out(["status", "--porcelain"], self.path).split("\n")
+        return any(len(line) > 1 and line[1] != " " for line in lines)
+
     def status(self) -> None:
         git_interactive(["status"], self.path)
 
@@ -152,7 +225,7 @@ class GitRepo:
         argv = ["tag", name]
         if force:
             argv.append("-f")
-        git_interactive(argv)
+        git_interactive(argv, self.path)
 
     def push(
         self, remote: str, branch: Optional[str] = None, tags=False, force=False
@@ -164,4 +237,4 @@ class GitRepo:
             argv.append("--tags")
         if force:
             argv.append("--force")
-        git_interactive(argv)
+        git_interactive(argv, self.path)
@@ -0,0 +1,182 @@
+from collections import OrderedDict
+import copy
+from functools import cache as memoize
+import hashlib
+import importlib.util
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from tfmod.constants import STATE_DIR
+from tfmod.io import logger
+from tfmod.lazy import LazyModule
+from tfmod.trace import span
+
+hcl2: Any = LazyModule("hcl2")
+
+"""
+Load HCL files, with a cache. python-hcl2 builds its lark parser the first
+time it's used, which is slow, and parsing is slow afterwards too.
+
+Parsed documents are cached in memory and on disk, under STATE_DIR. Entries
+are keyed by the file's path, size, modification time and contents, so an
+edited file is always parsed again. Entries on disk are also keyed by the
+cache's format and the installed python-hcl2, so that upgrading either
+doesn't load documents in an old shape. Both caches evict the least recently
+used entries. hcl2 is only imported when a file isn't in either cache.
+"""
+
+CACHE_DIR: Path = STATE_DIR / "cache" / "hcl"
+
+# Bump this when the cached documents change shape
+CACHE_VERSION = 1
+
+# How many parsed documents to keep in memory and on disk
+MEMORY_ENTRIES = 64
+DISK_ENTRIES = 256
+
+Document = Dict[str, Any]
+Key = Tuple[str, int, int, str]
+
+
+@memoize
+def parser_version() -> str:
+    """
+    Identify the installed python-hcl2. Importing hcl2 or importlib.metadata
+    costs more than a cache hit saves, so hcl2's version module is hashed
+    without importing it.
+    """
+    spec = importlib.util.find_spec("hcl2")
+    if spec and spec.submodule_search_locations:
+        path = Path(spec.submodule_search_locations[0]) / "version.py"
+        try:
+            return hashlib.sha256(path.read_bytes()).hexdigest()
+        except OSError:
+            pass
+
+    from importlib import metadata
+
+    return metadata.version("python-hcl2")
+
+
+class HclCache:
+    """
+    A least recently used cache of parsed HCL documents, in memory and on
+    disk.
+    """
+
+    def __init__(
+        self,
+        path: Path = CACHE_DIR,
+        memory_entries: int = MEMORY_ENTRIES,
+        disk_entries: int = DISK_ENTRIES,
+    ) -> None:
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self._memory: OrderedDict[Key, Document] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _file(self, key: Key) -> Path:
+        # The in-memory cache never outlives an upgrade, but the disk cache
+        # does
+        versioned = [CACHE_VERSION, parser_version(), *key]
+        name = hashlib.sha256(json.dumps(versioned).encode("utf-8")).hexdigest()
+        return self.path / f"{name}.json"
+
+    def get(self, key: Key) -> Optional[Document]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        path = self._file(key)
+        try:
+            with open(path, "r") as f:
+                document: Document = json.load(f)
+            # The modification time tracks when the entry was last used
+            os.utime(path)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        self._remember(key, document)
+        return document
+
+    def set(self, key: Key, document: Document) -> None:
+        self._remember(key, document)
+
+        path = self._file(key)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(document, f)
+            os.replace(tmp, path)
+            self._evict()
+        except OSError as exc:
+            logger.debug(f"Failed to cache {key[0]}: {exc}")
+
+    def _remember(self, key: Key, document: Document) -> None:
+        with self._lock:
+            self._memory[key] = document
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        entries = list(self.path.glob("*.json"))
+        if len(entries) <= self.disk_entries:
+            return
+
+        def last_used(path: Path) -> float:
+            try:
+                return path.stat().st_mtime
+            except FileNotFoundError:
+                return 0.0
+
+        entries.sort(key=last_used)
+        for path in entries[: len(entries) - self.disk_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+
+
+cache = HclCache()
+
+
+def load(path: Path) -> Document:
+    """
+    Load an HCL file. The result is a copy, which the caller may modify.
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        data = f.read()
+
+    key: Key = (
+        os.path.abspath(path),
+        stat.st_size,
+        stat.st_mtime_ns,
+        hashlib.sha256(data).hexdigest(),
+    )
+
+    document = cache.get(key)
+    if document is None:
+        with span(f"parse {path}", "hcl"):
+            document = hcl2.loads(data.decode("utf-8"))
+        cache.set(key, document)
+
+    return copy.deepcopy(document)
+
+
+def loads(text: str) -> Document:
+    """
+    Parse HCL. Strings aren't cached.
+    """
+    return hcl2.loads(text)
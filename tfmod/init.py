@@ -0,0 +1,243 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import csv
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import traceback
+from typing import Any, Dict, List, Mapping, Optional, Self
+
+from tfmod.constants import MODULES_DIR
+from tfmod.error import Error, InitError, ManifestError
+from tfmod.io import logger, output_prefix, prefixed_output
+from tfmod.spec import Spec
+from tfmod.terraform.value import dump_value, null, Value
+from tfmod.terraform.variables import (
+    default_vars,
+    load_variables,
+    prompt_vars,
+    Variable,
+)
+from tfmod.trace import span
+
+"""
+Initialize a module's module.tfvars.
+
+This used to apply modules/init, which called encode_tfvars and wrote the
+result with a local_file. The file is now written in-process, formatted the
+same way. modules/init is kept as the reference for that formatting, and is
+still where the prompts' descriptions and defaults come from.
+
+Many modules may be initialized at once from a manifest, without prompting.
+"""
+
+INIT_MODULE = MODULES_DIR / "init"
+
+# Manifest fields, and the init module's variables they set
+MANIFEST_FIELDS = dict(
+    namespace="namespace",
+    name="name",
+    provider="provider_",
+    version="version_",
+    description="description",
+)
+
+
+def _string(values: Mapping[str, Value], name: str) -> Optional[str]:
+    value = values.get(name, null)
+    if value is null:
+        return None
+    return dump_value(value)
+
+
+def init_spec(values: Mapping[str, Value], current: Optional[Spec] = None) -> Spec:
+    """
+    Create the spec for a module from the prompted values. The current spec's
+    private and scripts values are preserved.
+    """
+    return Spec(
+        name=_string(values, "name"),
+        namespace=_string(values, "namespace"),
+        provider=_string(values, "provider_"),
+        version=_string(values, "version_"),
+        description=_string(values, "description"),
+        private=bool(current.private) if current else False,
+        scripts=current.scripts if current else dict(),
+    )
+
+
+def _prompts(path: Path, default_namespace: Optional[str]) -> Dict[str, Variable]:
+    return dict(
+        namespace=Variable(default=default_namespace),
+        name=Variable(default=path.name),
+        provider_=Variable(),
+        version_=Variable(),
+        description=Variable(),
+    )
+
+
+def init(path: Optional[Path] = None, default_namespace: Optional[str] = None) -> Path:
+    """
+    Prompt for a module's spec and write it to module.tfvars, returning the
+    file's path.
+    """
+    path = path or Path(os.getcwd())
+
+    with span("init", "init", path=str(path)):
+        current = Spec.load_optional(path)
+
+        values = prompt_vars(
+            load_variables(INIT_MODULE), _prompts(path, default_namespace), current
+        )
+
+        written = init_spec(values, current).write(path)
+
+    logger.ok(f"Wrote {written}")
+    return written
+
+
+@dataclass
+class ManifestEntry:
+    """
+    A module listed in an init manifest.
+    """
+
+    path: Path
+    values: Dict[str, Value]
+    prefix: str = ""
+    error: Optional[Exception] = None
+
+    @property
+    def name(self: Self) -> str:
+        return self.path.name
+
+    def fail(self: Self, exc: Exception) -> None:
+        self.error = exc
+        if isinstance(exc, Error):
+            logger.exception(exc)
+        else:
+            logger.debug(traceback.format_exc())
+            logger.error(f"{type(exc).__name__}: {exc}")
+
+
+def _read_manifest(path: Path) -> List[Dict[str, Any]]:
+    with open(path, "r", newline="") as f:
+        if path.suffix == ".csv":
+            return list(csv.DictReader(f))
+        if path.suffix == ".json":
+            rows = json.load(f)
+            if not isinstance(rows, list) or not all(
+                isinstance(row, dict) for row in rows
+            ):
+                raise ManifestError(f"{path} must contain a list of objects")
+            return rows
+    raise ManifestError(f"{path} is not a .json or .csv file")
+
+
+def load_manifest(path: Path) -> List[ManifestEntry]:
+    """
+    Load an init manifest. Relative paths are relative to the manifest, and
+    empty values are treated as unset.
+    """
+    try:
+        rows = _read_manifest(path)
+    except (OSError, json.JSONDecodeError, csv.Error) as exc:
+        raise ManifestError(f"Could not load {path}: {exc}")
+
+    entries: List[ManifestEntry] = list()
+    seen: Dict[Path, int] = dict()
+
+    for i, row in enumerate(rows, 1):
+        unknown = set(row) - set(MANIFEST_FIELDS) - {"path"}
+        if unknown:
+            raise ManifestError(
+                f"Unknown fields in entry {i} of {path}: {', '.join(sorted(unknown))}"
+            )
+        if not row.get("path", None):
+            raise ManifestError(f"Entry {i} of {path} has no path")
+        if not isinstance(row["path"], str):
+            raise ManifestError(f"The path in entry {i} of {path} must be a string")
+
+        # Two entries for one module would write its module.tfvars at once
+        resolved = (path.parent / row["path"]).resolve()
+        if resolved in seen:
+            raise ManifestError(
+                f"Entries {seen[resolved]} and {i} of {path} have the same path"
+            )
+        seen[resolved] = i
+
+        values: Dict[str, Value] = {
+            var: row[field]
+            for field, var in MANIFEST_FIELDS.items()
+            if row.get(field, None) not in (None, "")
+        }
+
+        entries.append(ManifestEntry(path=path.parent / row["path"], values=values))
+
+    return entries
+
+
+def _init_entry(
+    entry: ManifestEntry,
+    vars: Mapping[str, Variable],
+    default_namespace: Optional[str],
+) -> None:
+    with output_prefix(entry.prefix), span(f"init {entry.name}", "module"):
+        try:
+            os.makedirs(entry.path, exist_ok=True)
+            current = Spec.load_optional(entry.path)
+
+            values = default_vars(
+                vars, _prompts(entry.path, default_namespace), current
+            )
+            values.update(entry.values)
+
+            written = init_spec(values, current).write(entry.path)
+            logger.ok(f"Wrote {written}")
+        except Exception as exc:
+            entry.fail(exc)
+
+
+def init_all(
+    manifest: Path, jobs: int, default_namespace: Optional[str] = None
+) -> None:
+    """
+    Initialize every module in a manifest, writing their module.tfvars files
+    in parallel. Values missing from the manifest use the same defaults as
+    "tfmod init".
+    """
+    entries = load_manifest(manifest)
+
+    if not entries:
+        raise ManifestError(f"{manifest} lists no modules")
+
+    width = max(len(entry.name) for entry in entries)
+    for entry in entries:
+        entry.prefix = f"{entry.name.ljust(width)} | "
+
+    # The init module's variables are the same for every entry
+    vars = load_variables(INIT_MODULE)
+
+    with (
+        span("init-all", "init", manifest=str(manifest)),
+        prefixed_output(),
+        ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="init") as executor,
+    ):
+        futures = [
+            executor.submit(
+                copy_context().run, _init_entry, entry, vars, default_namespace
+            )
+            for entry in entries
+        ]
+        for future in futures:
+            future.result()
+
+    failed = [entry for entry in entries if entry.error]
+    if failed:
+        raise InitError(
+            f"Failed to initialize {len(failed)} of {len(entries)} modules: "
+            + ", ".join(entry.name for entry in failed)
+        )
+
+    logger.ok(f"Initialized {len(entries)} modules")
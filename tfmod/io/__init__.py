@@ -1,15 +1,25 @@
 from contextlib import contextmanager
+from contextvars import ContextVar
 import datetime
 from enum import IntEnum
 import json
 import os
+import sys
 import textwrap
-from typing import Generator, Literal, Mapping, Optional, Self
-
-from rich import print as pprint
+import threading
+from typing import Any, Dict, Generator, Literal, Mapping, Optional, Self, TextIO
 
 from tfmod.error import Error
 from tfmod.interrupts import interrupt_received
+from tfmod.io.ansi import color_enabled, render
+
+
+def pprint(*objects: Any, sep: str = " ", end: str = "\n") -> None:
+    """
+    Print with console markup, in color if stdout supports it.
+    """
+    text = sep.join(str(obj) for obj in objects)
+    print(render(text, color_enabled(sys.stdout)), end=end)
 
 
 class Level(IntEnum):
@@ -139,6 +149,14 @@ class Logger:
         for line in bug_report.split("\n"):
             pprint(f"[white on blue]{line.ljust(79)}[/white on blue]")
 
+    def span_start(self, name: str, id: int, parent: Optional[int]) -> None:
+        if self.is_level(Level.TRACE):
+            self.log(Level.TRACE, f"Span {id} started: {name}")
+
+    def span_end(self, name: str, id: int, duration: float) -> None:
+        if self.is_level(Level.TRACE):
+            self.log(Level.TRACE, f"Span {id} ended after {duration:.3f}s: {name}")
+
     def ok(self, message: str) -> None:
         pprint(f"[green]{message}[/green]")
 
@@ -173,6 +191,9 @@ class JSONLogger(Logger):
         now = datetime.datetime.now()
         return now.strftime("%Y-%m-%dT%H:%M:%S.%f%z")
 
+    def log(self, level: Level, message: str) -> None:
+        self.log_json(level, message)
+
     def log_json(self, level: Level, message: str) -> None:
         print(
             json.dumps(
@@ -184,25 +205,117 @@ class JSONLogger(Logger):
             )
         )
 
+    def log_span(self, type: str, fields: Dict[str, Any]) -> None:
+        print(
+            json.dumps(
+                {
+                    "@level": "trace",
+                    "@message": f"{type}: {fields['span']}",
+                    "@timestamp": self.timestamp(),
+                    "type": type,
+                    **fields,
+                }
+            )
+        )
+
+    def span_start(self, name: str, id: int, parent: Optional[int]) -> None:
+        self.log_span("span_start", dict(span=name, span_id=id, parent_id=parent))
+
+    def span_end(self, name: str, id: int, duration: float) -> None:
+        self.log_span(
+            "span_end", dict(span=name, span_id=id, duration_ms=duration * 1000)
+        )
+
 
 logger: Logger = Logger(Level.WARN)
 
 
 def configure_logger(env: Mapping[str, str] = os.environ) -> None:
-    global logger
+    # The logger is configured in place, so that modules which have already
+    # imported it see the change
+    value = env.get("TF_LOG", "")
 
-    if "TF_LOG" in env:
-        if env["TF_LOG"] == Level.JSON:
-            logger = JSONLogger(Level.JSON)
-        elif not env["TF_LOG"]:
-            pass
-        else:
-            logger.level = Level.from_str(env["TF_LOG"])
+    if value == str(Level.JSON):
+        logger.__class__ = JSONLogger
+        logger.level = Level.JSON
+    else:
+        logger.__class__ = Logger
+        logger.level = Level.from_str(value) if value else Level.WARN
 
 
 configure_logger()
 
 
+OUTPUT_PREFIX: ContextVar[Optional[str]] = ContextVar("OUTPUT_PREFIX", default=None)
+
+
+class PrefixedOutput:
+    """
+    A stream which prefixes every line written with the current output
+    prefix, if any. Partial lines are held until they're complete, so that
+    output from concurrent threads is interleaved a line at a time.
+    """
+
+    def __init__(self: Self, stream: TextIO) -> None:
+        self.stream = stream
+        self._partial: Dict[str, str] = dict()
+        self._lock = threading.Lock()
+
+    def write(self: Self, text: str) -> int:
+        prefix = OUTPUT_PREFIX.get()
+
+        if prefix is None:
+            return self.stream.write(text)
+
+        with self._lock:
+            lines = (self._partial.pop(prefix, "") + text).split("\n")
+            if lines[-1]:
+                self._partial[prefix] = lines[-1]
+            for line in lines[:-1]:
+                self.stream.write(f"{prefix}{line}\n")
+
+        return len(text)
+
+    def flush(self: Self) -> None:
+        with self._lock:
+            for prefix, line in self._partial.items():
+                self.stream.write(f"{prefix}{line}\n")
+            self._partial.clear()
+            self.stream.flush()
+
+    def __getattr__(self: Self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+@contextmanager
+def prefixed_output() -> Generator[None, None, None]:
+    """
+    Route stdout and stderr through PrefixedOutput, so that output_prefix
+    takes effect.
+    """
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = PrefixedOutput(stdout)  # type: ignore
+    sys.stderr = PrefixedOutput(stderr)  # type: ignore
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+@contextmanager
+def output_prefix(prefix: str) -> Generator[None, None, None]:
+    """
+    Prefix output written in this context.
+    """
+    token = OUTPUT_PREFIX.set(prefix)
+    try:
+        yield
+    finally:
+        OUTPUT_PREFIX.reset(token)
+
+
 def prompt(
     name: str, message: str = "Enter a value:", description: Optional[str] = None
 ) -> Optional[str]:
@@ -215,13 +328,8 @@ def prompt(
         pprint(f"[bold white]{textwrap.indent(description, " ")}[/bold white]")
     print("")
 
-    # rich.Prompt doesn't have the right behavior.
-    #
-    # I'd use a formatter from rich, but it doesn't expose one. This is
-    # probably because it goes through great pains to handle terminal width
-    # appropriately, something a format method can't do.
     try:
-        result = input(f"\u001b[1m{message}\u001b[0m ")
+        result = input(render(f"[bold]{message}[/bold] ", color_enabled(sys.stdout)))
     except (KeyboardInterrupt, EOFError):
         print()
         interrupt_received()
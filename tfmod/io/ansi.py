@@ -0,0 +1,130 @@
+import os
+import re
+from typing import List, Mapping, Optional, TextIO
+
+"""
+A small renderer for the console markup TfMod uses - a subset of rich's
+syntax. A tag like [bold], [green], [color(8)] or [white on blue] opens a
+style, and [/bold] (or [/]) closes the most recent one. Brackets which don't
+contain a known style are printed as-is.
+
+When color is disabled, tags are removed and nothing else about the text
+changes.
+"""
+
+COLORS = {
+    "black": 0,
+    "red": 1,
+    "green": 2,
+    "yellow": 3,
+    "blue": 4,
+    "magenta": 5,
+    "cyan": 6,
+    "white": 7,
+}
+
+ATTRIBUTES = {
+    "bold": "1",
+    "dim": "2",
+    "italic": "3",
+    "underline": "4",
+}
+
+TAG_RE = re.compile(r"\[(/?)([a-z0-9() ]*)\]")
+COLOR_RE = re.compile(r"color\((\d{1,3})\)")
+
+RESET = "\x1b[0m"
+
+
+def _color(name: str, background: bool) -> Optional[str]:
+    if name in COLORS:
+        return str(COLORS[name] + (40 if background else 30))
+    match = COLOR_RE.fullmatch(name)
+    if match and int(match.group(1)) < 256:
+        return f"{48 if background else 38};5;{match.group(1)}"
+    return None
+
+
+def sgr(style: str) -> Optional[str]:
+    """
+    Convert a style, such as "bold white" or "white on blue", into the
+    parameters of an SGR escape sequence. Returns None if the style isn't
+    understood.
+    """
+    words = style.split()
+    if not words:
+        return None
+
+    params: List[str] = list()
+    background = False
+
+    for word in words:
+        if word == "on":
+            if background:
+                return None
+            background = True
+            continue
+        if word in ATTRIBUTES and not background:
+            params.append(ATTRIBUTES[word])
+            continue
+        color = _color(word, background)
+        if color is None:
+            return None
+        params.append(color)
+
+    return ";".join(params)
+
+
+def render(text: str, color: bool) -> str:
+    """
+    Render markup, either as ANSI escape sequences or as plain text.
+    """
+    out: List[str] = list()
+    stack: List[str] = list()
+    pos = 0
+
+    for match in TAG_RE.finditer(text):
+        closing, style = match.groups()
+
+        if closing:
+            if not stack or (style and sgr(style) != stack[-1]):
+                continue
+        elif sgr(style) is None:
+            continue
+
+        out.append(text[pos : match.start()])
+        pos = match.end()
+
+        if closing:
+            stack.pop()
+            if color:
+                out.append(RESET)
+                out += [f"\x1b[{params}m" for params in stack]
+        else:
+            params = sgr(style)
+            assert params is not None
+            stack.append(params)
+            if color:
+                out.append(f"\x1b[{params}m")
+
+    out.append(text[pos:])
+
+    if color and stack:
+        out.append(RESET)
+
+    return "".join(out)
+
+
+def color_enabled(stream: TextIO, env: Mapping[str, str] = os.environ) -> bool:
+    """
+    Whether or not to write color to a stream. Color is disabled when the
+    stream isn't a terminal, when NO_COLOR is set, or when TERM is "dumb".
+    """
+    if env.get("NO_COLOR", ""):
+        return False
+    if env.get("TERM", "") == "dumb":
+        return False
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Self, Set, Type
+
+from tfmod.io import logger
+from tfmod.snapshot import module_state_dir
+
+"""
+A write-ahead journal for applying plans. Before an action runs, the journal
+records that it started, and once it finishes, that it completed. If TfMod
+dies partway through, the journal shows how far it got, so that the apply
+may be resumed rather than replayed.
+
+The journal is a file of JSON lines, flushed to disk after every entry. It's
+removed once the whole plan has been applied.
+"""
+
+
+def journal_path(path: Optional[str] = None) -> Path:
+    return module_state_dir(path) / "journal.jsonl"
+
+
+@dataclass
+class JournalState:
+    """
+    The contents of an interrupted apply's journal.
+    """
+
+    spec: str
+    actions: List[Dict[str, Any]]
+    started: Set[int] = field(default_factory=set)
+    completed: Set[int] = field(default_factory=set)
+
+    @classmethod
+    def read(cls: Type[Self], path: Path) -> Optional[Self]:
+        try:
+            with open(path, "r") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return None
+
+        state: Optional[Self] = None
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # The last entry may have been cut off
+                logger.debug(f"Ignoring partial journal entry: {line!r}")
+                continue
+
+            if entry["event"] == "plan":
+                state = cls(spec=entry["spec"], actions=entry["actions"])
+            elif state and entry["event"] == "start":
+                state.started.add(entry["index"])
+            elif state and entry["event"] == "complete":
+                state.completed.add(entry["index"])
+
+        return state
+
+
+class Journal:
+    """
+    The journal for a module. The spec is the hash of the module.tfvars the
+    plan was generated from.
+    """
+
+    def __init__(self: Self, path: Path, spec: str) -> None:
+        self.path = path
+        self.spec = spec
+
+    def _append(self: Self, entry: Dict[str, Any]) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def begin(self: Self, actions: List[Dict[str, Any]]) -> None:
+        """
+        Start a new journal for a plan, replacing any previous one.
+        """
+        os.makedirs(self.path.parent, exist_ok=True)
+        with open(self.path, "w"):
+            pass
+        self._append(dict(event="plan", spec=self.spec, actions=actions))
+
+    def start(self: Self, index: int) -> None:
+        self._append(dict(event="start", index=index))
+
+    def complete(self: Self, index: int) -> None:
+        self._append(dict(event="complete", index=index))
+
+    def finish(self: Self) -> None:
+        """
+        The plan was applied in full, so the journal is no longer needed.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def read(self: Self) -> Optional[JournalState]:
+        return JournalState.read(self.path)
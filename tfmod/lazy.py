@@ -0,0 +1,27 @@
+import importlib
+from types import ModuleType
+from typing import Any, Optional, Self
+
+"""
+Some of TfMod's dependencies are slow to import, and most commands don't use
+all of them. Wrapping them in a LazyModule defers the import until they're
+first used, so that simple commands start quickly.
+"""
+
+
+class LazyModule:
+    """
+    A module which is imported on first attribute access.
+    """
+
+    def __init__(self: Self, name: str) -> None:
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def __getattr__(self: Self, attr: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self: Self) -> str:
+        return f"<lazy module {self._name!r}>"
@@ -1,20 +1,106 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Any, Callable, cast, List, Literal, Optional, Self, Tuple, Type
+from dataclasses import asdict, dataclass, field
+import os
+from typing import (
+    Any,
+    Callable,
+    cast,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Self,
+    Tuple,
+    Type,
+)
+
+from tfmod.error import ApplyInterruptError, Error, PlanError, ResourceError
+from tfmod.io import Logger, logger, pprint, prompt_confirm
+from tfmod.journal import Journal
+from tfmod.snapshot import Refresh, Snapshot, snapshot_path
+from tfmod.timeout import deadline
+from tfmod.trace import span
 
-from rich import print as pprint
+ActionType = Literal["+"] | Literal["~"] | Literal["-"]
 
-from tfmod.error import ApplyInterruptError, ResourceError
-from tfmod.io import prompt_confirm
 
-ActionType = Literal["+"] | Literal["~"] | Literal["-"]
+Operation = Callable[..., Any]
+
+OPERATIONS: Dict[str, Operation] = dict()
+
+
+Check = Callable[..., bool]
+
+CHECKS: Dict[str, Check] = dict()
+
+
+def operation(name: str) -> Callable[[Operation], Operation]:
+    """
+    Define an operation. Actions refer to operations by name, rather than
+    holding a callable, so that plans may be saved and applied later.
+    Operations take the module's path, followed by the action's arguments.
+    """
+
+    def decorator(fn: Operation) -> Operation:
+        OPERATIONS[name] = fn
+        return fn
+
+    return decorator
+
+
+def check(name: str) -> Callable[[Check], Check]:
+    """
+    Define a check for an operation. Checks take the same arguments as their
+    operation, and return whether or not the operation's effects are in
+    place. They're used to verify completed actions before resuming an
+    interrupted apply.
+    """
+
+    def decorator(fn: Check) -> Check:
+        CHECKS[name] = fn
+        return fn
+
+    return decorator
 
 
 @dataclass
 class Action:
     type: ActionType
     name: str
-    run: Callable[[], Any]
+    op: str
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    def run(self: Self, path: str) -> Any:
+        """
+        Run the action's operation against the module at path.
+        """
+        if self.op not in OPERATIONS:
+            raise PlanError(f"Unknown operation {self.op}")
+        with span(self.name, "action", op=self.op, path=path):
+            return OPERATIONS[self.op](path, **self.args)
+
+    def verify(self: Self, path: str) -> bool:
+        """
+        Check whether the action's effects are in place. Actions without a
+        check are never considered done.
+        """
+        if self.op not in CHECKS:
+            return False
+        with span(f"verify {self.name}", "action", op=self.op, path=path):
+            try:
+                return CHECKS[self.op](path, **self.args)
+            except Error as exc:
+                logger.debug(f"Unable to verify {self.name}: {exc}")
+                return False
+
+    def dump(self: Self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def load(cls: Type[Self], data: Dict[str, Any]) -> Self:
+        return cls(
+            type=data["type"], name=data["name"], op=data["op"], args=data["args"]
+        )
 
 
 Plan = List[Action]
@@ -40,7 +126,71 @@ ACTION_MARKER = {
     "-": "[red]-[/red]",
 }
 
-APPLYING = False
+
+@dataclass
+class Timeouts:
+    """
+    Time limits for each step of a plan, in seconds. Zero means no limit.
+    """
+
+    # For each action
+    action: float = 0.0
+    # For each resource refresh
+    refresh: float = 0.0
+
+
+class ResourceContext:
+    """
+    The resources for one module. A context owns the resource instances and
+    their cached values, along with the module's path, the logger, whether
+    resources may be served from the state snapshot, time limits, and whether
+    a plan is being applied. Separate contexts share nothing, so many modules may be
+    planned at once.
+    """
+
+    def __init__(
+        self: Self,
+        path: Optional[str] = None,
+        log: Optional[Logger] = None,
+        refresh: Optional[Refresh] = None,
+        snapshot: Optional[Snapshot] = None,
+        timeouts: Optional[Timeouts] = None,
+    ) -> None:
+        self.path: str = path or os.getcwd()
+        self.logger: Logger = log or logger
+        self.refresh: Refresh = refresh or Refresh()
+        self.snapshot: Snapshot = snapshot or Snapshot(snapshot_path(self.path))
+        self.timeouts: Timeouts = timeouts or Timeouts()
+        self.applying: bool = False
+        self._resources: "Dict[Type[Resource[Any]], Resource[Any]]" = dict()
+
+    def resource[T](self: Self, cls: Type["Resource[T]"]) -> "Resource[T]":
+        """
+        Get the context's instance of a resource, creating it if necessary.
+        """
+        if cls not in self._resources:
+            self._resources[cls] = cls(self)
+        return cast("Resource[T]", self._resources[cls])
+
+    def may[T](self: Self, cls: Type["Resource[T]"]) -> Optional[T]:
+        """
+        Attempt to get the resource. If the resource isn't ready, None is
+        returned. Successful attempts are cached.
+        """
+        return self.resource(cls).may()
+
+    def must[T](self: Self, cls: Type["Resource[T]"]) -> T:
+        """
+        Get the resource. If the resource isn't ready, raises a
+        ResourceError. Successful attempts are cached.
+        """
+        return self.resource(cls).must()
+
+    def clear[T](self: Self, cls: Type["Resource[T]"]) -> None:
+        """
+        Clear the resource, as though it has never been received.
+        """
+        self.resource(cls).clear()
 
 
 class Resource[T](ABC):
@@ -48,19 +198,48 @@ class Resource[T](ABC):
     A resource.
     """
 
-    _singleton: "Optional[Resource[T]]" = None
-
     name: str = "<none>"
 
-    def __init__(self: Self) -> None:
+    # Whether or not the resource is recorded in the state snapshot. Resources
+    # which persist must implement dump and load.
+    persist: bool = False
+
+    def __init__(self: Self, context: ResourceContext) -> None:
+        self.context = context
         self._cached: Optional[T] = None
 
+    @property
+    def logger(self: Self) -> Logger:
+        return self.context.logger
+
     def may(self: Self) -> Optional[T]:
         if self._cached is not None:
             return self._cached
-        if not APPLYING:
-            pprint(f"[bold]{self.name}: Refreshing state...[/bold]")
-        maybe = self.get()
+
+        with span(self.name, "resource", path=self.context.path):
+            return self._may()
+
+    def _may(self: Self) -> Optional[T]:
+        ctx = self.context
+        entry = ctx.snapshot.get(self.name, self.key()) if self.persist else None
+
+        if entry and ctx.refresh.accepts(entry):
+            self.logger.info(f"{self.name}: Reading from state snapshot")
+            maybe = None if entry.value is None else self.load(entry.value)
+        else:
+            if not ctx.applying:
+                pprint(f"[bold]{self.name}: Refreshing state...[/bold]")
+            with deadline(
+                f"refresh of {self.name}", ctx.timeouts.refresh, "-refresh-timeout"
+            ):
+                maybe = self.get()
+            if self.persist:
+                ctx.snapshot.record(
+                    self.name,
+                    self.key(),
+                    None if maybe is None else self.dump(maybe),
+                )
+
         if maybe is not None:
             self.validate(maybe)
             self._cached = maybe
@@ -89,44 +268,24 @@ class Resource[T](ABC):
         """
         pass
 
+    def key(self: Self) -> Optional[str]:
+        """
+        A cheap, local key for the inputs the resource depends on. Snapshot
+        entries recorded with a different key are ignored.
+        """
+        return None
 
-def _singleton[T](cls: Type[Resource[T]]) -> Resource[T]:
-    # Pyright doesn't like inferring class properties of generic types.
-    # There's probably a way to type this, but we're already pulling serious
-    # shenanigans
-    singleton = cast(Any, cls)._singleton
-
-    if not singleton:
-        singleton = cls()
-        cast(Any, cls)._singleton = singleton
-
-    if not singleton:
-        raise ResourceError("Resource singletonance not found")
-
-    return singleton
-
-
-def may[T](cls: Type[Resource[T]]) -> Optional[T]:
-    """
-    Attempt to get the resource. If the resource isn't ready, None is
-    returned. Successful attempts are cached.
-    """
-    return _singleton(cls).may()
-
-
-def must[T](cls: Type[Resource[T]]) -> T:
-    """
-    Get the resource. If the resource isn't ready, raises a
-    ResourceError. Successful attempts are cached.
-    """
-    return _singleton(cls).must()
-
+    def dump(self: Self, resource: T) -> Any:
+        """
+        Convert the resource into JSON-serializable data for the snapshot.
+        """
+        raise NotImplementedError("dump")
 
-def clear[T](cls: Type[Resource[T]]) -> None:
-    """
-    Clear the resource, as though it has never been received.
-    """
-    _singleton(cls).clear()
+    def load(self: Self, data: Any) -> T:
+        """
+        Load the resource from snapshot data.
+        """
+        raise NotImplementedError("load")
 
 
 def no_changes(plan: Plan) -> bool:
@@ -136,9 +295,7 @@ def no_changes(plan: Plan) -> bool:
     return False
 
 
-def prompt_apply(actions: List[Action]) -> bool:
-    assert not no_changes(actions)
-
+def _show_legend(actions: List[Action]) -> None:
     create, update, destroy = _action_types(actions)
     print(
         "TfMod generated the following execution plan. "
@@ -153,14 +310,15 @@ def prompt_apply(actions: List[Action]) -> bool:
         pprint("  [red]-[/red] destroy")
 
     print("")
-    print("TfMod will perform the following actions:")
-    print("")
 
+
+def _show_actions(actions: List[Action], indent: str = "  ") -> None:
     for action in actions:
-        pprint(f"  {ACTION_MARKER[action.type]} {action.name}")
+        pprint(f"{indent}{ACTION_MARKER[action.type]} {action.name}")
 
-    print("")
 
+def _confirm(actions: List[Action]) -> bool:
+    create, update, destroy = _action_types(actions)
     print(f"Plan: {create} to add, {update} to change, {destroy} to destroy.")
     print("")
     return prompt_confirm(
@@ -170,18 +328,71 @@ Only 'yes' will be accepted to approve.""",
     )
 
 
-def apply(plan: Plan, auto_approve: bool = False) -> None:
-    global APPLYING
+def prompt_apply(actions: List[Action]) -> bool:
+    assert not no_changes(actions)
+
+    _show_legend(actions)
+
+    print("TfMod will perform the following actions:")
+    print("")
+
+    _show_actions(actions)
+
+    print("")
+
+    return _confirm(actions)
+
 
+def prompt_apply_all(plans: Dict[str, Plan]) -> bool:
+    """
+    Show the plans for many modules together, and ask to apply all of them.
+    """
+    actions = [action for plan in plans.values() for action in plan]
+
+    _show_legend(actions)
+
+    print("TfMod will perform the following actions:")
+    print("")
+
+    for name, plan in plans.items():
+        pprint(f"  [bold]{name}[/bold]")
+        _show_actions(plan, indent="    ")
+        print("")
+
+    return _confirm(actions)
+
+
+def apply(
+    ctx: ResourceContext,
+    plan: Plan,
+    auto_approve: bool = False,
+    journal: Optional[Journal] = None,
+) -> None:
+    """
+    Apply a plan. If a journal is given, each action is recorded as it starts
+    and completes, so that an interrupted apply may be resumed.
+    """
     if no_changes(plan):
+        # A resumed apply whose actions were all done has nothing left to do
+        if journal:
+            journal.finish()
         return
 
     if auto_approve or prompt_apply(plan):
-        APPLYING = True
+        ctx.applying = True
+        if journal:
+            journal.begin([action.dump() for action in plan])
         try:
-            for action in plan:
-                action.run()
+            for i, action in enumerate(plan):
+                if journal:
+                    journal.start(i)
+                with deadline(action.name, ctx.timeouts.action, "-action-timeout"):
+                    action.run(ctx.path)
+                if journal:
+                    journal.complete(i)
         finally:
-            APPLYING = False
+            ctx.applying = False
+        if journal:
+            journal.finish()
     else:
         raise ApplyInterruptError("error asking for approval: interrupted")
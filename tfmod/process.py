@@ -1,17 +1,38 @@
-import os
+from contextlib import contextmanager
 import shlex
 import subprocess
-from typing import List, Literal, Mapping, Optional
+import sys
+import threading
+from typing import cast, Generator, List, Literal, Mapping, Optional
 
-from tfmod.io import logger
+from tfmod.io import logger, OUTPUT_PREFIX
+from tfmod.timeout import remaining, timed_out
+from tfmod.trace import span
 
 Direction = Literal["fetch"] | Literal["push"]
 
 
-def run_out(argv: List[str], cwd: str = os.getcwd()) -> str:
+@contextmanager
+def _process(
+    argv: List[str], cwd: Optional[str]
+) -> Generator[Optional[float], None, None]:
+    """
+    Trace a subprocess, yielding its timeout. If the subprocess times out, a
+    StepTimeoutError is raised.
+    """
+    command = shlex.join(argv)
+    with span(command, "process", cwd=cwd):
+        try:
+            yield remaining(command)
+        except subprocess.TimeoutExpired:
+            timed_out(command)
+
+
+def run_out(argv: List[str], cwd: Optional[str] = None) -> str:
     logger.start_quote(shlex.join(argv))
 
-    proc = subprocess.run(argv, cwd=cwd, capture_output=True)
+    with _process(argv, cwd) as timeout:
+        proc = subprocess.run(argv, cwd=cwd, capture_output=True, timeout=timeout)
     proc.check_returncode()
 
     if proc.stderr:
@@ -21,17 +42,78 @@ def run_out(argv: List[str], cwd: str = os.getcwd()) -> str:
     return proc.stdout.decode("unicode_escape")
 
 
-def run_test(argv: List[str], cwd: str = os.getcwd()) -> bool:
+def run_test(argv: List[str], cwd: Optional[str] = None) -> bool:
     logger.trace(f"Running: {shlex.join(argv)}")
-    proc = subprocess.run(argv, cwd=cwd, capture_output=True)
+    with _process(argv, cwd) as timeout:
+        proc = subprocess.run(argv, cwd=cwd, capture_output=True, timeout=timeout)
     if proc.stderr:
         logger.trace(proc.stderr.decode("unicode_escape"))
 
     return proc.returncode == 0
 
 
+def run_relayed(
+    argv: List[str], cwd: Optional[str] = None, env: Optional[Mapping[str, str]] = None
+) -> None:
+    """
+    Run a command attached to the terminal. If output is being prefixed, the
+    command's output is captured instead, and relayed a line at a time so
+    that it's prefixed as well.
+    """
+    with _process(argv, cwd) as timeout:
+        _run_relayed(argv, cwd, env, timeout)
+
+
+def _run_relayed(
+    argv: List[str],
+    cwd: Optional[str],
+    env: Optional[Mapping[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> None:
+    if OUTPUT_PREFIX.get() is None:
+        subprocess.run(
+            argv, cwd=cwd, env=env, capture_output=False, check=True, timeout=timeout
+        )
+        return
+
+    expired = threading.Event()
+
+    with subprocess.Popen(
+        argv,
+        cwd=cwd,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+    ) as proc:
+
+        def kill() -> None:
+            expired.set()
+            proc.kill()
+
+        # Reading the output blocks, so a timer kills the process instead
+        watchdog = threading.Timer(timeout, kill) if timeout is not None else None
+        if watchdog:
+            watchdog.start()
+
+        try:
+            assert proc.stdout
+            for line in proc.stdout:
+                sys.stdout.write(line)
+        finally:
+            if watchdog:
+                watchdog.cancel()
+
+    if expired.is_set():
+        raise subprocess.TimeoutExpired(argv, cast(float, timeout))
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, argv)
+
+
 def run_interactive(
-    argv: List[str], cwd: str = os.getcwd(), env: Optional[Mapping[str, str]] = None
+    argv: List[str], cwd: Optional[str] = None, env: Optional[Mapping[str, str]] = None
 ) -> None:
     with logger.quote(shlex.join(argv)):
-        subprocess.run(argv, cwd=cwd, env=env, capture_output=False, check=True)
+        run_relayed(argv, cwd=cwd, env=env)
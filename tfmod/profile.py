@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+import datetime
+import os
+import sys
+from typing import Generator, Mapping
+
+from tfmod.constants import STATE_DIR
+from tfmod.io import logger
+
+"""
+Profile a command by setting TFMOD_PROFILE. With "cpu", the command runs
+under cProfile. With "memory", tracemalloc compares the heap before and after
+the command. Either way, the raw profile is saved under the state directory
+and a summary of the top entries (TFMOD_PROFILE_TOP, default 25) is printed
+to stderr.
+"""
+
+PROFILE_DIR = STATE_DIR / "profiles"
+
+TOP = 25
+
+# How many frames tracemalloc keeps per allocation
+TRACEMALLOC_FRAMES = 25
+
+
+def _profile_path(suffix: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    now = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+    return str(PROFILE_DIR / f"{now}-{os.getpid()}.{suffix}")
+
+
+@contextmanager
+def cpu_profile(top: int) -> Generator[None, None, None]:
+    # The profilers are only imported when they're used
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = _profile_path("pstats")
+        profiler.dump_stats(path)
+
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        print(f"CPU profile saved to {path}", file=sys.stderr)
+
+
+@contextmanager
+def memory_profile(top: int) -> Generator[None, None, None]:
+    import tracemalloc
+
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    before = tracemalloc.take_snapshot()
+    try:
+        yield
+    finally:
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        path = _profile_path("tracemalloc")
+        after.dump(path)
+
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ]
+        diff = after.filter_traces(ignore).compare_to(
+            before.filter_traces(ignore), "lineno"
+        )
+
+        print(f"Top {top} allocation sites:", file=sys.stderr)
+        for stat in diff[:top]:
+            print(f"  {stat}", file=sys.stderr)
+        print(f"Memory snapshot saved to {path}", file=sys.stderr)
+
+
+@contextmanager
+def profiled(env: Mapping[str, str] = os.environ) -> Generator[None, None, None]:
+    """
+    Profile the enclosed block, as configured by TFMOD_PROFILE.
+    """
+    mode = env.get("TFMOD_PROFILE", "")
+
+    try:
+        top = int(env.get("TFMOD_PROFILE_TOP", TOP))
+    except ValueError:
+        top = TOP
+
+    if mode == "cpu":
+        with cpu_profile(top):
+            yield
+    elif mode == "memory":
+        with memory_profile(top):
+            yield
+    else:
+        if mode:
+            logger.warn(
+                f"Unknown TFMOD_PROFILE {mode}",
+                'Supported modes are "cpu" and "memory".',
+            )
+        yield
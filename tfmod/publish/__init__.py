@@ -1,3 +1,6 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
 import shlex
 import textwrap
 import traceback
@@ -6,11 +9,23 @@ import webbrowser
 
 from tf_registry import RegistryClient, RegistryError
 
-from tfmod.error import DefaultBranchError, GhError, GitDirtyError
-from tfmod.gh import gh_git_protocol, gh_repo_create, gh_repo_description
-from tfmod.git import GitRepo
+from tfmod.error import DefaultBranchError, GhError, GitDirtyError, StalePlanError
+from tfmod.gh import gh_git_protocol
 from tfmod.io import logger
-from tfmod.plan import Action, apply, may, must, Plan
+from tfmod.journal import Journal, journal_path
+from tfmod.plan import Action, apply, no_changes, Plan, ResourceContext, Timeouts
+from tfmod.publish.fingerprint import (
+    current_fingerprint,
+    Fingerprint,
+    record_published,
+    remote_refs_hash,
+    spec_hash,
+    unchanged_since_publish,
+)
+
+# Register the operations run by publish actions
+import tfmod.publish.operations  # noqa: F401
+from tfmod.publish.plan_file import SavedPlan
 from tfmod.publish.resource.default_branch import DefaultBranchResource
 from tfmod.publish.resource.git import GitResource
 from tfmod.publish.resource.module import ModuleResource
@@ -19,73 +34,88 @@ from tfmod.publish.resource.repository import RepositoryResource
 from tfmod.publish.resource.spec import SpecResource
 from tfmod.publish.resource.user import UserResource
 from tfmod.publish.resource.version import VersionResource
+from tfmod.registry import ModuleAddress, RegistryIndex, wait_for_versions
+from tfmod.snapshot import Refresh
 from tfmod.spec import Spec
+from tfmod.timeout import remaining, timed_out
 
+INITIAL_COMMIT_MESSAGE = "Initial commit"
 
-def git_actions() -> List[Action]:
+
+def git_actions(ctx: ResourceContext, batch: bool = False) -> List[Action]:
     """
     Attempt to load the git repository. If not found, return actions which should
     create the repository.
+
+    In batch mode, there's no terminal to write a commit message in, so the
+    initial commit gets one up front.
     """
-    repo = may(GitResource)
+    repo = ctx.may(GitResource)
 
     if not repo:
+        commit_args = dict(message=INITIAL_COMMIT_MESSAGE) if batch else dict()
         return [
-            Action(type="+", name="git init", run=GitRepo.init),
-            Action(type="+", name="git add .", run=lambda: must(GitResource).add(".")),
-            Action(type="+", name="git commit", run=lambda: must(GitResource).commit),
+            Action(type="+", name="git init", op="git.init"),
+            Action(type="+", name="git add .", op="git.add", args=dict(what=".")),
+            Action(type="+", name="git commit", op="git.commit", args=commit_args),
         ]
 
     return []
 
 
-def mop_actions(force: bool) -> List[Action]:
+def mop_actions(ctx: ResourceContext, force: bool, batch: bool = False) -> List[Action]:
     """
     Check the repository to see if it's dirty. If so, generate actions that
     would make it clean.
+
+    In batch mode, modules are planned concurrently and applied without a
+    terminal, so a dirty repository is refused rather than committed.
     """
-    repo = may(GitResource)
+    repo = ctx.may(GitResource)
 
     if not repo or not repo.dirty() or force:
         # If the repo doesn't exist, we'll do these tasks during the git init.
         # If it's clean, then we don't have anything to do.
         return []
 
+    if batch:
+        raise GitDirtyError("Repository contains uncommitted changes.")
+
     print("Repository contains uncommitted changes:")
     repo.status()
 
     actions = [
-        Action(type="~", name="git add .", run=lambda: repo.add(".")),
-        Action(type="~", name="git commit", run=repo.commit),
+        Action(type="~", name="git add .", op="git.add", args=dict(what=".")),
+        Action(type="~", name="git commit", op="git.commit"),
     ]
 
     return actions
 
 
-def remote_actions() -> List[Action]:
+def remote_actions(ctx: ResourceContext) -> List[Action]:
     """
     Try finding a current remote pointing to GitHub. If it can't be found or
     the repository doesn't exist, return actions that would create the GitHub
     repository (if necessary) and add it as a remote.
     """
 
-    git = may(GitResource)
+    git = ctx.may(GitResource)
 
     if not git:
-        return _remote_actions()
+        return _remote_actions(ctx)
 
-    remote = may(RemoteResource)
+    remote = ctx.may(RemoteResource)
     if not remote:
-        return _remote_actions()
+        return _remote_actions(ctx)
     else:
         return []
 
 
-def _remote_actions() -> List[Action]:
-    spec = must(SpecResource)
+def _remote_actions(ctx: ResourceContext) -> List[Action]:
+    spec = ctx.must(SpecResource)
     repo_name = spec.repo_name()
 
-    user = must(UserResource)
+    user = ctx.must(UserResource)
     remote_name = "origin"
     public = not spec.private
 
@@ -94,15 +124,15 @@ def _remote_actions() -> List[Action]:
     def default_ssh():
         nonlocal protocol
 
-        logger.warn(
+        ctx.logger.warn(
             "Could not discover GitHub git protocol", "Protocol will default to SSH."
         )
         protocol = "ssh"
 
     try:
-        protocol = gh_git_protocol()
+        protocol = gh_git_protocol(ctx.path)
     except GhError:
-        logger.info(traceback.format_exc())
+        ctx.logger.info(traceback.format_exc())
         default_ssh()
 
     if protocol not in {"https", "ssh"}:
@@ -115,7 +145,7 @@ def _remote_actions() -> List[Action]:
 
     actions: List[Action] = list()
 
-    repo = may(RepositoryResource)
+    repo = ctx.may(RepositoryResource)
     if not repo:
         actions.append(
             Action(
@@ -129,62 +159,65 @@ def _remote_actions() -> List[Action]:
                         "--public" if public else "--private",
                     ]
                 ),
-                run=lambda: gh_repo_create(repo_name, public=public),
+                op="gh.repo_create",
+                args=dict(name=repo_name, public=public),
             )
         )
     actions.append(
         Action(
             type="+",
             name=shlex.join(["git", "remote", "add", remote_name, git_url]),
-            run=lambda: must(GitResource).add_remote(remote_name, git_url),
+            op="git.remote_add",
+            args=dict(name=remote_name, url=git_url),
         )
     )
 
     return actions
 
 
-def description_actions() -> List[Action]:
+def description_actions(ctx: ResourceContext) -> List[Action]:
     """
     Check if the spec description matches what's on GitHub. If it doesn't match
     (or the repository doesn't exist), return actions that would update
     the GitHub repository's description to match the spec.
     """
 
-    spec = must(SpecResource)
-    repo = may(RepositoryResource)
+    spec = ctx.must(SpecResource)
+    repo = ctx.may(RepositoryResource)
     if not repo:
-        return _description_actions()
+        return _description_actions(ctx)
     else:
         if repo.description != spec.description:
-            return _description_actions()
+            return _description_actions(ctx)
         return []
 
 
-def _description_actions() -> List[Action]:
-    spec = must(SpecResource)
+def _description_actions(ctx: ResourceContext) -> List[Action]:
+    spec = ctx.must(SpecResource)
     description = cast(str, spec.description)
 
     return [
         Action(
             type="~",
             name=shlex.join(["gh", "repo", "edit", "--description", description]),
-            run=lambda: gh_repo_description(description),
+            op="gh.repo_description",
+            args=dict(description=description),
         )
     ]
 
 
-def tag_and_push_actions(force: bool) -> List[Action]:
+def tag_and_push_actions(ctx: ResourceContext, force: bool) -> List[Action]:
     """
     Return actions that would tag and push to git.
     """
-    version = must(VersionResource)
-    git = may(GitResource)
-    rem = may(RemoteResource)
+    version = ctx.must(VersionResource)
+    git = ctx.may(GitResource)
+    rem = ctx.may(RemoteResource)
 
     default_branch: Optional[str] = None
 
     try:
-        default_branch = may(DefaultBranchResource)
+        default_branch = ctx.may(DefaultBranchResource)
     except DefaultBranchError:
         if not force:
             raise
@@ -210,56 +243,98 @@ def tag_and_push_actions(force: bool) -> List[Action]:
         Action(
             type="+",
             name=f"git tag {patch}" + (" -f" if force else ""),
-            run=lambda: must(GitResource).tag(patch, force=force),
+            op="git.tag",
+            args=dict(name=patch, force=force),
         ),
         Action(
             type="~",
             name=f"git tag {minor} -f",
-            run=lambda: must(GitResource).tag(minor, force=True),
+            op="git.tag",
+            args=dict(name=minor, force=True),
         ),
         Action(
             type="~",
             name=f"git tag {major} -f",
-            run=lambda: must(GitResource).tag(major, force=True),
+            op="git.tag",
+            args=dict(name=major, force=True),
         ),
         # TODO: If repo is new, add --set-upstream flag
         Action(
             type="~",
             name=f"git push {remote} {branch}" + (" --force" if force else ""),
-            run=lambda: must(GitResource).push(remote, branch, force=force),
+            op="git.push",
+            args=dict(remote=remote, branch=branch, force=force),
         ),
         Action(
             type="~",
             name=f"git push {remote} --tags --force",
-            run=lambda: must(GitResource).push(remote, tags=True, force=True),
+            op="git.push",
+            args=dict(remote=remote, tags=True, force=True),
         ),
     ]
 
 
-def is_unpublished(spec: Spec) -> bool:
+def _check_registry(spec: Spec) -> Optional[RegistryError]:
     namespace = cast(str, spec.namespace)
     name = cast(str, spec.name)
     provider = cast(str, spec.provider)
+
+    # If a recent namespace listing already has the module, we're done
+    listing = RegistryIndex().cached(namespace)
+    if listing and ModuleAddress.from_spec(spec) in listing:
+        return None
+
     try:
         client = RegistryClient()
         # Hoping this is a relatively quick check, since the payloads are
         # virtually nonexistent
         client.latest_download_url(namespace, name, provider)
     except RegistryError as exc:
-        # Not found, baby!
-        if exc.code == 404:
-            return True
-
-        # Don't block, just return False
-        logger.debug(f"Terraform Registry API error: {exc}")
-        logger.warn(
-            f"Terraform Registry API failed with code {exc.code}:",
-            textwrap.dedent(
-                """
-            The Terraform Registry may be having issues and may work in the future.
-            """
-            ).strip(),
+        return exc
+    return None
+
+
+RegistryProbe = Future[Optional[RegistryError]]
+
+
+def probe_registry(executor: ThreadPoolExecutor, spec: Spec) -> RegistryProbe:
+    """
+    Start checking the Terraform Registry for the module in the background.
+    Whether or not the module exists doesn't depend on anything we push, so
+    this can run while the plan is refreshed and applied.
+    """
+    return executor.submit(_check_registry, spec)
+
+
+def is_unpublished(spec: Spec, probe: Optional[RegistryProbe] = None) -> bool:
+    # Any logging happens here, rather than in the probe's thread, so that it
+    # doesn't interleave with the plan output
+    try:
+        exc = (
+            probe.result(timeout=remaining("registry check"))
+            if probe
+            else _check_registry(spec)
         )
+    except FutureTimeoutError:
+        timed_out("registry check")
+
+    if exc is None:
+        return False
+
+    # Not found, baby!
+    if exc.code == 404:
+        return True
+
+    # Don't block, just return False
+    logger.debug(f"Terraform Registry API error: {exc}")
+    logger.warn(
+        f"Terraform Registry API failed with code {exc.code}:",
+        textwrap.dedent(
+            """
+        The Terraform Registry may be having issues and may work in the future.
+        """
+        ).strip(),
+    )
     return False
 
 
@@ -283,33 +358,222 @@ def open_package_url() -> None:
     print("(To disable this check, set private = true in module.tfvars)")
 
 
-def publish(args: Dict[str, Any]) -> None:
-    force: bool = args["force"]
-    auto_approve = args["auto_approve"]
-    spec = must(SpecResource)
-    must(ModuleResource)
-
-    plan: Plan = (
-        git_actions()
-        + mop_actions(force)
-        + remote_actions()
-        + description_actions()
-        + tag_and_push_actions(force)
+def plan_fingerprint(ctx: ResourceContext) -> Fingerprint:
+    """
+    Fingerprint the inputs the plan was generated from, using the refreshed
+    resources.
+    """
+    git = ctx.may(GitResource)
+    rem = ctx.may(RemoteResource)
+    repo = ctx.may(RepositoryResource)
+
+    return Fingerprint(
+        head=git.head() if git else None,
+        spec=spec_hash(Path(ctx.path)),
+        remote_refs=remote_refs_hash(git, rem[0] if rem else None),
+        description=repo.description if repo else None,
+    )
+
+
+def save_plan(ctx: ResourceContext, out: str, spec: Spec, plan: Plan) -> None:
+    rem = ctx.may(RemoteResource)
+
+    SavedPlan(
+        path=ctx.path,
+        spec=spec,
+        remote=rem[0] if rem else None,
+        fingerprint=plan_fingerprint(ctx),
+        actions=plan,
+    ).save(out)
+
+    print(f"Saved the plan to: {out}")
+    print("")
+    print("To perform exactly these actions, run the following command to apply:")
+    print(f"    tfmod apply {shlex.quote(out)}")
+
+
+def build_plan(ctx: ResourceContext, force: bool, batch: bool = False) -> Plan:
+    """
+    Refresh the module's resources and generate the actions needed to
+    publish it. Batch mode plans for publish-all, which can't prompt.
+    """
+    return (
+        git_actions(ctx, batch)
+        + mop_actions(ctx, force, batch)
+        + remote_actions(ctx)
+        + description_actions(ctx)
+        + tag_and_push_actions(ctx, force)
     )
 
-    apply(plan, auto_approve=auto_approve)
 
-    if not spec.private and is_unpublished(spec):
+def finish(
+    spec: Spec, probe: Optional[RegistryProbe] = None, wait: float = 0.0
+) -> None:
+    """
+    Report on the published module, optionally waiting for the registry to
+    list the new version.
+    """
+    if probe and is_unpublished(spec, probe):
         open_package_url()
+        if wait:
+            logger.info("Module is not on the registry - not waiting")
     else:
         logger.ok("Your module has been published!")
+        if wait and not spec.private:
+            wait_for_versions(
+                {ModuleAddress.from_spec(spec): cast(str, spec.version)}, wait
+            )
+
+
+def module_journal(ctx: ResourceContext) -> Journal:
+    return Journal(journal_path(ctx.path), spec_hash(Path(ctx.path)))
+
+
+def resume(ctx: ResourceContext, auto_approve: bool, wait: float) -> bool:
+    """
+    Resume an interrupted apply from its journal. Actions which started -
+    whether or not they completed - are verified, and the apply continues
+    from the first action whose effects aren't in place. Returns False if
+    there's nothing to resume.
+    """
+    journal = module_journal(ctx)
+    state = journal.read()
+
+    if not state:
+        logger.info("No interrupted publish to resume")
+        return False
+
+    if state.spec != journal.spec:
+        raise StalePlanError("module.tfvars changed since the interrupted publish")
+
+    actions = [Action.load(action) for action in state.actions]
+    start = 0
+
+    for i, action in enumerate(actions):
+        if i not in state.started or not action.verify(ctx.path):
+            if i in state.completed:
+                # For instance, a tag was deleted after the apply died
+                logger.warn(
+                    f"{action.name}: Completed, but no longer in effect",
+                    "It will be run again.",
+                )
+            break
+        logger.ok(f"{action.name}: Already done")
+        start = i + 1
+
+    spec = Spec.load(Path(ctx.path))
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="registry")
+    probe: Optional[RegistryProbe] = None
+
+    try:
+        if not spec.private:
+            probe = probe_registry(executor, spec)
+
+        apply(ctx, actions[start:], auto_approve=auto_approve, journal=journal)
+        record_published(ctx.path)
+
+        finish(spec, probe, wait)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return True
+
+
+def publish(args: Dict[str, Any]) -> None:
+    force: bool = args["force"]
+    auto_approve = args["auto_approve"]
+    wait: float = args["wait"]
+    out: str = args["out"]
+
+    ctx = ResourceContext(
+        refresh=Refresh(enabled=args["refresh"], ttl=args["refresh_ttl"]),
+        timeouts=Timeouts(
+            action=args["action_timeout"], refresh=args["refresh_timeout"]
+        ),
+    )
+
+    if args["resume"] and resume(ctx, auto_approve, wait):
+        return
+
+    # Skip everything - including Terraform, gh and the network - if nothing
+    # has changed since the last successful publish
+    if not force and not out and unchanged_since_publish(ctx.path):
+        no_changes([])
+        if wait:
+            # The last publish may not have waited for the registry
+            finish(Spec.load(Path(ctx.path)), None, wait)
+        return
+
+    spec = ctx.must(SpecResource)
+    ctx.must(ModuleResource)
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="registry")
+    probe: Optional[RegistryProbe] = None
+
+    try:
+        if not spec.private and not out:
+            probe = probe_registry(executor, spec)
+
+        plan = build_plan(ctx, force)
+
+        if out:
+            save_plan(ctx, out, spec, plan)
+            return
+
+        apply(ctx, plan, auto_approve=auto_approve, journal=module_journal(ctx))
+        record_published(ctx.path)
+
+        finish(spec, probe, wait)
+    finally:
+        # If the plan failed, don't hold up the exit waiting on the registry
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def apply_saved(
+    path: str, wait: float = 0.0, timeouts: Optional[Timeouts] = None
+) -> None:
+    """
+    Apply a plan saved with publish -out. Rather than refreshing resources,
+    the saved fingerprint is checked against the current state.
+    """
+    saved = SavedPlan.load(path)
+    ctx = ResourceContext(timeouts=timeouts)
+
+    if saved.path != ctx.path:
+        raise StalePlanError(f"Saved plan was created for {saved.path}")
+
+    spec = saved.spec
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="registry")
+    probe: Optional[RegistryProbe] = None
+
+    try:
+        if not spec.private:
+            probe = probe_registry(executor, spec)
+
+        changed = saved.fingerprint.diff(
+            current_fingerprint(spec, saved.remote, Path(ctx.path))
+        )
+
+        if changed:
+            raise StalePlanError(
+                "Saved plan is stale (changed: " + ", ".join(sorted(changed)) + ")"
+            )
+
+        apply(ctx, saved.actions, auto_approve=True, journal=module_journal(ctx))
+        record_published(ctx.path)
+
+        finish(spec, probe, wait)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
-def validate_mopped() -> None:
+def validate_mopped(ctx: ResourceContext) -> None:
     """
     Validate that the repository is not dirty. By the time this is called,
     actions should have been completed.
     """
-    repo = must(GitResource)
+    repo = ctx.must(GitResource)
     if repo.dirty():
         raise GitDirtyError("All files must be committed to continue.")
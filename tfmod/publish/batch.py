@@ -0,0 +1,245 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from dataclasses import dataclass, field
+import glob
+import os
+from pathlib import Path
+import traceback
+from typing import Any, cast, Dict, List, Optional, Self, Tuple
+
+from tf_registry import RegistryError
+
+from tfmod.error import ApplyInterruptError, Error, PublishAllError
+from tfmod.io import logger, output_prefix, prefixed_output
+from tfmod.plan import (
+    apply,
+    no_changes,
+    Plan,
+    prompt_apply_all,
+    ResourceContext,
+    Timeouts,
+)
+from tfmod.publish import build_plan, CREATE_PACKAGE_URL, module_journal
+from tfmod.publish.fingerprint import record_published, unchanged_since_publish
+from tfmod.publish.resource.module import ModuleResource
+from tfmod.publish.resource.spec import SpecResource
+from tfmod.registry import ModuleAddress, RegistryIndex, wait_for_versions
+from tfmod.snapshot import Refresh
+from tfmod.spec import Spec
+from tfmod.trace import span
+
+"""
+Publish many modules at once. Modules are planned concurrently, shown as one
+combined plan and applied with a bounded pool of workers, all in a single
+process - so Terraform's providers, GitHub authentication and registry
+listings are set up once, rather than once per module.
+"""
+
+
+@dataclass
+class ModulePublish:
+    """
+    The progress of publishing one module.
+    """
+
+    path: str
+    prefix: str
+    ctx: Optional[ResourceContext] = None
+    spec: Optional[Spec] = None
+    plan: Plan = field(default_factory=list)
+    error: Optional[Exception] = None
+    applied: bool = False
+    unpublished: bool = False
+
+    @property
+    def name(self: Self) -> str:
+        return Path(self.path).name
+
+    def fail(self: Self, exc: Exception) -> None:
+        self.error = exc
+        if isinstance(exc, Error):
+            logger.exception(exc)
+        else:
+            logger.debug(traceback.format_exc())
+            logger.error(f"{type(exc).__name__}: {exc}")
+
+    def status(self: Self) -> str:
+        if self.error:
+            return f"failed: {self.error}"
+        if not self.applied:
+            return "no changes"
+        version = self.spec.version if self.spec else None
+        if self.unpublished:
+            return f"pushed {version} (not on the Terraform Registry)"
+        return f"published {version}"
+
+
+def _has_spec(path: str) -> bool:
+    return os.path.isfile(Path(path) / "module.tfvars")
+
+
+def discover_modules(patterns: List[str]) -> List[str]:
+    """
+    Find module directories. Each pattern is a directory or a glob. Matches
+    containing a module.tfvars are modules - otherwise, their immediate
+    subdirectories are searched.
+    """
+    found: Dict[str, None] = dict()
+
+    for pattern in patterns:
+        matches = sorted(glob.glob(os.path.expanduser(pattern)))
+
+        if not matches:
+            logger.warn(f"No directories match {pattern}")
+
+        for match in matches:
+            if not os.path.isdir(match):
+                continue
+            if _has_spec(match):
+                found[os.path.abspath(match)] = None
+                continue
+            for child in sorted(os.listdir(match)):
+                path = os.path.join(match, child)
+                if os.path.isdir(path) and _has_spec(path):
+                    found[os.path.abspath(path)] = None
+
+    return list(found)
+
+
+def _plan(
+    module: ModulePublish, refresh: Refresh, timeouts: Timeouts, force: bool
+) -> None:
+    with output_prefix(module.prefix), span(f"plan {module.name}", "module"):
+        try:
+            if not force and unchanged_since_publish(module.path):
+                logger.info("Unchanged since the last publish")
+                return
+            ctx = ResourceContext(module.path, refresh=refresh, timeouts=timeouts)
+            module.spec = ctx.must(SpecResource)
+            ctx.must(ModuleResource)
+            module.plan = build_plan(ctx, force, batch=True)
+            module.ctx = ctx
+        except Exception as exc:
+            module.fail(exc)
+
+
+def _apply(module: ModulePublish) -> None:
+    with output_prefix(module.prefix), span(f"apply {module.name}", "module"):
+        try:
+            ctx = cast(ResourceContext, module.ctx)
+            apply(ctx, module.plan, auto_approve=True, journal=module_journal(ctx))
+            module.applied = True
+            record_published(module.path)
+        except Exception as exc:
+            module.fail(exc)
+
+
+def _run_all(executor: ThreadPoolExecutor, calls: List[Tuple[Any, ...]]) -> None:
+    """
+    Run calls on the pool and wait for them to finish. Each call runs in a
+    copy of the current context, so that the overall time limit and trace
+    span carry over to the workers.
+    """
+    futures = [executor.submit(copy_context().run, *call) for call in calls]
+    for future in futures:
+        future.result()
+
+
+def _check_registry(modules: List[ModulePublish]) -> None:
+    """
+    Check which of the applied modules are missing from the registry, with
+    one listing request per namespace.
+    """
+    index = RegistryIndex()
+
+    for module in modules:
+        spec = cast(Spec, module.spec)
+        try:
+            module.unpublished = index.is_unpublished(ModuleAddress.from_spec(spec))
+        except RegistryError as exc:
+            # Don't block, just assume it's there. Network failures are
+            # raised as RegistryErrors too, so one module's failure doesn't
+            # abort the rest.
+            with output_prefix(module.prefix):
+                logger.warn(f"Could not check the Terraform Registry: {exc}")
+
+
+def _summarize(modules: List[ModulePublish]) -> None:
+    width = max(len(module.name) for module in modules)
+
+    print("")
+    print("Summary:")
+    for module in modules:
+        print(f"  {module.name.ljust(width)}  {module.status()}")
+    print("")
+
+    if any(module.unpublished for module in modules):
+        print("To publish modules which aren't on the Terraform Registry, visit:")
+        print("")
+        print(f"    {CREATE_PACKAGE_URL}")
+        print("")
+
+
+def publish_all(
+    patterns: List[str],
+    jobs: int,
+    force: bool = False,
+    auto_approve: bool = False,
+    wait: float = 0.0,
+    refresh: Optional[Refresh] = None,
+    timeouts: Optional[Timeouts] = None,
+) -> None:
+    paths = discover_modules(patterns)
+
+    if not paths:
+        raise PublishAllError("No modules found")
+
+    width = max(len(Path(path).name) for path in paths)
+    modules = [
+        ModulePublish(path=path, prefix=f"{Path(path).name.ljust(width)} | ")
+        for path in paths
+    ]
+    refresh = refresh or Refresh()
+    timeouts = timeouts or Timeouts()
+
+    with (
+        prefixed_output(),
+        ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="publish") as executor,
+    ):
+        _run_all(executor, [(_plan, m, refresh, timeouts, force) for m in modules])
+
+        planned = [m for m in modules if not m.error and m.plan]
+        plans = {m.name: m.plan for m in planned}
+
+        actions = [action for plan in plans.values() for action in plan]
+
+        if actions:
+            if not auto_approve and not prompt_apply_all(plans):
+                raise ApplyInterruptError("error asking for approval: interrupted")
+
+            _run_all(executor, [(_apply, m) for m in planned])
+        elif not any(m.error for m in modules):
+            no_changes(actions)
+
+    published = [m for m in modules if m.applied and not cast(Spec, m.spec).private]
+
+    _check_registry(published)
+    _summarize(modules)
+
+    targets = {
+        ModuleAddress.from_spec(cast(Spec, m.spec)): cast(
+            str, cast(Spec, m.spec).version
+        )
+        for m in published
+        if not m.unpublished
+    }
+
+    if wait and targets:
+        wait_for_versions(targets, wait)
+
+    failed = [m for m in modules if m.error]
+
+    if failed:
+        raise PublishAllError(
+            f"{len(failed)} of {len(modules)} modules failed to publish"
+        )
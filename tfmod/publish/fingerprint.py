@@ -0,0 +1,200 @@
+from dataclasses import asdict, dataclass
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Self, Type
+
+from github.GithubException import UnknownObjectException
+
+from tfmod.constants import tfmod_version
+from tfmod.error import GitError, GitRepoNotFoundError
+from tfmod.gh import gh_client
+from tfmod.git import GitRepo
+from tfmod.io import logger
+from tfmod.snapshot import module_state_dir
+from tfmod.spec import Spec
+
+"""
+Fingerprints of the inputs a publish plan depends on. If the fingerprint
+taken when a plan was saved still matches when it's applied, the plan's
+actions are still valid and the resources don't need to be refreshed.
+
+Publishes are fingerprinted as well, using only local inputs. If nothing has
+changed since the last successful publish, there's nothing to do.
+"""
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def spec_hash(path: Optional[Path] = None) -> str:
+    """
+    Hash the contents of module.tfvars.
+    """
+    path = path or Path(os.getcwd())
+    with open(path / "module.tfvars", "rb") as f:
+        return sha256(f.read())
+
+
+@dataclass
+class Fingerprint:
+    head: Optional[str]
+    spec: str
+    remote_refs: Optional[str]
+    description: Optional[str]
+
+    def dump(self: Self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def load(cls: Type[Self], data: Dict[str, Any]) -> Self:
+        return cls(
+            head=data["head"],
+            spec=data["spec"],
+            remote_refs=data["remote_refs"],
+            description=data["description"],
+        )
+
+    def diff(self: Self, other: "Fingerprint") -> Dict[str, Any]:
+        """
+        The fields which differ from another fingerprint.
+        """
+        mine = self.dump()
+        theirs = other.dump()
+        return {key: value for key, value in mine.items() if theirs[key] != value}
+
+
+def remote_refs_hash(git: Optional[GitRepo], remote: Optional[str]) -> Optional[str]:
+    if not git or not remote:
+        return None
+    return sha256(git.ls_remote(remote).encode("utf-8"))
+
+
+def repository_description(spec: Spec) -> Optional[str]:
+    """
+    Fetch the GitHub repository's description, if the repository exists.
+    """
+    with gh_client("GitHub repository description") as client:
+        try:
+            repo = client.get_user(str(spec.namespace)).get_repo(spec.repo_name())
+        except UnknownObjectException as exc:
+            logger.debug(str(exc))
+            return None
+        return repo.description
+
+
+def current_fingerprint(
+    spec: Spec, remote: Optional[str], path: Optional[Path] = None
+) -> Fingerprint:
+    """
+    Compute the fingerprint directly, without refreshing any resources.
+    """
+    path = path or Path(os.getcwd())
+    try:
+        git: Optional[GitRepo] = GitRepo.load(str(path))
+    except GitRepoNotFoundError:
+        git = None
+
+    return Fingerprint(
+        head=git.head() if git else None,
+        spec=spec_hash(path),
+        remote_refs=remote_refs_hash(git, remote),
+        description=repository_description(spec),
+    )
+
+
+@dataclass
+class PublishFingerprint:
+    """
+    A cheap, local fingerprint of everything which can change a publish
+    plan. Remote refs are the remote-tracking refs, as of the last fetch or
+    push.
+    """
+
+    tfmod_version: str
+    head: str
+    dirty: bool
+    spec: str
+    tags: List[str]
+    remote_refs: str
+
+    def dump(self: Self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def load(cls: Type[Self], data: Dict[str, Any]) -> Self:
+        return cls(
+            tfmod_version=data["tfmod_version"],
+            head=data["head"],
+            dirty=data["dirty"],
+            spec=data["spec"],
+            tags=data["tags"],
+            remote_refs=data["remote_refs"],
+        )
+
+
+def published_path(path: str) -> Path:
+    return module_state_dir(path) / "published.json"
+
+
+def publish_fingerprint(path: str) -> Optional[PublishFingerprint]:
+    """
+    Fingerprint the module at path. Returns None if the module can't be
+    fingerprinted - for instance, if it isn't a git repository yet.
+    """
+    try:
+        git = GitRepo.load(path)
+        head = git.head()
+        if not head:
+            return None
+        return PublishFingerprint(
+            tfmod_version=tfmod_version(),
+            head=head,
+            dirty=git.dirty(),
+            spec=spec_hash(Path(path)),
+            tags=git.tags_at_head(),
+            remote_refs=sha256(git.remote_tracking_refs().encode("utf-8")),
+        )
+    except (GitError, FileNotFoundError) as exc:
+        logger.debug(f"Unable to fingerprint {path}: {exc}")
+        return None
+
+
+def record_published(path: str) -> None:
+    """
+    Record the module's fingerprint after a successful publish. A dirty
+    working tree isn't fingerprinted, since further edits wouldn't change the
+    fingerprint - any previous one is removed instead.
+    """
+    fingerprint = publish_fingerprint(path)
+    dest = published_path(path)
+
+    if not fingerprint or fingerprint.dirty:
+        try:
+            os.remove(dest)
+        except FileNotFoundError:
+            pass
+        return
+
+    os.makedirs(dest.parent, exist_ok=True)
+    tmp = dest.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(fingerprint.dump(), f)
+    os.replace(tmp, dest)
+
+
+def unchanged_since_publish(path: str) -> bool:
+    """
+    Whether or not the module is unchanged since its last successful publish.
+    """
+    try:
+        with open(published_path(path), "r") as f:
+            recorded = PublishFingerprint.load(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError, KeyError) as exc:
+        logger.debug(f"No usable publish fingerprint for {path}: {exc}")
+        return False
+
+    current = publish_fingerprint(path)
+    return current is not None and not current.dirty and current == recorded
@@ -0,0 +1,131 @@
+from typing import Optional
+
+from tfmod.error import GitError
+from tfmod.gh import gh_repo_create, gh_repo_description, gh_repo_view
+from tfmod.git import find_git_root, GitRepo
+from tfmod.plan import check, operation
+
+"""
+Operations run by publish actions. These take plain, JSON-serializable
+arguments so that a plan may be saved and applied later, and load the git
+repository at the module's path themselves rather than relying on refreshed
+resources.
+
+Each operation has a check, which verifies that its effects are in place
+before an interrupted apply is resumed.
+"""
+
+
+@operation("git.init")
+def git_init(path: str) -> None:
+    GitRepo.init(path)
+
+
+@check("git.init")
+def git_init_done(path: str) -> bool:
+    try:
+        find_git_root(path)
+    except GitError:
+        return False
+    return True
+
+
+@operation("git.add")
+def git_add(path: str, what: str) -> None:
+    GitRepo.load(path).add(what)
+
+
+@check("git.add")
+def git_add_done(path: str, what: str) -> bool:
+    return not GitRepo.load(path).untracked_or_unstaged()
+
+
+@operation("git.commit")
+def git_commit(path: str, message: Optional[str] = None) -> None:
+    GitRepo.load(path).commit(message)
+
+
+@check("git.commit")
+def git_commit_done(path: str, message: Optional[str] = None) -> bool:
+    git = GitRepo.load(path)
+    return git.head() is not None and not git.dirty()
+
+
+@operation("git.remote_add")
+def git_remote_add(path: str, name: str, url: str) -> None:
+    GitRepo.load(path).add_remote(name, url)
+
+
+@check("git.remote_add")
+def git_remote_add_done(path: str, name: str, url: str) -> bool:
+    remote = GitRepo.load(path).remotes.get(name, None)
+    return remote is not None and remote.fetch_url == url
+
+
+@operation("git.tag")
+def git_tag(path: str, name: str, force: bool = False) -> None:
+    GitRepo.load(path).tag(name, force=force)
+
+
+@check("git.tag")
+def git_tag_done(path: str, name: str, force: bool = False) -> bool:
+    git = GitRepo.load(path)
+    return git.resolve(name) == git.head()
+
+
+@operation("git.push")
+def git_push(
+    path: str,
+    remote: str,
+    branch: Optional[str] = None,
+    tags: bool = False,
+    force: bool = False,
+) -> None:
+    GitRepo.load(path).push(remote, branch, tags=tags, force=force)
+
+
+@check("git.push")
+def git_push_done(
+    path: str,
+    remote: str,
+    branch: Optional[str] = None,
+    tags: bool = False,
+    force: bool = False,
+) -> bool:
+    git = GitRepo.load(path)
+
+    if branch:
+        ref = f"refs/heads/{branch}"
+        if git.remote_refs(remote, ref).get(ref, None) != git.resolve(branch):
+            return False
+
+    if tags:
+        # The tags which matter to a publish are the ones at HEAD
+        remote_tags = git.remote_refs(remote, "refs/tags/*")
+        head = git.head()
+        for tag in git.tags_at_head():
+            if remote_tags.get(f"refs/tags/{tag}", None) != head:
+                return False
+
+    return True
+
+
+@operation("gh.repo_create")
+def repo_create(path: str, name: str, public: bool = True) -> None:
+    gh_repo_create(name, public=public, path=path)
+
+
+@check("gh.repo_create")
+def repo_create_done(path: str, name: str, public: bool = True) -> bool:
+    gh_repo_view(["name"], name, path)
+    return True
+
+
+@operation("gh.repo_description")
+def repo_description(path: str, description: str) -> None:
+    gh_repo_description(description, path)
+
+
+@check("gh.repo_description")
+def repo_description_done(path: str, description: str) -> bool:
+    return gh_repo_view(["description"], path=path)["description"] == description
@@ -0,0 +1,68 @@
+from dataclasses import asdict, dataclass
+import json
+from typing import Any, Dict, Optional, Self, Type
+
+from tfmod.constants import tfmod_version
+from tfmod.error import PlanError
+from tfmod.plan import Action, Plan
+from tfmod.publish.fingerprint import Fingerprint
+from tfmod.spec import Spec
+
+FORMAT_VERSION = 1
+
+
+@dataclass
+class SavedPlan:
+    """
+    A publish plan saved to disk, along with everything needed to apply it
+    without refreshing resources.
+    """
+
+    path: str
+    spec: Spec
+    remote: Optional[str]
+    fingerprint: Fingerprint
+    actions: Plan
+
+    def dump(self: Self) -> Dict[str, Any]:
+        return dict(
+            format_version=FORMAT_VERSION,
+            tfmod_version=tfmod_version(),
+            path=self.path,
+            spec=asdict(self.spec),
+            remote=self.remote,
+            fingerprint=self.fingerprint.dump(),
+            actions=[action.dump() for action in self.actions],
+        )
+
+    @classmethod
+    def load_json(cls: Type[Self], data: Dict[str, Any]) -> Self:
+        if data.get("format_version", None) != FORMAT_VERSION:
+            raise PlanError(
+                f"Unsupported plan format version: {data.get('format_version')}"
+            )
+
+        return cls(
+            path=data["path"],
+            spec=Spec(**data["spec"]),
+            remote=data["remote"],
+            fingerprint=Fingerprint.load(data["fingerprint"]),
+            actions=[Action.load(action) for action in data["actions"]],
+        )
+
+    def save(self: Self, path: str) -> None:
+        with open(path, "w") as f:
+            json.dump(self.dump(), f, indent=2)
+            f.write("\n")
+
+    @classmethod
+    def load(cls: Type[Self], path: str) -> Self:
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            raise PlanError(f"Saved plan {path} not found")
+        except json.JSONDecodeError as exc:
+            raise PlanError(f"Saved plan {path} is not valid JSON: {exc}")
+
+        return cls.load_json(data)
@@ -3,8 +3,7 @@ from typing import Optional, Self
 
 from tfmod.error import GitRepoNotFoundError
 from tfmod.git import GitRepo
-from tfmod.io import logger
-from tfmod.plan import must, Resource
+from tfmod.plan import Resource
 from tfmod.publish.resource.module import ModuleResource
 
 
@@ -12,10 +11,10 @@ class GitResource(Resource[GitRepo]):
     name = "git"
 
     def get(self: Self) -> Optional[GitRepo]:
-        must(ModuleResource)
+        self.context.must(ModuleResource)
         try:
-            repo = GitRepo.load()
+            repo = GitRepo.load(self.context.path)
             return repo
         except GitRepoNotFoundError:
-            logger.debug(traceback.format_exc())
+            self.logger.debug(traceback.format_exc())
             return None
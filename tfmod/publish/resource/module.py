@@ -1,10 +1,7 @@
-import os
-import os.path
 from pathlib import Path
 from typing import Optional, Self
 
-from tfmod.io import logger
-from tfmod.plan import must, Resource
+from tfmod.plan import Resource
 from tfmod.publish.resource.spec import SpecResource
 from tfmod.validate import validate_license, validate_readme
 
@@ -13,7 +10,7 @@ class ModuleResource(Resource[str]):
     name = "module"
 
     def get(self: Self) -> Optional[str]:
-        return os.getcwd()
+        return self.context.path
 
     def validate(self: Self, resource: str) -> None:
         self._validate_directory_name(resource)
@@ -21,12 +18,12 @@ class ModuleResource(Resource[str]):
         validate_license(resource)
 
     def _validate_directory_name(self: Self, resource: str) -> None:
-        spec = must(SpecResource)
+        spec = self.context.must(SpecResource)
         expected = spec.repo_name()
         actual = Path(resource).name
 
         if expected != actual:
-            logger.warn(
+            self.logger.warn(
                 title=f'Directory name "{actual}" does not match module.tfvars',
                 message=f""""The project should to be named \"{expected}\", in order
                 to match the conventions of the Terraform registry.""",
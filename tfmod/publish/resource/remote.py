@@ -2,8 +2,7 @@ from typing import Any, cast, Dict, Optional, Self, Tuple
 
 from giturlparse import GitUrlParsed
 
-from tfmod.io import logger
-from tfmod.plan import may, must, Resource
+from tfmod.plan import Resource
 from tfmod.publish.resource.git import GitResource
 from tfmod.publish.resource.spec import SpecResource
 
@@ -14,7 +13,7 @@ class RemoteResource(Resource[Remote]):
     name = "remote"
 
     def get(self: Self) -> Optional[Remote]:
-        git = may(GitResource)
+        git = self.context.may(GitResource)
 
         if not git:
             return
@@ -46,26 +45,26 @@ class RemoteResource(Resource[Remote]):
 
     def _validate_namespace(self: Self, resource: Remote) -> None:
         _, remote = resource
-        spec = must(SpecResource)
+        spec = self.context.must(SpecResource)
 
         expected = cast(str, spec.namespace)
         actual = cast(Any, remote).owner
 
         if expected != actual:
-            logger.warn(
+            self.logger.warn(
                 title=f'GitHub namespace "{actual}" does not match ' "module.tfvars",
                 message=f'The expected namespace is "{expected}".',
             )
 
     def _validate_name(self: Self, resource: Remote) -> None:
         _, remote = resource
-        spec = must(SpecResource)
+        spec = self.context.must(SpecResource)
 
         expected = spec.repo_name()
         actual = remote.name
 
         if expected != actual:
-            logger.warn(
+            self.logger.warn(
                 title=f'Repository name "{actual}" does not match module.tfvars',
                 message=f""""The project should to be named \"{expected}\", in
                 order to match the conventions of the Terraform registry.""",
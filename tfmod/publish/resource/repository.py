@@ -1,23 +1,58 @@
-from typing import cast, Optional, Self
+from dataclasses import asdict, dataclass
+from typing import Any, cast, Optional, Self
 
 from github.GithubException import UnknownObjectException
-from github.Repository import Repository
 
 from tfmod.gh import gh_client
-from tfmod.io import logger
-from tfmod.plan import must, Resource
+from tfmod.plan import Resource
 from tfmod.publish.resource.spec import SpecResource
 
 
+@dataclass
+class Repository:
+    """
+    The fields of a GitHub repository which TfMod uses. Only these are
+    persisted, so loading a snapshot doesn't need a GitHub client.
+    """
+
+    full_name: str
+    description: Optional[str]
+    default_branch: Optional[str]
+
+
 class RepositoryResource(Resource[Repository]):
     name = "repository"
+    persist = True
 
     def get(self: Self) -> Optional[Repository]:
-        spec = must(SpecResource)
-        client = gh_client()
-
-        try:
-            return client.get_user(cast(str, spec.namespace)).get_repo(spec.repo_name())
-        except UnknownObjectException as exc:
-            logger.debug(str(exc))
-            return None
+        spec = self.context.must(SpecResource)
+
+        with gh_client("GitHub repository refresh") as client:
+            try:
+                repo = client.get_user(cast(str, spec.namespace)).get_repo(
+                    spec.repo_name()
+                )
+            except UnknownObjectException as exc:
+                self.logger.debug(str(exc))
+                return None
+
+            return Repository(
+                full_name=repo.full_name,
+                description=repo.description,
+                default_branch=repo.default_branch,
+            )
+
+    def key(self: Self) -> Optional[str]:
+        spec = self.context.must(SpecResource)
+        return f"{spec.namespace}/{spec.repo_name()}"
+
+    def dump(self: Self, resource: Repository) -> Any:
+        return asdict(resource)
+
+    def load(self: Self, data: Any) -> Repository:
+        # Older snapshots hold the repository's full raw data
+        return Repository(
+            full_name=data["full_name"],
+            description=data.get("description", None),
+            default_branch=data.get("default_branch", None),
+        )
@@ -1,7 +1,9 @@
-from typing import Optional, Self
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Optional, Self
 
-from tfmod.io import logger
 from tfmod.plan import Resource
+from tfmod.publish.fingerprint import spec_hash
 from tfmod.spec import Spec
 from tfmod.terraform import Terraform
 
@@ -52,23 +54,43 @@ OFFICIAL_PROVIDERS = {
 
 class SpecResource(Resource[Spec]):
     name = "spec"
+    persist = True
 
     def get(self: Self) -> Optional[Spec]:
         # We validate with Terraform before trying to load. This is because
         # we want to see Terraform errors prior to choking on the load.
         self._pre_validate()
-        return Spec.load()
+        return Spec.load(Path(self.context.path))
 
     def _pre_validate(self: Self) -> None:
-        cmd = Terraform("spec").isolated_state().spec().auto_approve()
+        cmd = (
+            Terraform("spec")
+            .cwd(self.context.path)
+            .isolated_state()
+            .spec()
+            .auto_approve()
+        )
         cmd.run()
 
+    def key(self: Self) -> Optional[str]:
+        # Only reuse a snapshot of the same module.tfvars
+        try:
+            return spec_hash(Path(self.context.path))
+        except FileNotFoundError:
+            return None
+
+    def dump(self: Self, resource: Spec) -> Any:
+        return asdict(resource)
+
+    def load(self: Self, data: Any) -> Spec:
+        return Spec(**data)
+
     def validate(self, resource: Spec) -> None:
         # This SHOULD get handled during Terraform validation.
         assert resource.provider
 
         if resource.provider not in OFFICIAL_PROVIDERS and not resource.private:
-            logger.warn(
+            self.logger.warn(
                 title=f"{resource.provider} is not an official provider",
                 message="""
 If the Terraform Registry does not recognize the provider, it may not allow you
@@ -1,6 +1,6 @@
 from typing import cast, Optional, Self
 
-from tfmod.plan import must, Resource
+from tfmod.plan import Resource
 from tfmod.publish.resource.spec import SpecResource
 from tfmod.version import Version
 
@@ -9,6 +9,6 @@ class VersionResource(Resource[Version]):
     name = "version"
 
     def get(self: Self) -> Optional[Version]:
-        spec = must(SpecResource)
+        spec = self.context.must(SpecResource)
 
         return Version.parse(cast(str, spec.version))
@@ -0,0 +1,330 @@
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import random
+import threading
+import time
+from typing import Any, cast, Dict, List, Optional, Self, Set, Type
+
+import requests
+from tf_registry import raise_for_status, RegistryError
+
+from tfmod.constants import STATE_DIR
+from tfmod.error import RegistryWaitTimeoutError
+from tfmod.io import logger
+from tfmod.spec import Spec
+from tfmod.timeout import remaining
+from tfmod.version import Version
+
+REGISTRY_URL = "https://registry.terraform.io"
+
+# The registry caps page sizes at 100
+PAGE_LIMIT = 100
+
+# How long a namespace listing is trusted, in seconds
+INDEX_TTL = 300.0
+
+# Backoff parameters for polling, in seconds
+INITIAL_DELAY = 2.0
+MAX_DELAY = 60.0
+
+
+@dataclass(frozen=True)
+class ModuleAddress:
+    """
+    The address of a module in the Terraform Registry.
+    """
+
+    namespace: str
+    name: str
+    provider: str
+
+    @classmethod
+    def from_spec(cls: Type[Self], spec: Spec) -> Self:
+        return cls(
+            namespace=cast(str, spec.namespace),
+            name=cast(str, spec.name),
+            provider=cast(str, spec.provider),
+        )
+
+    def __str__(self: Self) -> str:
+        return f"{self.namespace}/{self.name}/{self.provider}"
+
+    @property
+    def key(self: Self) -> str:
+        """
+        The address within its namespace, as stored in the index cache.
+        """
+        return f"{self.name}/{self.provider}"
+
+
+class Registry:
+    """
+    A minimal Terraform Registry API client. Unlike tf_registry's client, it
+    reuses a single HTTP session across requests, which matters when polling.
+    """
+
+    def __init__(self: Self, base_url: str = REGISTRY_URL) -> None:
+        self.base_url = f"{base_url}/v1/modules"
+        self.session = requests.Session()
+
+    def _get(self: Self, url: str, params: Optional[Dict[str, str]] = None) -> Any:
+        """
+        Make a request. Network failures and unparseable responses are raised
+        as RegistryErrors, like the registry's own errors, so that callers
+        only have one error to handle.
+        """
+        try:
+            res = self.session.get(url, params=params, timeout=remaining(url))
+        except requests.RequestException as exc:
+            raise RegistryError(0, [f"Request to {url} failed: {exc}"]) from exc
+
+        raise_for_status(res)
+
+        try:
+            return res.json()
+        except ValueError as exc:
+            raise RegistryError(
+                res.status_code, [f"Invalid response from {url}: {exc}"]
+            ) from exc
+
+    def versions(self: Self, module: ModuleAddress) -> Set[str]:
+        """
+        Get every version of a module known to the registry.
+        """
+        data = self._get(f"{self.base_url}/{module}/versions")
+
+        return {
+            version["version"] for mod in data["modules"] for version in mod["versions"]
+        }
+
+    def namespace(self: Self, namespace: str) -> Dict[ModuleAddress, str]:
+        """
+        Get the latest version of every module in a namespace, following the
+        listing's pagination.
+        """
+        latest: Dict[ModuleAddress, str] = dict()
+        offset: Optional[int] = 0
+
+        while offset is not None:
+            data = self._get(
+                f"{self.base_url}/{namespace}",
+                dict(limit=str(PAGE_LIMIT), offset=str(offset)),
+            )
+            for mod in data["modules"]:
+                address = ModuleAddress(
+                    namespace=mod["namespace"],
+                    name=mod["name"],
+                    provider=mod["provider"],
+                )
+                latest[address] = mod["version"]
+            offset = (data.get("meta") or dict()).get("next_offset", None)
+
+        return latest
+
+
+Listing = Dict[ModuleAddress, str]
+
+
+class RegistryIndex:
+    """
+    An index of the latest published version of every module in a namespace.
+    Namespaces are fetched in bulk from the registry's paginated listing and
+    cached, both in memory and under the state directory, so that many modules
+    may be checked with a handful of requests.
+    """
+
+    def __init__(
+        self: Self,
+        registry: Optional[Registry] = None,
+        path: Path = STATE_DIR / "registry",
+        ttl: float = INDEX_TTL,
+    ) -> None:
+        self.registry = registry or Registry()
+        self.path = path
+        self.ttl = ttl
+        self._namespaces: Dict[str, Listing] = dict()
+        # Failed fetches are remembered, so that modules in a namespace don't
+        # each wait on a registry which is down
+        self._failures: Dict[str, RegistryError] = dict()
+        self._lock = threading.Lock()
+
+    def _cache_path(self: Self, namespace: str) -> Path:
+        return self.path / f"{namespace}.json"
+
+    def _read_cache(self: Self, namespace: str) -> Optional[Listing]:
+        try:
+            with open(self._cache_path(namespace), "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as exc:
+            logger.debug(f"Registry index cache miss for {namespace}: {exc}")
+            return None
+
+        if time.time() - data["fetched_at"] > self.ttl:
+            logger.debug(f"Registry index cache for {namespace} is stale")
+            return None
+
+        listing: Listing = dict()
+        for key, version in data["modules"].items():
+            name, provider = key.split("/")
+            listing[ModuleAddress(namespace, name, provider)] = version
+        return listing
+
+    def _write_cache(self: Self, namespace: str, listing: Listing) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        path = self._cache_path(namespace)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(
+                dict(
+                    fetched_at=time.time(),
+                    modules={
+                        address.key: version for address, version in listing.items()
+                    },
+                ),
+                f,
+            )
+        os.replace(tmp, path)
+
+    def cached(self: Self, namespace: str) -> Optional[Listing]:
+        """
+        Get a namespace's listing if it's already known, without making any
+        requests.
+        """
+        with self._lock:
+            if namespace not in self._namespaces:
+                listing = self._read_cache(namespace)
+                if listing is None:
+                    return None
+                self._namespaces[namespace] = listing
+            return self._namespaces[namespace]
+
+    def load(self: Self, namespace: str, refresh: bool = False) -> Listing:
+        """
+        Get a namespace's listing, fetching it from the registry if it isn't
+        cached (or if refresh is set).
+        """
+        if not refresh:
+            listing = self.cached(namespace)
+            if listing is not None:
+                return listing
+
+        with self._lock:
+            failure = self._failures.get(namespace, None)
+        if failure:
+            raise failure
+
+        logger.info(f"Fetching Terraform Registry listing for {namespace}...")
+        try:
+            listing = self.registry.namespace(namespace)
+        except RegistryError as exc:
+            with self._lock:
+                self._failures[namespace] = exc
+            raise
+
+        with self._lock:
+            self._namespaces[namespace] = listing
+            self._write_cache(namespace, listing)
+
+        return listing
+
+    def latest_version(self: Self, address: ModuleAddress) -> Optional[str]:
+        """
+        The latest version of a module on the registry, if it's published.
+        """
+        return self.load(address.namespace).get(address, None)
+
+    def is_unpublished(self: Self, address: ModuleAddress) -> bool:
+        """
+        Whether or not a module is missing from the registry.
+        """
+        return self.latest_version(address) is None
+
+
+def is_newer(version: str, than: str) -> bool:
+    try:
+        a = Version.parse(version)
+        b = Version.parse(than)
+    except ValueError:
+        return False
+    return (a.major, a.minor, a.patch) > (b.major, b.minor, b.patch)
+
+
+def _poll(registry: Registry, pending: Dict[ModuleAddress, str]) -> List[ModuleAddress]:
+    """
+    Check which pending modules have been ingested. Namespaces with more than
+    one pending module are checked with a single listing request.
+    """
+    namespaces: Dict[str, List[ModuleAddress]] = dict()
+    for address in pending:
+        namespaces.setdefault(address.namespace, list()).append(address)
+
+    ingested: List[ModuleAddress] = list()
+    individually: List[ModuleAddress] = list()
+
+    for namespace, addresses in namespaces.items():
+        if len(addresses) == 1:
+            individually += addresses
+            continue
+
+        try:
+            latest = registry.namespace(namespace)
+        except RegistryError as exc:
+            logger.debug(f"Terraform Registry API error: {exc}")
+            continue
+
+        for address in addresses:
+            version = latest.get(address, None)
+            if version == pending[address]:
+                ingested.append(address)
+            elif version is not None and is_newer(version, pending[address]):
+                # The listing only shows the latest version, so we need to
+                # ask about this one directly
+                individually.append(address)
+
+    for address in individually:
+        try:
+            if pending[address] in registry.versions(address):
+                ingested.append(address)
+        except RegistryError as exc:
+            # A 404 means the registry hasn't seen the module yet
+            logger.debug(f"Terraform Registry API error: {exc}")
+
+    return ingested
+
+
+def wait_for_versions(
+    targets: Dict[ModuleAddress, str],
+    timeout: float,
+    registry: Optional[Registry] = None,
+) -> None:
+    """
+    Poll the Terraform Registry until every module lists its target version,
+    backing off exponentially (with full jitter) between attempts. Raises a
+    RegistryWaitTimeoutError if the timeout is reached first.
+    """
+    registry = registry or Registry()
+    pending = dict(targets)
+    deadline = time.monotonic() + timeout
+    delay = INITIAL_DELAY
+
+    while True:
+        for address in _poll(registry, pending):
+            logger.ok(f"{address} {pending.pop(address)} is available on the registry")
+
+        if not pending:
+            return
+
+        left = deadline - time.monotonic()
+        if left <= 0:
+            waiting = ", ".join(f"{a} {v}" for a, v in pending.items())
+            raise RegistryWaitTimeoutError(
+                f"Timed out waiting for the Terraform Registry to ingest {waiting}"
+            )
+
+        logger.info(f"Waiting on the Terraform Registry for {len(pending)} module(s)")
+        # Don't sleep past the overall time limit, if any
+        budget = remaining("waiting on the Terraform Registry")
+        time.sleep(min(left, random.uniform(0, delay), budget or left))
+        delay = min(delay * 2, MAX_DELAY)
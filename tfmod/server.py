@@ -0,0 +1,196 @@
+import importlib
+import json
+import os
+from pathlib import Path
+import shlex
+import signal
+import socket
+import sys
+from types import FrameType
+from typing import Any, Dict, List, NoReturn, Optional, Tuple
+
+from tfmod import trace
+from tfmod.client import HEADER, socket_path
+from tfmod.error import ServeError
+from tfmod.io import configure_logger, logger
+
+"""
+A daemon which keeps TfMod warm. "tfmod serve" imports everything up front,
+then listens on a Unix socket for requests from tfmod.client.
+
+Each request is handled in a forked child. The child takes over the client's
+standard streams (passed over the socket), working directory and environment,
+runs the command line interface as usual and reports the exit status. Forking
+keeps requests isolated from each other, while sharing everything which was
+imported before the fork.
+
+Only imports (and python-hcl2's parser) are kept warm. Anything a request
+builds - GitHub clients, registry listings, parsed specs - is thrown away with
+its child. Those already have caches on disk, under STATE_DIR, which every
+request shares.
+"""
+
+# Modules imported before the first request, so that requests don't have to
+PRELOAD = [
+    "github",
+    "giturlparse",
+    "hcl2",
+    "requests",
+    "tf_registry",
+    "yaml",
+    "tfmod.publish",
+    "tfmod.publish.batch",
+    "tfmod.status",
+]
+
+Request = Tuple[List[str], str, Dict[str, str]]
+
+
+def preload() -> None:
+    for name in PRELOAD:
+        importlib.import_module(name)
+
+    # python-hcl2 finishes setting up its parser on first use
+    importlib.import_module("hcl2").loads("")
+
+
+def _stop(_signum: int, _frame: Optional[FrameType]) -> None:
+    sys.exit(0)
+
+
+def _in_use(path: str) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+        return True
+
+
+def _receive(conn: socket.socket) -> Tuple[Request, List[int]]:
+    header, fds, _, _ = socket.recv_fds(conn, HEADER.size, 3)
+
+    with conn.makefile("rb") as f:
+        header += f.read(HEADER.size - len(header))
+        (length,) = HEADER.unpack(header)
+        data = json.loads(f.read(length).decode("utf-8"))
+
+    return (data["argv"], data["cwd"], data["env"]), fds
+
+
+def _send(conn: socket.socket, message: Dict[str, Any]) -> None:
+    conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+def _run(argv: List[str]) -> int:
+    """
+    Run the command line interface, as though it was invoked with argv.
+    """
+    from tfmod.command import main
+    from tfmod.command.base import reset_flags
+
+    sys.argv = ["tfmod"] + argv
+    reset_flags()
+
+    try:
+        main()
+    except SystemExit as exc:
+        return _exit_code(exc)
+    return 0
+
+
+def _handle(conn: socket.socket) -> NoReturn:
+    """
+    Handle a request in a forked child.
+    """
+    code = 1
+    try:
+        (argv, cwd, env), fds = _receive(conn)
+        logger.info(f"[{os.getpid()}] tfmod {shlex.join(argv)} (in {cwd})")
+
+        # Detach from the daemon's terminal, and undo its signal handling.
+        # The client relays its signals to this process instead.
+        os.setsid()
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        # Take over the client's standard streams
+        for target, fd in zip([0, 1, 2], fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        for stream in [sys.stdout, sys.stderr]:
+            stream.reconfigure(line_buffering=True)  # type: ignore
+
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+        configure_logger()
+        trace.configure_tracer()
+        trace.CURRENT_SPAN.set(None)
+
+        _send(conn, dict(pid=os.getpid()))
+        code = _run(argv)
+    finally:
+        try:
+            trace.tracer.write()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            _send(conn, dict(exit=code))
+        finally:
+            os._exit(code)
+
+
+def serve(path: Optional[str] = None) -> None:
+    """
+    Listen for requests until interrupted.
+    """
+    path = path or socket_path()
+
+    if _in_use(path):
+        raise ServeError(f"Another TfMod daemon is listening on {path}")
+
+    logger.info("Preloading modules...")
+    preload()
+
+    os.makedirs(Path(path).parent, exist_ok=True)
+    if os.path.exists(path):
+        logger.debug(f"Removing stale socket {path}")
+        os.unlink(path)
+
+    # Children are reaped automatically
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _stop)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server = os.getpid()
+    try:
+        sock.bind(path)
+        os.chmod(path, 0o600)
+        sock.listen()
+        logger.ok(f"TfMod is listening on {path}")
+
+        while True:
+            conn, _ = sock.accept()
+            sys.stdout.flush()
+            sys.stderr.flush()
+
+            if os.fork() == 0:
+                sock.close()
+                _handle(conn)
+
+            conn.close()
+    finally:
+        if os.getpid() == server:
+            sock.close()
+            if os.path.exists(path):
+                os.unlink(path)
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import time
+from typing import Any, Dict, Optional, Self
+
+from tfmod.constants import STATE_DIR
+from tfmod.io import logger
+
+"""
+A persistent snapshot of refreshed resources. Each entry records when the
+resource was refreshed, so that later plans may serve it from disk instead of
+querying git, GitHub or the registry again.
+"""
+
+
+@dataclass
+class Entry:
+    refreshed_at: float
+    key: Optional[str]
+    value: Any
+
+
+@dataclass
+class Refresh:
+    """
+    How resources are refreshed. With refresh disabled, resources are served
+    from the snapshot whenever they're in it. Otherwise, a positive ttl serves
+    entries refreshed within that many seconds.
+    """
+
+    enabled: bool = True
+    ttl: float = 0.0
+
+    def accepts(self: Self, entry: Entry) -> bool:
+        if not self.enabled:
+            return True
+        return time.time() - entry.refreshed_at < self.ttl
+
+
+def module_state_dir(path: Optional[str] = None) -> Path:
+    """
+    Where state for the module at path is kept, alongside its isolated
+    Terraform state.
+    """
+    return STATE_DIR / "state" / (path or os.getcwd())[1:]
+
+
+def snapshot_path(path: Optional[str] = None) -> Path:
+    return module_state_dir(path) / "snapshot.json"
+
+
+class Snapshot:
+    """
+    A module's snapshot, loaded lazily and written after every refresh.
+    """
+
+    def __init__(self: Self, path: Path) -> None:
+        self.path = path
+        self._entries: Optional[Dict[str, Entry]] = None
+
+    @property
+    def entries(self: Self) -> Dict[str, Entry]:
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _read(self: Self) -> Dict[str, Entry]:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as exc:
+            logger.debug(f"No usable snapshot at {self.path}: {exc}")
+            return dict()
+
+        return {name: Entry(**entry) for name, entry in data["resources"].items()}
+
+    def _write(self: Self) -> None:
+        os.makedirs(self.path.parent, exist_ok=True)
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(
+                dict(
+                    resources={
+                        name: dict(
+                            refreshed_at=entry.refreshed_at,
+                            key=entry.key,
+                            value=entry.value,
+                        )
+                        for name, entry in self.entries.items()
+                    }
+                ),
+                f,
+            )
+        os.replace(tmp, self.path)
+
+    def get(self: Self, name: str, key: Optional[str]) -> Optional[Entry]:
+        """
+        Get an entry, if one was recorded with the same key.
+        """
+        entry = self.entries.get(name, None)
+        if entry is None or entry.key != key:
+            return None
+        return entry
+
+    def record(self: Self, name: str, key: Optional[str], value: Any) -> None:
+        self.entries[name] = Entry(refreshed_at=time.time(), key=key, value=value)
+        self._write()
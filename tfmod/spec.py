@@ -4,14 +4,10 @@ import os
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Self, Type
 
-import hcl2
-
+from tfmod import tfvars
 from tfmod.error import SpecValueError
 from tfmod.io import logger
 
-# Make the type checker happy
-hcl: Any = hcl2
-
 Script = List[str]
 
 
@@ -57,9 +53,7 @@ class Spec:
     scripts: Dict[str, Script]
 
     @classmethod
-    def load_optional(
-        cls: Type[Self], path: Path = Path(os.getcwd())
-    ) -> Optional[Self]:
+    def load_optional(cls: Type[Self], path: Optional[Path] = None) -> Optional[Self]:
         try:
             return cls.load(path)
         except FileNotFoundError as exc:
@@ -67,9 +61,9 @@ class Spec:
             return None
 
     @classmethod
-    def load(cls: Type[Self], path: Path = Path(os.getcwd())) -> Self:
-        with open(path / "module.tfvars", "r") as f:
-            var = hcl.load(f).get("module", None)
+    def load(cls: Type[Self], path: Optional[Path] = None) -> Self:
+        path = path or Path(os.getcwd())
+        var = tfvars.load(path / "module.tfvars").get("module", None)
 
         if not var:
             warn_type("module", "object")
@@ -113,6 +107,33 @@ class Spec:
             scripts=scripts,
         )
 
+    def dump(self) -> str:
+        """
+        Encode the spec as the contents of a module.tfvars file.
+        """
+        return tfvars.encode_tfvars(
+            dict(
+                module=dict(
+                    name=self.name,
+                    namespace=self.namespace,
+                    provider=self.provider,
+                    version=self.version,
+                    description=self.description,
+                    private=self.private,
+                    scripts=self.scripts,
+                )
+            )
+        )
+
+    def write(self, path: Optional[Path] = None) -> Path:
+        """
+        Write the spec to module.tfvars, returning the file's path.
+        """
+        path = (path or Path(os.getcwd())) / "module.tfvars"
+        with open(path, "w") as f:
+            f.write(self.dump())
+        return path
+
     def repo_name(self) -> str:
         if not self.provider:
             raise SpecValueError("Module provider not specified")
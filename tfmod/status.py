@@ -0,0 +1,71 @@
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from tf_registry import RegistryError
+
+from tfmod.io import logger
+from tfmod.registry import is_newer, ModuleAddress, RegistryIndex
+from tfmod.spec import Spec
+
+Row = Tuple[str, str, str]
+
+
+def _row(index: RegistryIndex, path: Path, spec: Spec) -> Row:
+    if not spec.namespace or not spec.name or not spec.provider:
+        return str(path), spec.version or "-", "incomplete module.tfvars"
+
+    address = ModuleAddress.from_spec(spec)
+    local = spec.version or "-"
+
+    if spec.private:
+        return str(address), local, "private"
+
+    try:
+        latest = index.latest_version(address)
+    except RegistryError as exc:
+        return str(address), local, f"error: {exc}"
+
+    if latest is None:
+        return str(address), local, "unpublished"
+    if latest == local:
+        return str(address), local, latest
+    if is_newer(local, latest):
+        return str(address), local, f"{latest} (unpublished)"
+    if is_newer(latest, local):
+        return str(address), local, f"{latest} (behind)"
+    return str(address), local, f"{latest} (differs)"
+
+
+def status(paths: List[str], refresh: bool = False) -> None:
+    """
+    Show the local and published versions of the modules at the given paths.
+    The registry is queried once per namespace, rather than once per module.
+    """
+    index = RegistryIndex()
+    specs: List[Tuple[Path, Spec]] = list()
+
+    for p in paths:
+        path = Path(p).absolute()
+        spec: Optional[Spec] = Spec.load_optional(path)
+        if spec is None:
+            logger.warn(f"No module.tfvars found in {path}")
+            continue
+        specs.append((path, spec))
+
+    if refresh:
+        namespaces = {spec.namespace for _, spec in specs if spec.namespace}
+        for namespace in namespaces:
+            try:
+                index.load(namespace, refresh=True)
+            except RegistryError as exc:
+                # Shown in the rows for the namespace's modules
+                logger.debug(f"Failed to refresh {namespace}: {exc}")
+
+    rows: List[Row] = [("MODULE", "LOCAL", "REGISTRY")] + [
+        _row(index, path, spec) for path, spec in specs
+    ]
+
+    widths = [max(len(row[i]) for row in rows) for i in range(2)]
+
+    for module, local, registry in rows:
+        print(f"{module.ljust(widths[0])}  {local.ljust(widths[1])}  {registry}")
@@ -1,4 +1,5 @@
 from contextlib import contextmanager
+import fcntl
 import os
 import os.path
 from pathlib import Path
@@ -10,14 +11,17 @@ from tfmod.constants import (
     CONFIG_TFVARS,
     MODULE_TFVARS,
     MODULES_DIR,
+    PLUGIN_CACHE_DIR,
     STATE_DIR,
-    TERRAFORM_BIN,
+    terraform_bin,
 )
 from tfmod.error import TerraformError
 from tfmod.io import logger
+from tfmod.process import run_relayed
 from tfmod.spec import Spec
 from tfmod.terraform.value import dump_value, Value
-from tfmod.terraform.variables import load_variables, prompt_var, Variable
+from tfmod.terraform.variables import load_variables, prompt_vars, Variable
+from tfmod.trace import span
 
 PathLike = Path | str
 
@@ -53,10 +57,27 @@ def clear_file(path: Path) -> None:
     logger.info(f"{path} cleared.")
 
 
+@contextmanager
+def module_lock(name: str) -> Generator[None, None, None]:
+    """
+    Hold an exclusive lock on one of TfMod's Terraform modules. This is a
+    file lock, so it applies across threads and processes alike.
+    """
+    path = STATE_DIR / "locks"
+    makedirs(path)
+    with open(path / f"{name}.lock", "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
 class Terraform:
     def __init__(self, name: str, command: str = "apply") -> None:
         self._name: str = name
         self._path: Path = MODULES_DIR / name
+        self._cwd: str = os.getcwd()
         self._state_path: Optional[Path] = None
         self._command: str = command
         self._loaded_spec: bool = False
@@ -67,6 +88,13 @@ class Terraform:
         self._var_files: List[str] = list()
         self._args: List[str] = list()
 
+    def cwd(self, path: PathLike) -> Self:
+        """
+        Run against the module at path, rather than the working directory
+        """
+        self._cwd = str(path)
+        return self
+
     def isolated_state(self, path=STATE_DIR / "state") -> Self:
         self._state_path = path
         return self
@@ -114,7 +142,7 @@ class Terraform:
         The contents of the current spec.tfvars, if any
         """
         if not self._loaded_spec:
-            self.__spec = Spec.load_optional()
+            self.__spec = Spec.load_optional(Path(self._cwd))
             self._loaded_spec = True
         return self.__spec
 
@@ -122,8 +150,9 @@ class Terraform:
         """
         Load the current spec.tfvars
         """
-        if os.path.isfile(MODULE_TFVARS):
-            self.var_file(str(MODULE_TFVARS))
+        module_tfvars = Path(self._cwd) / MODULE_TFVARS
+        if os.path.isfile(module_tfvars):
+            self.var_file(str(module_tfvars))
         return self
 
     def auto_approve(self) -> Self:
@@ -146,7 +175,7 @@ class Terraform:
         state_path: Optional[Path] = None
 
         if self._state_path:
-            state_path = self._state_path / os.getcwd()[1:] / self._name
+            state_path = self._state_path / self._cwd[1:] / self._name
 
         if state_path:
             logger.info(f"Loading state at {state_path}")
@@ -154,34 +183,19 @@ class Terraform:
             for file in files:
                 move(state_path / file, self._path / file)
 
-        yield
-
-        if state_path:
-            logger.info(f"Saving to state at {state_path}")
-            for file in files:
-                move(self._path / file, state_path)
+        try:
+            yield
+        finally:
+            if state_path:
+                logger.info(f"Saving to state at {state_path}")
+                for file in files:
+                    move(self._path / file, state_path)
 
     def _prompt(self) -> None:
-        vars = load_variables(self._path)
-
-        for name, var in self._prompt_vars.items():
-            # Some variable names are postfixed with a _ because the
-            # plain name is reserved in Terraform.
-            name_in_spec = name[:-1] if name.endswith("_") else name
+        values = prompt_vars(load_variables(self._path), self._prompt_vars, self._spec)
 
-            description: Optional[str] = var.description
-            default = var.default
-
-            if name in vars and vars[name].description:
-                description = vars[name].description
-            if getattr(self._spec, name_in_spec, None) is not None:
-                default = getattr(self._spec, name_in_spec)
-            elif name in vars and vars[name].default:
-                default = vars[name].default
-
-            value = prompt_var(name, description=description, default=default)
-            if value is not None:
-                self._vars[name] = dump_value(value)
+        for name, value in values.items():
+            self._vars[name] = dump_value(value)
 
     def build(self) -> Tuple[List[str], Dict[str, str]]:
         """
@@ -207,14 +221,26 @@ class Terraform:
         """
         Run the Terraform command
         """
-        with self._state():
+        # The module directory is shared, and isolated state is moved in and
+        # out of it, so only one command may use it at a time
+        with (
+            span(f"terraform {self._name}", "terraform", command=self._command),
+            module_lock(self._name),
+            self._state(),
+        ):
             _argv, _env = self.build()
             _env = dict(env, **_env)
 
-            argv = [TERRAFORM_BIN] + _argv
+            # Use the providers downloaded by "tfmod update", unless
+            # configured otherwise
+            if "TF_PLUGIN_CACHE_DIR" not in _env:
+                makedirs(PLUGIN_CACHE_DIR)
+                _env["TF_PLUGIN_CACHE_DIR"] = str(PLUGIN_CACHE_DIR)
 
-        try:
-            with logger.quote(f"terraform {self._command}"):
-                subprocess.run(argv, env=env, capture_output=False, check=True)
-        except subprocess.CalledProcessError as exc:
-            raise TerraformError(exc.returncode)
+            argv = [terraform_bin()] + _argv
+
+            try:
+                with logger.quote(f"terraform {self._command}"):
+                    run_relayed(argv, env=_env)
+            except subprocess.CalledProcessError as exc:
+                raise TerraformError(exc.returncode)
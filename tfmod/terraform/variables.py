@@ -1,15 +1,19 @@
+import ast
 from dataclasses import dataclass
+from functools import cache
+import hashlib
+import json
+import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+import re
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
-import hcl2
-
-from tfmod.io import prompt
+from tfmod import hcl
+from tfmod.constants import MODULES_DIR, VARIABLES_JSON
+from tfmod.io import logger, prompt
+from tfmod.spec import Spec
 from tfmod.terraform.value import dump_value, load_value, Value
 
-# Make the type checker happy
-hcl: Any = hcl2
-
 
 @dataclass
 class Variable:
@@ -22,29 +26,128 @@ class Variable:
     default: Optional[Value] = None
 
 
-def load_variables(module: Path) -> Dict[str, Variable]:
+TYPE_NAME_RE = re.compile(r"[a-z]+")
+TYPE_CALL_RE = re.compile(r"([a-z]+)\((.*)\)", re.DOTALL)
+
+
+def terraform_type(expr: str) -> str:
     """
-    Load the variables defined in a module
+    Convert a type constraint, as python-hcl2 returns it, to Terraform's
+    syntax. python-hcl2 wraps expressions in ${...}, and writes the
+    attributes of object types as Python dicts. Raises a ValueError for
+    anything else, such as optional attributes with defaults.
+    """
+    expr = expr.strip()
+    if expr.startswith("${") and expr.endswith("}"):
+        expr = expr[2:-1].strip()
+
+    if TYPE_NAME_RE.fullmatch(expr):
+        return expr
+
+    match = TYPE_CALL_RE.fullmatch(expr)
+    if not match:
+        raise ValueError(f"Unsupported type constraint {expr!r}")
+
+    name, args = match.groups()
+    args = args.strip()
+
+    if args.startswith("{") or args.startswith("["):
+        try:
+            value = ast.literal_eval(args)
+        except (SyntaxError, ValueError) as exc:
+            raise ValueError(f"Unsupported type constraint {expr!r}") from exc
+        if isinstance(value, dict):
+            attrs = ", ".join(f"{k} = {terraform_type(v)}" for k, v in value.items())
+            return f"{name}({{ {attrs} }})" if attrs else f"{name}({{}})"
+        if isinstance(value, list):
+            return f"{name}([{', '.join(terraform_type(v) for v in value)}])"
+        raise ValueError(f"Unsupported type constraint {expr!r}")
+
+    return f"{name}({terraform_type(args)})"
+
+
+def _type(name: str, expr: Any) -> Optional[str]:
+    if expr is None:
+        return None
+    try:
+        return terraform_type(str(expr))
+    except ValueError as exc:
+        # The type is only informational, so it's left out
+        logger.debug(f"Ignoring the type of variable {name}: {exc}")
+        return None
+
+
+def parse_variables(data: Mapping[str, Any]) -> Dict[str, Variable]:
+    """
+    Get the variables from a parsed variables.tf
     """
-    with open(module / "variables.tf", "r") as f:
-        data: Dict[str, Any] = hcl.load(f)
-
     rv: Dict[str, Variable] = dict()
 
-    for var in data["variable"]:
+    for var in data.get("variable", list()):
         items: List[Tuple[str, Any]] = list(var.items())
         assert len(items) == 1
         name, contents = items[0]
 
         rv[name] = Variable(
             description=contents.get("description", None),
-            type=contents.get("type", None),
+            type=_type(name, contents.get("type", None)),
             default=contents.get("default", None),
         )
 
     return rv
 
 
+@cache
+def _manifest() -> Tuple[float, Dict[str, Any]]:
+    """
+    The variables manifest written by "python -m tfmod.build", and when it
+    was written.
+    """
+    try:
+        with open(VARIABLES_JSON, "r") as f:
+            return os.fstat(f.fileno()).st_mtime, json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as exc:
+        logger.debug(f"No usable variables manifest at {VARIABLES_JSON}: {exc}")
+        return 0.0, dict()
+
+
+def _load_manifest_variables(module: Path) -> Optional[Dict[str, Variable]]:
+    if module.parent != MODULES_DIR:
+        return None
+
+    mtime, manifest = _manifest()
+    entry = manifest.get(module.name, None)
+    if not entry:
+        return None
+
+    source = module / "variables.tf"
+    try:
+        # Sources modified after the manifest was written have likely changed.
+        # Checkouts touch files without changing them, so compare hashes
+        # before giving up on the manifest.
+        if os.stat(source).st_mtime > mtime:
+            with open(source, "rb") as f:
+                if hashlib.sha256(f.read()).hexdigest() != entry["sha256"]:
+                    logger.debug(f"{source} has changed since the manifest was built")
+                    return None
+    except FileNotFoundError:
+        return None
+
+    return {name: Variable(**var) for name, var in entry["variables"].items()}
+
+
+def load_variables(module: Path) -> Dict[str, Variable]:
+    """
+    Load the variables defined in a module. Bundled modules are looked up in
+    the variables manifest, unless their sources have changed.
+    """
+    variables = _load_manifest_variables(module)
+    if variables is not None:
+        return variables
+
+    return parse_variables(hcl.load(module / "variables.tf"))
+
+
 def prompt_var(
     name: str, description: Optional[str] = None, default: Optional[Value] = None
 ) -> Optional[Value]:
@@ -64,3 +167,71 @@ def prompt_var(
         return default
 
     return load_value(result)
+
+
+def _resolve(
+    name: str,
+    var: Variable,
+    vars: Mapping[str, Variable],
+    spec: Optional[Spec],
+) -> Tuple[Optional[str], Optional[Value]]:
+    """
+    Get a variable's description and default. Descriptions come from the
+    module's variables, while defaults come from the current spec, then the
+    module's variables, then the given variable.
+    """
+    # Some variable names are postfixed with a _ because the
+    # plain name is reserved in Terraform.
+    name_in_spec = name[:-1] if name.endswith("_") else name
+
+    description: Optional[str] = var.description
+    default = var.default
+
+    if name in vars and vars[name].description:
+        description = vars[name].description
+    if getattr(spec, name_in_spec, None) is not None:
+        default = getattr(spec, name_in_spec)
+    elif name in vars and vars[name].default:
+        default = vars[name].default
+
+    return description, default
+
+
+def prompt_vars(
+    vars: Mapping[str, Variable],
+    prompts: Mapping[str, Variable],
+    spec: Optional[Spec] = None,
+) -> Dict[str, Value]:
+    """
+    Prompt for a module's variables. Variables which are left unset are
+    omitted.
+    """
+    values: Dict[str, Value] = dict()
+
+    for name, var in prompts.items():
+        description, default = _resolve(name, var, vars, spec)
+
+        value = prompt_var(name, description=description, default=default)
+        if value is not None:
+            values[name] = value
+
+    return values
+
+
+def default_vars(
+    vars: Mapping[str, Variable],
+    prompts: Mapping[str, Variable],
+    spec: Optional[Spec] = None,
+) -> Dict[str, Value]:
+    """
+    Get the values prompt_vars would use if every prompt was left blank,
+    without prompting.
+    """
+    values: Dict[str, Value] = dict()
+
+    for name, var in prompts.items():
+        _, default = _resolve(name, var, vars, spec)
+        if default is not None:
+            values[name] = default
+
+    return values
@@ -0,0 +1,409 @@
+from dataclasses import dataclass
+from pathlib import Path
+import re
+from typing import Any, Callable, Dict, List, Mapping, NoReturn, Optional
+
+from tfmod import hcl
+from tfmod.error import TfvarsSyntaxError
+from tfmod.io import logger
+
+"""
+Read and write tfvars files.
+
+Files are read with a small recursive descent parser, which handles the
+subset of HCL that tfvars files like module.tfvars use: attributes whose
+values are strings, numbers, bools, null, lists and objects. Anything else,
+such as templates, expressions or heredocs, is handed to python-hcl2.
+python-hcl2 doesn't unescape strings, so its results are unescaped afterwards
+to match the parser's.
+
+Files are written formatted the same way as Terraform's
+provider::terraform::encode_tfvars (and therefore "terraform fmt"):
+
+- Attributes and object keys are sorted
+- Objects are written across lines with two-space indents, while empty
+  objects are written as {}
+- Lists are written on one line, ie. ["a", "b"]
+- The = signs of consecutive single-line attributes are aligned. An attribute
+  whose value spans lines starts a new run.
+"""
+
+INDENT = "  "
+
+IDENTIFIER_RE = re.compile(r"^[^\W\d][\w-]*$")
+
+NAME_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_-]*")
+NUMBER_RE = re.compile(r"[0-9]+(\.[0-9]+)?")
+
+ESCAPES = {"n": "\n", "r": "\r", "t": "\t", '"': '"', "\\": "\\"}
+
+# Escape sequences, and escaped template sequences ($${ and %%{), as
+# python-hcl2 leaves them
+ESCAPED_RE = re.compile(r'\\([nrt"\\]|u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8})|([$%])\2\{')
+
+
+@dataclass
+class Line:
+    depth: int
+    key: Optional[str]
+    text: str
+
+    @property
+    def aligned(self) -> bool:
+        # Lines which open an object don't take part in alignment
+        return self.key is not None and not self.text.endswith("{")
+
+
+def quote(value: str) -> str:
+    """
+    Write a quoted string literal, escaping template sequences.
+    """
+    out: List[str] = ['"']
+    for i, char in enumerate(value):
+        if char == "\n":
+            out.append("\\n")
+        elif char == "\r":
+            out.append("\\r")
+        elif char == "\t":
+            out.append("\\t")
+        elif char == '"':
+            out.append('\\"')
+        elif char == "\\":
+            out.append("\\\\")
+        elif char in "$%":
+            out.append(char)
+            if value[i + 1 : i + 2] == "{":
+                out.append(char)
+        elif not char.isprintable():
+            code = ord(char)
+            out.append(f"\\u{code:04x}" if code < 0x10000 else f"\\U{code:08x}")
+        else:
+            out.append(char)
+    out.append('"')
+    return "".join(out)
+
+
+def _key(key: str) -> str:
+    return key if IDENTIFIER_RE.match(key) else quote(key)
+
+
+def _inline(value: Any) -> str:
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else repr(value)
+    if isinstance(value, str):
+        return quote(value)
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(_inline(item) for item in value) + "]"
+    if isinstance(value, Mapping) and not value:
+        return "{}"
+    raise TypeError(f"Can not write {type(value).__name__} values to tfvars")
+
+
+def _attribute(key: str, value: Any, depth: int, lines: List[Line]) -> None:
+    if isinstance(value, Mapping) and value:
+        lines.append(Line(depth, _key(key), "{"))
+        for k in sorted(value):
+            _attribute(k, value[k], depth + 1, lines)
+        lines.append(Line(depth, None, "}"))
+    else:
+        lines.append(Line(depth, _key(key), _inline(value)))
+
+
+def _format(lines: List[Line]) -> str:
+    out: List[str] = list()
+    i = 0
+
+    while i < len(lines):
+        if not lines[i].aligned:
+            line = lines[i]
+            if line.key is None:
+                out.append(f"{INDENT * line.depth}{line.text}")
+            else:
+                out.append(f"{INDENT * line.depth}{line.key} = {line.text}")
+            i += 1
+            continue
+
+        # A run of single-line attributes
+        j = i
+        while j < len(lines) and lines[j].aligned:
+            j += 1
+        width = max(len(line.key or "") for line in lines[i:j])
+        for line in lines[i:j]:
+            key = (line.key or "").ljust(width)
+            out.append(f"{INDENT * line.depth}{key} = {line.text}")
+        i = j
+
+    return "".join(f"{line}\n" for line in out)
+
+
+def encode_tfvars(values: Mapping[str, Any]) -> str:
+    """
+    Encode a mapping of variable names to values as the contents of a tfvars
+    file.
+    """
+    lines: List[Line] = list()
+    for key in sorted(values):
+        _attribute(key, values[key], 0, lines)
+    return _format(lines)
+
+
+class Parser:
+    """
+    A recursive descent parser for tfvars files.
+    """
+
+    def __init__(self, text: str, path: Optional[Path] = None) -> None:
+        self.text = text
+        self.path = path
+        self.pos = 0
+
+    def error(self, message: str, pos: Optional[int] = None) -> NoReturn:
+        pos = self.pos if pos is None else pos
+        line = self.text.count("\n", 0, pos) + 1
+        column = pos - (self.text.rfind("\n", 0, pos) + 1) + 1
+        raise TfvarsSyntaxError(f"{self.path or '<tfvars>'}:{line}:{column}: {message}")
+
+    def _peek(self, n: int = 1) -> str:
+        return self.text[self.pos : self.pos + n]
+
+    def _expect(self, token: str) -> None:
+        if self._peek(len(token)) != token:
+            found = self._peek() or "end of file"
+            self.error(f"Expected {token!r}, found {found!r}")
+        self.pos += len(token)
+
+    def _space(self, newlines: bool = False) -> None:
+        """
+        Skip whitespace and comments, and optionally newlines.
+        """
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char in " \t\r" or (newlines and char == "\n"):
+                self.pos += 1
+            elif char == "#" or self._peek(2) == "//":
+                end = self.text.find("\n", self.pos)
+                self.pos = len(self.text) if end == -1 else end
+            elif self._peek(2) == "/*":
+                end = self.text.find("*/", self.pos + 2)
+                if end == -1:
+                    self.error("Unterminated comment")
+                self.pos = end + 2
+            else:
+                return
+
+    def _name(self) -> str:
+        match = NAME_RE.match(self.text, self.pos)
+        if not match:
+            self.error(f"Expected a name, found {self._peek() or 'end of file'!r}")
+        self.pos = match.end()
+        return match.group()
+
+    def _end_of_item(self, closing: str) -> None:
+        """
+        Items are separated by newlines, or by commas within objects and lists.
+        """
+        self._space()
+        if self._peek() == ",":
+            self.pos += 1
+        elif self._peek() == "\n":
+            pass
+        elif self._peek() != closing:
+            self.error(f"Expected a newline, found {self._peek() or 'end of file'!r}")
+
+    def parse(self) -> Dict[str, Any]:
+        values: Dict[str, Any] = dict()
+
+        self._space(newlines=True)
+        while self.pos < len(self.text):
+            start = self.pos
+            name = self._name()
+            if name in values:
+                self.error(f"Duplicate attribute {name!r}", start)
+            self._space()
+            self._expect("=")
+            self._space()
+            values[name] = self.value()
+
+            self._space()
+            if self.pos < len(self.text):
+                if self._peek() != "\n":
+                    self.error(f"Expected a newline, found {self._peek()!r}")
+            self._space(newlines=True)
+
+        return values
+
+    def value(self) -> Any:
+        char = self._peek()
+
+        if char == '"':
+            return self.string()
+        if char == "[":
+            return self.list()
+        if char == "{":
+            return self.object()
+        if char.isdigit():
+            return self.number()
+
+        start = self.pos
+        match = NAME_RE.match(self.text, self.pos)
+        if match:
+            keyword = match.group()
+            if keyword in ("true", "false", "null"):
+                self.pos = match.end()
+                return dict(true=True, false=False, null=None)[keyword]
+        self.error(f"Expected a value, found {char or 'end of file'!r}", start)
+
+    def number(self) -> Any:
+        match = NUMBER_RE.match(self.text, self.pos)
+        assert match
+        self.pos = match.end()
+        if match.group(1):
+            return float(match.group())
+        return int(match.group())
+
+    def string(self) -> str:
+        start = self.pos
+        self.pos += 1
+        out: List[str] = list()
+
+        while True:
+            char = self._peek()
+            if not char or char == "\n":
+                self.error("Unterminated string", start)
+            self.pos += 1
+
+            if char == '"':
+                return "".join(out)
+            elif char == "\\":
+                out.append(self._escape())
+            elif char in "$%" and self._peek() == "{":
+                self.error("Templates are not supported", self.pos - 1)
+            elif char in "$%" and self._peek(2) == char + "{":
+                # $${ and %%{ are escaped template sequences
+                out.append(char + "{")
+                self.pos += 2
+            else:
+                out.append(char)
+
+    def _escape(self) -> str:
+        start = self.pos - 1
+        char = self._peek()
+        if char in ESCAPES:
+            self.pos += 1
+            return ESCAPES[char]
+        if char in ("u", "U"):
+            digits = self.text[self.pos + 1 : self.pos + (5 if char == "u" else 9)]
+            if len(digits) == (4 if char == "u" else 8):
+                try:
+                    code = int(digits, 16)
+                    self.pos += 1 + len(digits)
+                    return chr(code)
+                except ValueError:
+                    pass
+        self.error("Invalid escape sequence", start)
+
+    def list(self) -> List[Any]:
+        self._expect("[")
+        values: List[Any] = list()
+
+        self._space(newlines=True)
+        while self._peek() != "]":
+            values.append(self.value())
+            self._space(newlines=True)
+            if self._peek() == ",":
+                self.pos += 1
+                self._space(newlines=True)
+            elif self._peek() != "]":
+                self.error(
+                    f"Expected ',' or ']', found {self._peek() or 'end of file'!r}"
+                )
+
+        self.pos += 1
+        return values
+
+    def object(self) -> Dict[str, Any]:
+        self._expect("{")
+        values: Dict[str, Any] = dict()
+
+        self._space(newlines=True)
+        while self._peek() != "}":
+            start = self.pos
+            key = self.string() if self._peek() == '"' else self._name()
+            if key in values:
+                self.error(f"Duplicate key {key!r}", start)
+            self._space()
+            if self._peek() == ":":
+                self.pos += 1
+            else:
+                self._expect("=")
+            self._space()
+            values[key] = self.value()
+            self._end_of_item("}")
+            self._space(newlines=True)
+
+        self.pos += 1
+        return values
+
+
+def _unescape_match(match: re.Match) -> str:
+    escape, template = match.groups()
+    if template:
+        return template + "{"
+    if escape[0] in "uU":
+        return chr(int(escape[1:], 16))
+    return ESCAPES[escape]
+
+
+def unescape(value: Any) -> Any:
+    """
+    Unescape the strings in a document loaded by python-hcl2, including
+    object keys.
+    """
+    if isinstance(value, str):
+        return ESCAPED_RE.sub(_unescape_match, value)
+    if isinstance(value, list):
+        return [unescape(item) for item in value]
+    if isinstance(value, dict):
+        return {unescape(key): unescape(item) for key, item in value.items()}
+    return value
+
+
+def _parse(
+    text: str, path: Optional[Path], fallback: Callable[[], Dict[str, Any]]
+) -> Dict[str, Any]:
+    try:
+        return Parser(text, path).parse()
+    except TfvarsSyntaxError as exc:
+        logger.debug(f"Falling back to python-hcl2: {exc}")
+        try:
+            document = fallback()
+        except Exception:
+            raise exc from None
+        return unescape(document)
+
+
+def loads(text: str) -> Dict[str, Any]:
+    """
+    Parse the contents of a tfvars file. Anything the parser doesn't support
+    is parsed with python-hcl2 instead. If neither can parse it, the
+    parser's error is raised.
+    """
+    return _parse(text, None, lambda: hcl.loads(text))
+
+
+def load(path: Path) -> Dict[str, Any]:
+    """
+    Load a tfvars file, falling back to python-hcl2's cached loader.
+    """
+    with open(path, "r") as f:
+        text = f.read()
+
+    return _parse(text, path, lambda: hcl.load(path))
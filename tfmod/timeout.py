@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import time
+from typing import Generator, NoReturn, Optional, Self
+
+from tfmod.error import StepTimeoutError
+
+"""
+Time limits. A deadline applies to everything run in its context - nested
+deadlines may shorten it, but never extend it. Blocking calls (subprocesses
+and HTTP requests) take their timeouts from the remaining time, so that a
+hung step fails with an error naming it, rather than blocking forever.
+"""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    # When time runs out, per time.monotonic(), if ever
+    at: Optional[float]
+    # The limit which sets the deadline, ie. "-timeout=10m"
+    limit: str
+    # The step currently running
+    step: str
+
+    def remaining(self: Self) -> Optional[float]:
+        if self.at is None:
+            return None
+        return self.at - time.monotonic()
+
+
+DEADLINE: ContextVar[Optional[Deadline]] = ContextVar("DEADLINE", default=None)
+
+
+def _format(seconds: float) -> str:
+    minutes, secs = divmod(round(seconds), 60)
+    return f"{minutes}m{secs}s" if minutes else f"{secs}s"
+
+
+def timed_out(step: Optional[str] = None) -> NoReturn:
+    """
+    Raise a StepTimeoutError for the current deadline.
+    """
+    current = DEADLINE.get()
+    if current is None:
+        raise StepTimeoutError(f"Timed out while running {step}")
+
+    message = f"Timed out during {current.step}"
+    if step and step != current.step:
+        message += f": {step}"
+    raise StepTimeoutError(f"{message} ({current.limit})")
+
+
+def remaining(step: Optional[str] = None) -> Optional[float]:
+    """
+    The seconds left before the current deadline, or None if there isn't
+    one. If time has already run out, raises a StepTimeoutError.
+    """
+    current = DEADLINE.get()
+    if current is None:
+        return None
+
+    left = current.remaining()
+    if left is not None and left <= 0:
+        timed_out(step)
+    return left
+
+
+@contextmanager
+def deadline(
+    step: str, seconds: float = 0.0, limit: Optional[str] = None
+) -> Generator[None, None, None]:
+    """
+    Run a step, optionally limited to the given number of seconds. With no
+    limit, the step runs under the enclosing deadline, if any.
+    """
+    current = DEADLINE.get()
+    at = current.at if current else None
+    description = current.limit if current else ""
+
+    if seconds:
+        ours = time.monotonic() + seconds
+        if at is None or ours < at:
+            at = ours
+            description = limit or f"limit of {_format(seconds)}"
+
+    token = DEADLINE.set(Deadline(at=at, limit=description, step=step))
+    try:
+        remaining()
+        yield
+    finally:
+        DEADLINE.reset(token)
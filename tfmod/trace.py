@@ -0,0 +1,157 @@
+import atexit
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Generator, List, Mapping, Optional, Self
+
+from tfmod.io import Level, logger
+
+"""
+Lightweight tracing. Spans are recorded around resource refreshes, actions,
+Terraform commands and subprocesses, nesting under whichever span is active
+in the current context.
+
+Setting TFMOD_TRACE to a path writes the spans in Chrome's trace event format
+when TfMod exits, which may be opened in Perfetto or chrome://tracing. With
+TF_LOG=TRACE, the logger also reports each span as it starts and ends.
+"""
+
+
+@dataclass
+class Span:
+    id: int
+    name: str
+    category: str
+    parent: Optional["Span"]
+    thread: int
+    start: float
+    end: Optional[float] = None
+    args: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self: Self) -> float:
+        """
+        The span's duration, in seconds.
+        """
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def event(self: Self) -> Dict[str, Any]:
+        """
+        The span as a Chrome trace "complete" event. Times are in microseconds.
+        """
+        args = dict(self.args, id=self.id)
+        if self.parent:
+            args["parent"] = self.parent.id
+
+        return dict(
+            name=self.name,
+            cat=self.category,
+            ph="X",
+            ts=round(self.start * 1e6),
+            dur=round(self.duration * 1e6),
+            pid=os.getpid(),
+            tid=self.thread,
+            args=args,
+        )
+
+
+CURRENT_SPAN: ContextVar[Optional[Span]] = ContextVar("CURRENT_SPAN", default=None)
+
+
+class Tracer:
+    """
+    Collects finished spans, if tracing is enabled.
+    """
+
+    def __init__(self: Self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.spans: List[Span] = list()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self: Self) -> bool:
+        return self.path is not None or logger.is_level(Level.TRACE)
+
+    def start(self: Self, name: str, category: str, args: Dict[str, Any]) -> Span:
+        span = Span(
+            id=next(self._ids),
+            name=name,
+            category=category,
+            parent=CURRENT_SPAN.get(),
+            thread=threading.get_ident(),
+            start=time.perf_counter(),
+            args=args,
+        )
+        logger.span_start(span.name, span.id, span.parent.id if span.parent else None)
+        return span
+
+    def finish(self: Self, span: Span) -> None:
+        span.end = time.perf_counter()
+        logger.span_end(span.name, span.id, span.duration)
+        if self.path is not None:
+            with self._lock:
+                self.spans.append(span)
+
+    def write(self: Self) -> None:
+        """
+        Write the collected spans to the trace file.
+        """
+        if self.path is None:
+            return
+
+        with self._lock:
+            events = [span.event() for span in self.spans]
+
+        with open(self.path, "w") as f:
+            json.dump(dict(traceEvents=events, displayTimeUnit="ms"), f)
+
+
+tracer: Tracer = Tracer()
+
+
+def configure_tracer(env: Mapping[str, str] = os.environ) -> None:
+    """
+    Replace the tracer, as configured by TFMOD_TRACE. The daemon calls this
+    for every command it runs, so a command without TFMOD_TRACE must get a
+    fresh, disabled tracer rather than keep the daemon's.
+    """
+    global tracer
+
+    tracer = Tracer(env.get("TFMOD_TRACE", None) or None)
+
+
+def _write_trace() -> None:
+    # Registered once, and writes whichever tracer is current at exit
+    tracer.write()
+
+
+configure_tracer()
+atexit.register(_write_trace)
+
+
+@contextmanager
+def span(
+    name: str, category: str = "tfmod", **args: Any
+) -> Generator[Optional[Span], None, None]:
+    """
+    Trace the enclosed block as a span. When tracing is disabled, this does
+    nothing.
+    """
+    if not tracer.enabled:
+        yield None
+        return
+
+    current = tracer.start(name, category, args)
+    token = CURRENT_SPAN.set(current)
+    try:
+        yield current
+    finally:
+        CURRENT_SPAN.reset(token)
+        tracer.finish(current)